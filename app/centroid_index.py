@@ -0,0 +1,299 @@
+"""전역 검색 1단계에 쓰이는 세션 centroid 라우팅 인덱스.
+
+기존 세션의 centroid 를 한 번에 채우려면:
+
+    python -m app.centroid_index
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import List, Optional, Dict, Any, Sequence, Set, TYPE_CHECKING
+
+from app.config import settings
+from app.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+models = lazy_import("qdrant_client.http.models")
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+CENTROID_COLLECTION = "session_centroids"
+
+logger = logging.getLogger("centroid_index")
+
+
+class SessionCentroidIndex:
+    """세션별 centroid 벡터를 모아 둔 라우팅 인덱스.
+
+    세션 하나당 포인트 하나(id = session_id)를 저장합니다.
+    - "centroid": 세션 벡터 평균의 방향 (cosine 검색용)
+    - "sum": 벡터 합계 (DOT 거리라 정규화되지 않음, 증분 갱신용)
+    payload 에는 벡터 개수(count)가 들어갑니다.
+
+    메시지 쓰기 경로는 defer()/mark_stale() 로 변화량만 모아 두고, 프로세스당 하나인 flush 스레드가
+    SESSION_CENTROID_FLUSH_SECONDS 마다 세션별로 한 번씩 반영합니다. 그래서 쓰기마다 centroid
+    조회/저장 왕복이 생기지 않고, 같은 프로세스 안의 동시 쓰기끼리 갱신을 잃지 않습니다. 여러 워커가
+    같은 세션을 동시에 갱신하면 adjust() 의 read-modify-write 가 겹쳐 일부가 유실될 수 있으나 라우팅
+    용도로는 충분하며, 수정/삭제가 생긴 세션은 rebuild()로 정확한 값으로 다시 계산합니다.
+    """
+
+    def __init__(self, client: QdrantClient, dimension: int, collection_name: str = CENTROID_COLLECTION):
+        self.client = client
+        self.dimension = dimension
+        self.collection_name = collection_name
+        self._ready = False
+        # 아직 반영하지 않은 세션별 (벡터 합계 변화량, 개수 변화량)과 다시 계산할 세션
+        self._pending: Dict[int, list] = {}
+        self._stale: Set[int] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def ensure_collection(self) -> None:
+        if self._ready:
+            return
+        try:
+            info = self.client.get_collection(collection_name=self.collection_name)
+            size = info.config.params.vectors["centroid"].size
+            if size != self.dimension:
+                # 임베딩 모델 변경(재색인) 후에는 차원이 다르므로 새로 만듦
+                self.client.delete_collection(collection_name=self.collection_name)
+                raise LookupError("dimension changed")
+        except Exception:
+            try:
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config={
+                        "centroid": models.VectorParams(size=self.dimension, distance=models.Distance.COSINE),
+                        "sum": models.VectorParams(size=self.dimension, distance=models.Distance.DOT)
+                    }
+                )
+            except Exception as e:
+                if "already exists" not in str(e) and "409" not in str(e):
+                    raise
+        self._ready = True
+
+    def _get(self, session_id: int):
+        points = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[session_id],
+            with_payload=True,
+            with_vectors=["sum"]
+        )
+        if not points:
+            return np.zeros(self.dimension, dtype=np.float32), 0
+        point = points[0]
+        return np.asarray(point.vector["sum"], dtype=np.float32), int(point.payload.get("count", 0))
+
+    def _put(self, session_id: int, vector_sum: np.ndarray, count: int) -> None:
+        if count <= 0 or not np.any(vector_sum):
+            self.remove_session(session_id)
+            return
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                models.PointStruct(
+                    id=session_id,
+                    vector={"centroid": vector_sum.tolist(), "sum": vector_sum.tolist()},
+                    payload={"session_id": session_id, "count": count}
+                )
+            ]
+        )
+
+    def apply(
+        self,
+        session_id: int,
+        added: Optional[List[float]] = None,
+        removed: Optional[List[float]] = None
+    ) -> None:
+        """세션에 벡터가 추가/삭제/교체되었을 때 centroid를 증분 갱신합니다."""
+        if added is None and removed is None:
+            return
+        delta = np.zeros(self.dimension, dtype=np.float32)
+        delta_count = 0
+        if removed is not None:
+            delta -= np.asarray(removed, dtype=np.float32)
+            delta_count -= 1
+        if added is not None:
+            delta += np.asarray(added, dtype=np.float32)
+            delta_count += 1
+        self.adjust(session_id, delta, delta_count)
+
+    def adjust(self, session_id: int, delta_sum: np.ndarray, delta_count: int) -> None:
+        """벡터 합계와 개수에 변화량을 더합니다 (여러 벡터를 한 번에 반영할 때 사용)."""
+        self.ensure_collection()
+        vector_sum, count = self._get(session_id)
+        self._put(session_id, vector_sum + delta_sum, count + delta_count)
+
+    def remove_session(self, session_id: int) -> None:
+        with self._lock:
+            self._pending.pop(session_id, None)
+            self._stale.discard(session_id)
+        self.ensure_collection()
+        # 진행 중인 flush 가 삭제 직후 centroid 를 다시 쓰지 않도록 flush 와 직렬화
+        with self._flush_lock:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=[session_id])
+            )
+
+    # --- 지연 반영 ---
+
+    def defer(self, session_id: int, delta_sum: np.ndarray, delta_count: int) -> None:
+        """adjust() 할 변화량을 모아 두었다가 다음 flush 에서 세션별로 한 번에 반영합니다."""
+        with self._lock:
+            if session_id not in self._stale:
+                entry = self._pending.setdefault(session_id, [np.zeros(self.dimension, dtype=np.float32), 0])
+                entry[0] += delta_sum
+                entry[1] += delta_count
+        self._schedule()
+
+    def mark_stale(self, session_id: int) -> None:
+        """이전 벡터를 모르는 수정/삭제 뒤에 다음 flush 에서 centroid 를 다시 계산하도록 표시합니다."""
+        with self._lock:
+            # rebuild 가 모아 둔 변화량까지 포함하므로 버림
+            self._pending.pop(session_id, None)
+            self._stale.add(session_id)
+        self._schedule()
+
+    def flush(self) -> int:
+        """모아 둔 변화량과 재계산을 반영합니다. 반영한 세션 수를 반환합니다."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                stale, self._stale = self._stale, set()
+            for session_id in stale:
+                try:
+                    self.rebuild(session_id)
+                except Exception as e:
+                    logger.error(f"Session centroid rebuild failed for session {session_id}: {e}")
+            for session_id, (delta_sum, delta_count) in pending.items():
+                try:
+                    self.adjust(session_id, delta_sum, delta_count)
+                except Exception as e:
+                    logger.error(f"Session centroid update failed for session {session_id}: {e}")
+            return len(stale) + len(pending)
+
+    def _schedule(self) -> None:
+        interval = settings.SESSION_CENTROID_FLUSH_SECONDS
+        if interval <= 0:
+            # 지연 없이 호출한 스레드에서 바로 반영
+            self.flush()
+            return
+        self.start(interval)
+
+    def start(self, interval_seconds: float) -> None:
+        """flush 를 주기적으로 실행하는 데몬 스레드를 시작합니다 (첫 defer/mark_stale 때 자동 시작)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            def loop() -> None:
+                while not self._stop.wait(interval_seconds):
+                    self.flush()
+
+            self._thread = threading.Thread(target=loop, name="session-centroids", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.flush()
+
+    def rebuild(self, session_id: int, collection_name: Optional[str] = None, page_size: int = 256) -> int:
+        """세션 컬렉션 전체를 스크롤해 centroid를 정확히 다시 계산합니다."""
+        self.ensure_collection()
+        vector_sum = np.zeros(self.dimension, dtype=np.float32)
+        count = 0
+        offset = None
+        found = True
+        while True:
+            try:
+                points, offset = self.client.scroll(
+                    collection_name=collection_name or f"session_{session_id}",
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=False,
+                    with_vectors=True
+                )
+            except Exception as e:
+                if "not found" in str(e).lower() or "404" in str(e):
+                    found = False
+                    break
+                raise
+            if points:
+                vector_sum += np.asarray([point.vector for point in points], dtype=np.float32).sum(axis=0)
+                count += len(points)
+            if offset is None:
+                break
+        if found:
+            # 컬렉션이 없으면(보관/삭제) 기존 centroid 를 그대로 둠
+            self._put(session_id, vector_sum, count)
+        return count
+
+    def unrouted(self, session_ids: List[int]) -> List[int]:
+        """centroid 로 고를 수 없는 세션 id 를 반환합니다.
+
+        아직 centroid 포인트가 없는 세션(인덱스 채우기 전의 기존 세션 등)과 이 프로세스에서 반영을
+        기다리는 변화량이 있는 세션입니다. 라우팅 결과와 합쳐 검색해야 누락되지 않습니다.
+        """
+        self.ensure_collection()
+        indexed = {
+            int(point.id)
+            for point in self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=list(session_ids),
+                with_payload=False,
+                with_vectors=False
+            )
+        }
+        with self._lock:
+            waiting = set(self._pending) | self._stale
+        return [session_id for session_id in session_ids if session_id not in indexed or session_id in waiting]
+
+    def route(
+        self,
+        query_vector: List[float],
+        limit: int,
+        session_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """쿼리와 centroid가 가까운 상위 limit 개 세션을 반환합니다."""
+        self.ensure_collection()
+        query_filter = None
+        if session_ids is not None:
+            query_filter = models.Filter(must=[models.HasIdCondition(has_id=session_ids)])
+        results = self.client.search(
+            collection_name=self.collection_name,
+            query_vector=models.NamedVector(name="centroid", vector=query_vector),
+            query_filter=query_filter,
+            limit=limit
+        )
+        return [
+            {"session_id": int(result.id), "score": result.score, "count": result.payload.get("count", 0)}
+            for result in results
+        ]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """모든 세션의 centroid 를 세션 컬렉션으로부터 다시 계산합니다."""
+    from app.database import db_factory
+    from app.models import SessionModel
+    from app.qdrant_client import QdrantClientFactory
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    qdrant = QdrantClientFactory.create_client()
+    index = SessionCentroidIndex(qdrant.client, qdrant.embedding_dimension)
+    db = db_factory.SessionLocal()
+    try:
+        session_ids = [row[0] for row in db.query(SessionModel.id).order_by(SessionModel.id).all()]
+    finally:
+        db.close()
+    for session_id in session_ids:
+        count = index.rebuild(session_id)
+        logger.info(f"Session {session_id}: centroid rebuilt from {count} vectors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""마감 시간(deadline) 기반 채팅 컨텍스트 검색 단계.
+
+채팅 요청마다 전체 지연 예산(Deadline)을 두고, 임베딩 → (저장, 검색) 단계를 LLM 호출에 쓸 시간
+(CHAT_LLM_RESERVE_SECONDS)을 남긴 범위 안에서만 실행합니다. 단계가 예산을 넘기거나 실패하거나
+의존 서비스의 circuit breaker 가 열려 있으면 그 단계를 건너뛰고 검색 컨텍스트 없이 LLM 으로
+넘어가며, 벡터 저장은 응답을 보낸 뒤 백그라운드 작업으로 미룹니다.
+"""
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import BackgroundTasks
+
+from app.models import MessageModel
+from app.qdrant_client import QdrantClientWrapper, mean_vector, search_chat_context
+from app.config import settings
+from app.utils.circuit_breaker import get_circuit_breaker
+from app.utils.deadline import Deadline
+from app.utils.metrics import metrics
+from app.utils.profiler import bind_request_profiler
+
+logger = logging.getLogger("chat_pipeline")
+
+# 단계 이름 → 의존 서비스 (circuit breaker 이름)
+STAGE_DEPENDENCIES = {
+    "embedding": "openai_embeddings",
+    "store": "qdrant",
+    "search": "qdrant",
+}
+
+# 단계 실행에 제한 시간을 걸기 위한 풀 (설정을 읽어야 하므로 처음 사용할 때 생성)
+_stage_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_stage_executor() -> ThreadPoolExecutor:
+    global _stage_executor
+    if _stage_executor is None:
+        _stage_executor = ThreadPoolExecutor(
+            max_workers=settings.CHAT_STAGE_MAX_WORKERS, thread_name_prefix="chat-stage"
+        )
+    return _stage_executor
+
+
+class StageRunner:
+    """요청 하나의 단계들을 남은 예산 안에서 실행하고 건너뛴 단계를 기록합니다."""
+
+    def __init__(self, deadline: Deadline, reserve_seconds: float):
+        self.deadline = deadline
+        self.reserve_seconds = reserve_seconds
+        self.skipped: List[str] = []
+
+    def submit(self, stage: str, fn: Callable[[], Any]) -> Optional[Future]:
+        """예산과 circuit breaker 가 허락하면 단계를 시작합니다. 시작하지 않으면 None."""
+        breaker = get_circuit_breaker(STAGE_DEPENDENCIES[stage])
+        if self.deadline.budget_for(self.reserve_seconds) is None:
+            self._skip(stage, "budget")
+            return None
+        if not breaker.allow():
+            self._skip(stage, "circuit_open")
+            return None
+        return _get_stage_executor().submit(bind_request_profiler(self._timed), stage, fn)
+
+    def wait(self, stage: str, future: Optional[Future]) -> Tuple[bool, Any]:
+        """단계 결과를 남은 예산만큼 기다립니다. (완료 여부, 결과)를 반환합니다.
+
+        시간 안에 끝나지 않은 단계는 계속 실행되도록 두고, 실패로 기록합니다.
+        """
+        if future is None:
+            return False, None
+        breaker = get_circuit_breaker(STAGE_DEPENDENCIES[stage])
+        try:
+            result = future.result(timeout=self.deadline.budget_for(self.reserve_seconds) or 0)
+        except FuturesTimeoutError:
+            breaker.record_failure()
+            self._skip(stage, "timeout")
+            return False, None
+        except Exception as e:
+            breaker.record_failure()
+            logger.warning(f"Chat stage {stage} failed: {e}")
+            self._skip(stage, "error")
+            return False, None
+        breaker.record_success()
+        return True, result
+
+    @staticmethod
+    def _timed(stage: str, fn: Callable[[], Any]) -> Any:
+        started = time.monotonic()
+        try:
+            return fn()
+        finally:
+            metrics.observe(f"chat_stage_{stage}_seconds", time.monotonic() - started)
+
+    def _skip(self, stage: str, reason: str) -> None:
+        self.skipped.append(stage)
+        metrics.inc(f"chat_stage_{stage}_skipped_total")
+        metrics.inc(f"chat_stage_skipped_{reason}_total")
+
+
+def _store_later(
+    qdrant_client: QdrantClientWrapper,
+    message: Dict[str, Any],
+    embeddings: Optional[List[List[float]]],
+    pending_embedding: Optional[Future]
+) -> None:
+    """응답 후 백그라운드에서 메시지 벡터를 저장합니다 (아직 진행 중인 임베딩이 있으면 그 결과 사용)."""
+    if embeddings is None and pending_embedding is not None:
+        try:
+            embeddings = pending_embedding.result()
+        except Exception:
+            embeddings = None
+    try:
+        # embeddings 가 None 이면 store_embedding 이 새로 임베딩
+        qdrant_client.store_embedding(embeddings=embeddings, **message)
+        metrics.inc("chat_deferred_stores_total")
+    except Exception as e:
+        metrics.inc("chat_deferred_store_failures_total")
+        logger.error(f"Deferred embedding store failed for message {message['message_id']}: {e}")
+
+
+def retrieve_context(
+    qdrant_client: QdrantClientWrapper,
+    user_message: MessageModel,
+    deadline: Deadline,
+    background_tasks: BackgroundTasks,
+    user_id: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """사용자 메시지를 임베딩해 저장하고 유사 메시지를 검색합니다. user_id 는 세션 소유자입니다.
+
+    (검색 결과, 건너뛴 단계 목록)을 반환합니다. 저장과 검색은 동시에 실행되므로 방금 저장한 사용자
+    메시지 자신은 저장 여부와 관계없이 검색 필터로 제외합니다.
+    """
+    runner = StageRunner(deadline, settings.CHAT_LLM_RESERVE_SECONDS)
+    message = {
+        "message_id": user_message.id,
+        "session_id": user_message.session_id,
+        "content": user_message.content,
+        "role": user_message.role,
+        "user_id": user_id,
+        "created_at": user_message.created_at,
+        "token_count": user_message.token_count,
+        # 임베딩/저장(지연 저장 포함)이 같은 청크를 쓰도록 한 번만 토큰화
+        "chunks": qdrant_client.chunk_text(user_message.content),
+    }
+
+    embedding_future = runner.submit(
+        "embedding", lambda: qdrant_client.embed_message(user_message.content, chunks=message["chunks"])
+    )
+    embedded, embeddings = runner.wait("embedding", embedding_future)
+    if not embedded:
+        # 임베딩 없이는 저장/검색 모두 불가: 컨텍스트 없이 진행하고 저장은 응답 후로 미룸
+        runner.skipped.extend(["store", "search"])
+        background_tasks.add_task(_store_later, qdrant_client, message, None, embedding_future)
+        return [], runner.skipped
+
+    store_future = runner.submit("store", lambda: qdrant_client.store_embedding(embeddings=embeddings, **message))
+    query_vector = mean_vector(embeddings)
+    search_future = runner.submit(
+        "search",
+        lambda: search_chat_context(
+            qdrant_client, user_message.content, user_message.session_id,
+            query_vector=query_vector, exclude_message_id=user_message.id
+        )
+    )
+    _, similar_messages = runner.wait("search", search_future)
+    stored, _ = runner.wait("store", store_future)
+    if not stored and (store_future is None or store_future.done()):
+        # 시작하지 못했거나 실패한 저장은 응답 후 다시 시도 (시간 초과로 진행 중인 저장은 그대로 둠)
+        background_tasks.add_task(_store_later, qdrant_client, message, embeddings, None)
+
+    return similar_messages or [], runner.skipped
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from typing import Optional
@@ -16,18 +17,132 @@ class Settings(BaseSettings):
     # Qdrant Configuration
     QDRANT_HOST: str
     QDRANT_PORT: Optional[int] = None
+    # gRPC 전송 사용 (업서트/검색 시 벡터를 JSON 대신 protobuf 로 전송)
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_GRPC_COMPRESSION: Optional[str] = None  # None, "gzip", "deflate"
     
     # OpenAI Configuration
     OPENAI_API_KEY: str
     OPENAI_ORGANIZATION_ID: Optional[str] = None
     OPENAI_CHAT_MODEL: str = "gpt-4-turbo-preview"
-    OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Qdrant 에 저장되는 벡터의 임베딩 모델 (바꾸면 app.reindex 로 재색인)
+    OPENAI_EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    # OpenAI 호환 서버 주소 (로컬 시뮬레이터: http://localhost:8100/v1)
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+    OPENAI_TIMEOUT_SECONDS: Optional[float] = None  # None 이면 SDK 기본값
+
+    # Qdrant 에 저장되는 벡터의 차원 (OPENAI_EMBEDDING_MODEL 과 함께 변경)
+    EMBEDDING_DIMENSION: int = 1536
+
+    # 긴 메시지는 이 토큰 수 이하의 겹치는 청크로 나눠 청크마다 벡터를 저장 (0이면 나누지 않음)
+    EMBEDDING_CHUNK_MAX_TOKENS: int = 512
+    EMBEDDING_CHUNK_OVERLAP_TOKENS: int = 64
+
+    # OpenAI 호출 제한/재시도
+    OPENAI_REQUESTS_PER_MINUTE: int = 3000
+    OPENAI_TOKENS_PER_MINUTE: int = 1000000
+    OPENAI_MAX_RETRIES: int = 5
+    OPENAI_HEDGE_EMBEDDINGS: bool = False
     
     # Database Configuration
     DATABASE_HOST: str
     DATABASE_PORT: Optional[int] = None
     DATABASE_NAME: Optional[str] = None
 
+    # Search Configuration
+    LEXICAL_INDEX_PATH: str = "./echoprompt_fts.db"
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000  # 0이면 캐시 사용 안 함
+    SEARCH_CACHE_TTL_SECONDS: float = 60.0
+    GLOBAL_SEARCH_MAX_WORKERS: int = 8
+    # 세션 centroid 라우팅: 전역 검색 시 정밀 검색할 후보 세션 수 (0이면 전체 세션 검색)
+    SESSION_CENTROIDS_ENABLED: bool = True
+    GLOBAL_SEARCH_CANDIDATE_SESSIONS: int = 50
+    # 메시지 쓰기로 생긴 centroid 변화량을 모아 반영하는 주기 (0이면 쓰기마다 바로 반영)
+    SESSION_CENTROID_FLUSH_SECONDS: float = 2.0
+    # adaptive-k 검색: max_k 의 몇 배까지 후보를 가져올지, 경계로 인정할 최소 점수 차(후보 점수 폭 대비 비율)
+    SEARCH_ADAPTIVE_K_OVERSAMPLE: int = 2
+    SEARCH_ADAPTIVE_K_MIN_RELATIVE_GAP: float = 0.25
+    # 청크 검색 결과를 메시지 단위로 합치는 방법: max(최고 청크 점수) 또는 sum(상위 SEARCH_CHUNK_GROUP_SIZE 개 청크 점수 합)
+    SEARCH_CHUNK_AGGREGATION: str = "max"
+    SEARCH_CHUNK_GROUP_SIZE: int = 3
+    # 채팅 프롬프트에 넣을 유사 메시지: 최대/최소 개수와 최소 유사도 (None 이면 임계값 없음)
+    CHAT_CONTEXT_MAX_K: int = 5
+    CHAT_CONTEXT_MIN_K: int = 1
+    CHAT_CONTEXT_SCORE_THRESHOLD: Optional[float] = None
+    CHAT_CONTEXT_ADAPTIVE_K: bool = True
+    # 채팅 요청의 종단 간 지연 예산과 LLM 호출에 남겨 둘 시간 (이 시간을 남길 수 없으면 검색 단계를 건너뜀)
+    CHAT_DEADLINE_SECONDS: float = 30.0
+    CHAT_LLM_RESERVE_SECONDS: float = 10.0
+    CHAT_STAGE_MAX_WORKERS: int = 16
+    # 의존 서비스(qdrant, openai_*)별 circuit breaker: 연속 실패 횟수와 열린 상태 유지 시간
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_SECONDS: float = 30.0
+
+    # 세션 컬렉션 계층화: idle 시간(초) 이후 on-disk 저장 / 스냅샷 파일로 보관 후 삭제 (0이면 해당 단계 사용 안 함)
+    SESSION_TIERING_ENABLED: bool = False
+    SESSION_TIERING_ON_DISK_AFTER_SECONDS: float = 86400.0
+    SESSION_TIERING_ARCHIVE_AFTER_SECONDS: float = 604800.0
+    # 메모리에 둘 세션 벡터의 추정 크기 상한 (넘으면 오래된 세션부터 on-disk, None 이면 제한 없음)
+    SESSION_TIERING_MEMORY_BUDGET_MB: Optional[float] = None
+    SESSION_TIERING_INTERVAL_SECONDS: float = 600.0
+    SESSION_SNAPSHOT_DIR: str = "./session_snapshots"
+
+    # /admin/stats 세션 통계: 전체 재계산(샘플링) 주기 (0이면 쓰기 시 증분 반영만)
+    SESSION_STATS_INTERVAL_SECONDS: float = 300.0
+    # 관리용 엔드포인트 보호 키 (X-Admin-Key 헤더, None 이면 관리용 엔드포인트를 모두 403 으로 거부)
+    ADMIN_API_KEY: Optional[str] = None
+
+    # 파일 업로드 색인: 원본 보관 위치, 업로드 크기 상한, 문서 청크를 저장할 컬렉션
+    FILE_STORAGE_DIR: str = "./uploaded_files"
+    FILE_MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    DOCUMENT_COLLECTION: str = "documents"
+    FILE_CHUNK_MAX_TOKENS: int = 512
+    FILE_CHUNK_OVERLAP_TOKENS: int = 64
+    # 임베딩 호출당 청크 수, 동시 임베딩 스레드 수, 단계 사이 큐 크기(배치 단위)
+    FILE_EMBED_BATCH_SIZE: int = 64
+    FILE_EMBED_WORKERS: int = 4
+    FILE_PIPELINE_QUEUE_SIZE: int = 8
+    # 동시에 색인하는 파일 수 (넘는 업로드는 queued 상태로 대기)
+    FILE_INGEST_MAX_CONCURRENT: int = 2
+
+    # /vectors 배치 업로드: 프로세스별 id 생성기 worker id (0~1023, 프로세스마다 다르게 지정. 미지정 시 임의 값)
+    VECTOR_ID_WORKER_ID: Optional[int] = None
+    VECTOR_UPSERT_BATCH_SIZE: int = 256
+
+    # 요청 프로파일링: 켜면 X-Profile 헤더(+ X-Admin-Key) 또는 샘플링 비율로 고른 요청의 스택을 샘플링해
+    # PROFILING_DIR 에 speedscope/collapsed 파일로 저장 (False 면 미들웨어를 등록하지 않음)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_SECONDS: float = 0.005
+    # 샘플링 비율로 고른 요청은 이 시간보다 오래 걸린 경우만 저장
+    PROFILING_MIN_DURATION_SECONDS: float = 0.0
+    PROFILING_FORMAT: str = "speedscope"  # "speedscope" 또는 "collapsed"
+    PROFILING_DIR: str = "./profiles"
+    PROFILING_MAX_FILES: int = 200
+    PROFILING_MAX_TOTAL_MB: Optional[float] = 500.0
+    PROFILING_MAX_CONCURRENT: int = 2
+
+    # 이 크기(바이트) 이상인 응답은 클라이언트가 허용하면 gzip 압축 (0이면 사용 안 함)
+    RESPONSE_GZIP_MIN_BYTES: int = 1024
+
+    # 서버 시작 시 없는 테이블 생성 (기존 테이블에 추가된 컬럼은 python -m app.migrate 로 반영, DB 초기화를 따로 하는 배포에서는 False)
+    AUTO_CREATE_TABLES: bool = True
+
+    # 일괄 토큰 계산(count_tokens_batch)에 사용할 스레드 수
+    TOKENIZER_THREADS: int = 8
+
+    # 채팅 요청에 포함할 최근 대화 (세션별 메모리 버퍼, HISTORY_MAX_TURNS=0 이면 사용 안 함)
+    HISTORY_MAX_TURNS: int = 20
+    HISTORY_MAX_TOKENS: int = 2000
+    HISTORY_CACHE_MAX_SESSIONS: int = 1000
+    HISTORY_CACHE_TTL_SECONDS: float = 300.0
+
+    # 세션 존재 확인용 메타데이터 캐시 (0이면 사용 안 함)
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    SESSION_CACHE_TTL_SECONDS: float = 60.0
+    SESSION_CACHE_NEGATIVE_TTL_SECONDS: float = 5.0
+
     @property
     def API_PREFIX(self) -> str:
         return f"/api/{self.VITE_API_VERSION}"
@@ -66,4 +181,21 @@ class Settings(BaseSettings):
         env_file = None  # .env 파일 직접 접근 제거
         env_file_encoding = 'utf-8'
 
-settings = Settings() 
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """환경 변수에서 설정을 읽습니다 (첫 호출 시 한 번만)."""
+    return Settings()
+
+
+class _LazySettings:
+    """처음 속성에 접근할 때 Settings 를 만드는 프록시.
+
+    모듈 import 만으로는 환경 변수를 검증하지 않으므로, 환경 변수가 빠져 있어도
+    import 는 성공하고 설정을 실제로 사용할 때 오류가 납니다.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+
+settings = _LazySettings() 
\ No newline at end of file
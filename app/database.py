@@ -3,6 +3,7 @@ from typing import Generator, Optional
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
+from sqlmodel import SQLModel
 from dotenv import load_dotenv
 
 # .env 파일 로드
@@ -28,6 +29,7 @@ class DatabaseFactory:
     def create_tables(self):
         """데이터베이스 테이블 생성"""
         Base.metadata.create_all(bind=self.engine)
+        SQLModel.metadata.create_all(bind=self.engine)
     
     def get_session(self) -> Generator[Session, None, None]:
         """데이터베이스 세션 생성"""
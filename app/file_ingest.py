@@ -0,0 +1,521 @@
+"""업로드된 파일을 텍스트 청크로 나눠 임베딩하고 문서 컬렉션에 저장하는 파이프라인.
+
+원본 파일은 FILE_STORAGE_DIR/{document_id}/ 에 그대로 보관하고, 색인은 다음 단계를 스레드로
+나눠 동시에 실행합니다. 단계 사이는 크기가 정해진 큐(FILE_PIPELINE_QUEUE_SIZE)로 연결되어 있어
+임베딩이 밀리면 추출이 기다리므로 문서 크기와 관계없이 메모리 사용량이 일정합니다.
+
+    추출(페이지/블록 단위) → 토큰 청크 → [큐] → 임베딩 × FILE_EMBED_WORKERS → [큐] → 업서트
+
+포인트 payload 는 docs/qdrant_schema.md 의 text, document_id, chunk_id, token_count, source 등을
+따릅니다. 진행 상황은 IngestJob 에 기록되며 GET /files/{document_id} 로 조회합니다.
+"""
+from __future__ import annotations
+
+import codecs
+import importlib.util
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+import orjson
+
+from app.config import settings
+from app.utils.id_generator import next_vector_id
+from app.utils.lazy_import import lazy_import
+from app.utils.metrics import metrics
+from app.utils.time_utils import to_epoch
+from app.utils.token_utils import get_encoding
+
+models = lazy_import("qdrant_client.http.models")
+pypdf = lazy_import("pypdf")
+
+if TYPE_CHECKING:
+    from app.qdrant_client import QdrantClientWrapper
+
+logger = logging.getLogger("file_ingest")
+
+# 파일 종류별 Content-Type / 확장자
+FILE_KINDS = {
+    "text": ({"text/plain"}, {".txt", ".text", ".log", ".csv"}),
+    "markdown": ({"text/markdown", "text/x-markdown"}, {".md", ".markdown"}),
+    "pdf": ({"application/pdf"}, {".pdf"}),
+}
+
+# 문서 컬렉션 payload 인덱스 (models.PayloadSchemaType 값)
+DOCUMENT_PAYLOAD_INDEXES = {
+    "document_id": "keyword",
+    "session_id": "integer",
+    "user_id": "keyword",
+}
+
+# 파일 종류별 추출에 필요한 선택 의존성
+KIND_DEPENDENCIES = {"pdf": "pypdf"}
+
+DOCUMENT_ID_PATTERN = r"^doc_[0-9a-f]{32}$"
+
+TEXT_BLOCK_BYTES = 64 * 1024
+STATUS_FILE = "status.json"
+ORIGINAL_FILE = "original"
+
+_DONE = object()
+
+# 동시에 실행하는 색인 작업 수 제한 (작업마다 추출/임베딩/업서트 스레드를 따로 띄우므로)
+_ingest_executor: Optional[ThreadPoolExecutor] = None
+_ingest_executor_lock = threading.Lock()
+
+
+def detect_kind(filename: str, content_type: Optional[str]) -> Optional[str]:
+    """Content-Type, 없거나 일반적인 값이면 확장자로 파일 종류를 정합니다. 지원하지 않으면 None."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    for kind, (content_types, _) in FILE_KINDS.items():
+        if content_type in content_types:
+            return kind
+    extension = os.path.splitext(filename)[1].lower()
+    for kind, (_, extensions) in FILE_KINDS.items():
+        if extension in extensions:
+            return kind
+    return None
+
+
+def kind_available(kind: str) -> bool:
+    dependency = KIND_DEPENDENCIES.get(kind)
+    return dependency is None or importlib.util.find_spec(dependency) is not None
+
+
+def new_document_id() -> str:
+    return f"doc_{uuid.uuid4().hex}"
+
+
+def document_dir(document_id: str) -> str:
+    # document_id 는 경로에 그대로 쓰이므로 발급한 형식만 허용
+    if not re.match(DOCUMENT_ID_PATTERN, document_id):
+        raise ValueError(f"Invalid document id: {document_id}")
+    return os.path.join(settings.FILE_STORAGE_DIR, document_id)
+
+
+def original_path(document_id: str) -> str:
+    return os.path.join(document_dir(document_id), ORIGINAL_FILE)
+
+
+# --- 추출 ---
+
+def _text_segments(path: str) -> Iterator[Tuple[int, str]]:
+    """텍스트 파일을 블록 단위로 읽어 (페이지 번호 1, 텍스트) 를 반환합니다.
+
+    단어가 블록 경계에서 잘리지 않도록 마지막 공백 이후 부분은 다음 블록 앞에 붙입니다.
+    공백 없이 TEXT_BLOCK_BYTES 이상 이어지는 텍스트는 남겨 둔 부분이 끝없이 커지지 않도록 그 자리에서 자릅니다.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    tail = ""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(TEXT_BLOCK_BYTES)
+            text = tail + decoder.decode(block, final=not block)
+            if not block:
+                if text:
+                    yield 1, text
+                return
+            cut = max(text.rfind(" "), text.rfind("\n"))
+            if cut < 0:
+                if len(text) < TEXT_BLOCK_BYTES:
+                    tail = text
+                    continue
+                cut = len(text) - 1
+            tail = text[cut + 1:]
+            yield 1, text[:cut + 1]
+
+
+def _pdf_segments(path: str) -> Iterator[Tuple[int, str]]:
+    """PDF 를 페이지 단위로 추출해 (페이지 번호, 텍스트) 를 반환합니다 (pypdf 필요)."""
+    reader = pypdf.PdfReader(path)
+    for number, page in enumerate(reader.pages, start=1):
+        text = page.extract_text() or ""
+        if text.strip():
+            yield number, text + "\n"
+
+
+def extract_segments(path: str, kind: str) -> Iterator[Tuple[int, str]]:
+    if kind == "pdf":
+        return _pdf_segments(path)
+    # Markdown 은 마크업을 그대로 둔 채 일반 텍스트로 색인
+    return _text_segments(path)
+
+
+class TokenChunker:
+    """연속된 텍스트 조각을 max_tokens 토큰, overlap_tokens 만큼 겹치는 청크로 나눕니다."""
+
+    def __init__(self, max_tokens: int, overlap_tokens: int = 0):
+        self.encoding = get_encoding()
+        self.max_tokens = max_tokens
+        self.step = max(1, max_tokens - overlap_tokens)
+        self._tokens: List[int] = []
+        self._page = 1
+        self._emitted = False
+
+    def feed(self, page: int, text: str) -> Iterator[Tuple[int, str, int]]:
+        """(시작 페이지, 청크 텍스트, 토큰 수) 를 만들어지는 대로 반환합니다."""
+        if not self._tokens:
+            self._page = page
+        self._tokens.extend(self.encoding.encode(text, disallowed_special=()))
+        while len(self._tokens) >= self.max_tokens:
+            tokens = self._tokens[:self.max_tokens]
+            yield self._page, self.encoding.decode(tokens), len(tokens)
+            self._emitted = True
+            self._tokens = self._tokens[self.step:]
+            self._page = page
+
+    def flush(self) -> Iterator[Tuple[int, str, int]]:
+        # 마지막 청크에 이미 포함된 겹침 부분만 남았으면 버림
+        overlap = self.max_tokens - self.step
+        if self._tokens and (not self._emitted or len(self._tokens) > overlap):
+            yield self._page, self.encoding.decode(self._tokens), len(self._tokens)
+        self._tokens = []
+
+
+# --- 진행 상황 ---
+
+class IngestJob:
+    """파일 하나의 색인 진행 상황."""
+
+    def __init__(
+        self,
+        document_id: str,
+        filename: str,
+        kind: str,
+        size_bytes: int,
+        session_id: Optional[int] = None,
+        user_id: Optional[str] = None
+    ):
+        self.document_id = document_id
+        self.filename = filename
+        self.kind = kind
+        self.size_bytes = size_bytes
+        self.session_id = session_id
+        self.user_id = user_id
+        self.state = "queued"
+        self.pages = 0
+        self.chunks_extracted = 0
+        self.chunks_embedded = 0
+        self.chunks_stored = 0
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "document_id": self.document_id,
+                "filename": self.filename,
+                "kind": self.kind,
+                "size_bytes": self.size_bytes,
+                "session_id": self.session_id,
+                "user_id": self.user_id,
+                "state": self.state,
+                "pages": self.pages,
+                "chunks_extracted": self.chunks_extracted,
+                "chunks_embedded": self.chunks_embedded,
+                "chunks_stored": self.chunks_stored,
+                "error": self.error,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "elapsed_seconds": round(time.monotonic() - self._started, 3) if self.finished_at is None else None,
+            }
+
+    def save(self) -> None:
+        """상태를 원본 파일 옆에 기록합니다 (재시작 후 조회용)."""
+        data = self.snapshot()
+        path = os.path.join(document_dir(self.document_id), STATUS_FILE)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(orjson.dumps(data))
+        os.replace(f"{path}.tmp", path)
+
+
+_jobs: Dict[str, IngestJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def register_job(job: IngestJob) -> None:
+    with _jobs_lock:
+        _jobs[job.document_id] = job
+
+
+def get_job_status(document_id: str) -> Optional[Dict[str, Any]]:
+    """진행 중이거나 끝난 색인 작업의 상태. 이 프로세스가 모르는 문서는 저장된 상태 파일을 읽습니다."""
+    with _jobs_lock:
+        job = _jobs.get(document_id)
+    if job is not None:
+        return job.snapshot()
+    try:
+        with open(os.path.join(document_dir(document_id), STATUS_FILE), "rb") as f:
+            data = orjson.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+    if data["state"] in ("queued", "processing"):
+        # 색인 도중 프로세스가 재시작된 작업
+        data["state"] = "failed"
+        data["error"] = "Indexing was interrupted by a server restart"
+    return data
+
+
+def forget_job(document_id: str) -> None:
+    with _jobs_lock:
+        _jobs.pop(document_id, None)
+
+
+# --- 색인 파이프라인 ---
+
+def ensure_document_collection(qdrant: QdrantClientWrapper, collection_name: Optional[str] = None) -> str:
+    collection_name = collection_name or settings.DOCUMENT_COLLECTION
+    try:
+        qdrant.client.get_collection(collection_name=collection_name)
+        return collection_name
+    except Exception:
+        pass
+    try:
+        qdrant.client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=qdrant.embedding_dimension, distance=models.Distance.COSINE)
+        )
+    except Exception as e:
+        if "already exists" not in str(e) and "409" not in str(e):
+            raise
+        return collection_name
+    for field_name, field_schema in DOCUMENT_PAYLOAD_INDEXES.items():
+        try:
+            qdrant.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType(field_schema),
+            )
+        except Exception as e:
+            logger.warning(f"Error creating payload index {field_name} on {collection_name}: {e}")
+    return collection_name
+
+
+def _get_ingest_executor() -> ThreadPoolExecutor:
+    global _ingest_executor
+    with _ingest_executor_lock:
+        if _ingest_executor is None:
+            _ingest_executor = ThreadPoolExecutor(
+                max_workers=settings.FILE_INGEST_MAX_CONCURRENT, thread_name_prefix="file-ingest"
+            )
+        return _ingest_executor
+
+
+def submit_ingest(qdrant: QdrantClientWrapper, job: IngestJob, path: str) -> Future:
+    """색인 작업을 대기열에 넣습니다. FILE_INGEST_MAX_CONCURRENT 개를 넘는 작업은 queued 상태로 기다립니다.
+
+    작업마다 스레드 2 + FILE_EMBED_WORKERS 개를 쓰므로, 프로세스 전체의 색인 스레드 수는
+    FILE_INGEST_MAX_CONCURRENT × (3 + FILE_EMBED_WORKERS) 를 넘지 않습니다.
+    """
+    return _get_ingest_executor().submit(IngestPipeline(qdrant).run, job, path)
+
+
+class IngestPipeline:
+    """추출/임베딩/업서트를 동시에 실행하는 색인 파이프라인."""
+
+    def __init__(
+        self,
+        qdrant: QdrantClientWrapper,
+        batch_size: Optional[int] = None,
+        embed_workers: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        self.qdrant = qdrant
+        self.batch_size = batch_size or settings.FILE_EMBED_BATCH_SIZE
+        self.embed_workers = embed_workers or settings.FILE_EMBED_WORKERS
+        self.queue_size = queue_size or settings.FILE_PIPELINE_QUEUE_SIZE
+
+    def run(self, job: IngestJob, path: str) -> None:
+        """job 을 끝까지 처리합니다. 실패하면 job.state 를 failed 로 두고 이미 저장한 포인트를 지웁니다."""
+        started = time.monotonic()
+        job.state = "processing"
+        collection_name = ensure_document_collection(self.qdrant)
+        chunks: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        points: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        failed = threading.Event()
+        errors: List[BaseException] = []
+
+        def guarded(stage: Callable[[], None]) -> Callable[[], None]:
+            def run_stage() -> None:
+                try:
+                    stage()
+                except BaseException as e:
+                    errors.append(e)
+                    failed.set()
+            return run_stage
+
+        def put(target: queue.Queue, item: Any) -> bool:
+            # 다른 단계가 실패하면 가득 찬 큐에서 영원히 기다리지 않도록 주기적으로 확인
+            while not failed.is_set():
+                try:
+                    target.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def extract() -> None:
+            chunker = TokenChunker(settings.FILE_CHUNK_MAX_TOKENS, settings.FILE_CHUNK_OVERLAP_TOKENS)
+            batch: List[Tuple[int, int, str, int]] = []
+            chunk_id = 0
+            last_page = 0
+            try:
+                for page, text in self._segments(path, job.kind):
+                    if page != last_page:
+                        job.add(pages=1)
+                        last_page = page
+                    for chunk in chunker.feed(page, text):
+                        batch.append((chunk_id, *chunk))
+                        chunk_id += 1
+                        if len(batch) >= self.batch_size:
+                            job.add(chunks_extracted=len(batch))
+                            if not put(chunks, batch):
+                                return
+                            batch = []
+                    if failed.is_set():
+                        return
+                for chunk in chunker.flush():
+                    batch.append((chunk_id, *chunk))
+                    chunk_id += 1
+                if batch:
+                    job.add(chunks_extracted=len(batch))
+                    put(chunks, batch)
+            finally:
+                for _ in range(self.embed_workers):
+                    put(chunks, _DONE)
+
+        def embed() -> None:
+            try:
+                while not failed.is_set():
+                    try:
+                        batch = chunks.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    if batch is _DONE:
+                        return
+                    vectors = self.qdrant.get_embeddings([text for _, _, text, _ in batch])
+                    job.add(chunks_embedded=len(batch))
+                    if not put(points, [self._point(job, chunk, vector) for chunk, vector in zip(batch, vectors)]):
+                        return
+            finally:
+                put(points, _DONE)
+
+        def upsert() -> None:
+            remaining = self.embed_workers
+            while remaining and not failed.is_set():
+                try:
+                    batch = points.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if batch is _DONE:
+                    remaining -= 1
+                    continue
+                self.qdrant.client.upsert(collection_name=collection_name, points=batch)
+                job.add(chunks_stored=len(batch))
+
+        threads = [threading.Thread(target=guarded(extract), name=f"ingest-extract-{job.document_id}")]
+        threads += [
+            threading.Thread(target=guarded(embed), name=f"ingest-embed-{job.document_id}-{i}")
+            for i in range(self.embed_workers)
+        ]
+        threads.append(threading.Thread(target=guarded(upsert), name=f"ingest-upsert-{job.document_id}"))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        job.finished_at = datetime.utcnow()
+        if errors:
+            job.state = "failed"
+            job.error = str(errors[0])
+            logger.error(f"Ingest of {job.document_id} failed: {errors[0]}")
+            metrics.inc("file_ingest_failures_total")
+            delete_document_points(self.qdrant, job.document_id)
+        else:
+            job.state = "completed"
+            elapsed = time.monotonic() - started
+            metrics.observe("file_ingest_seconds", elapsed)
+            logger.info(
+                f"Ingested {job.document_id} ({job.filename}): {job.pages} pages, "
+                f"{job.chunks_stored} chunks in {elapsed:.2f}s"
+            )
+        job.save()
+
+    @staticmethod
+    def _segments(path: str, kind: str) -> Iterator[Tuple[int, str]]:
+        return extract_segments(path, kind)
+
+    @staticmethod
+    def _point(job: IngestJob, chunk: Tuple[int, int, str, int], vector: List[float]) -> models.PointStruct:
+        chunk_id, page, text, token_count = chunk
+        return models.PointStruct(
+            id=next_vector_id(),
+            vector=vector,
+            payload={
+                "text": text,
+                "document_id": job.document_id,
+                "chunk_id": chunk_id,
+                "memory_type": "long_term",
+                "user_id": job.user_id,
+                "session_id": job.session_id,
+                "token_count": token_count,
+                "created_at": to_epoch(job.created_at),
+                "source": job.filename,
+                "metadata": {"page": page, "kind": job.kind},
+            }
+        )
+
+
+def delete_document_points(qdrant: QdrantClientWrapper, document_id: str) -> None:
+    try:
+        qdrant.client.delete(
+            collection_name=settings.DOCUMENT_COLLECTION,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[
+                models.FieldCondition(key="document_id", match=models.MatchValue(value=document_id))
+            ]))
+        )
+    except Exception as e:
+        logger.error(f"Error deleting document {document_id} points: {e}")
+
+
+def search_documents(
+    qdrant: QdrantClientWrapper,
+    query: str,
+    limit: int = 5,
+    document_id: Optional[str] = None,
+    session_id: Optional[int] = None,
+    user_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """문서 청크를 의미 검색합니다. 문서 컬렉션이 아직 없으면 빈 결과."""
+    must = [
+        models.FieldCondition(key=key, match=models.MatchValue(value=value))
+        for key, value in (("document_id", document_id), ("session_id", session_id), ("user_id", user_id))
+        if value is not None
+    ]
+    try:
+        results = qdrant.client.search(
+            collection_name=settings.DOCUMENT_COLLECTION,
+            query_vector=qdrant.embed_query(query),
+            query_filter=models.Filter(must=must) if must else None,
+            limit=limit
+        )
+    except Exception as e:
+        if "not found" in str(e).lower() or "404" in str(e):
+            return []
+        raise
+    return [{"id": result.id, "score": result.score, "payload": result.payload} for result in results]
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Iterable
+from datetime import datetime
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.models import MessageModel, SessionModel
+from app.config import settings
+from app.utils.lazy_import import lazy_import
+from app.utils.time_utils import to_epoch
+from app.utils.search_cache import get_search_cache
+from app.utils.orm_events import CommitQueue
+
+logger = logging.getLogger("lexical_index")
+
+# Qdrant payload 필터에서 SQL 컬럼으로 옮길 수 있는 필드
+FILTER_COLUMNS = ("session_id", "role", "memory_type", "user_id", "created_at")
+
+models = lazy_import("qdrant_client.http.models")
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """사용자 입력을 FTS5 MATCH 식으로 변환합니다.
+
+    각 단어를 따옴표로 감싸 연산자로 해석되지 않게 하고 OR로 묶습니다.
+    "ERR-1234" 같은 식별자는 구(phrase)로 검색됩니다.
+    """
+    terms = [term.replace('"', '""') for term in query.split() if re.search(r"\w", term)]
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class LexicalIndex:
+    """MessageModel.content 에 대한 SQLite FTS5 전문 검색 인덱스.
+
+    메시지 id를 FTS rowid로 사용하므로 갱신/삭제는 rowid 조회로 처리됩니다.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+            "content, session_id UNINDEXED, role UNINDEXED, memory_type UNINDEXED, "
+            "user_id UNINDEXED, created_at UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        self._conn.commit()
+
+    def upsert(
+        self,
+        message_id: int,
+        session_id: int,
+        content: str,
+        role: str,
+        created_at: Optional[datetime] = None,
+        memory_type: str = "short_term",
+        user_id: Optional[str] = None
+    ) -> None:
+        self.upsert_many([(message_id, session_id, content, role, created_at, memory_type, user_id)])
+
+    def upsert_many(self, rows: Iterable[tuple]) -> None:
+        """(message_id, session_id, content, role, created_at, memory_type, user_id) 튜플들을 반영합니다."""
+        values = [
+            (
+                message_id, content, session_id, role, memory_type, user_id,
+                to_epoch(created_at or datetime.utcnow())
+            )
+            for message_id, session_id, content, role, created_at, memory_type, user_id in rows
+        ]
+        if not values:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM messages_fts WHERE rowid = ?", [(v[0],) for v in values])
+            self._conn.executemany(
+                "INSERT INTO messages_fts(rowid, content, session_id, role, memory_type, user_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values
+            )
+            self._conn.commit()
+
+    def delete(self, message_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM messages_fts WHERE rowid = ?", (message_id,))
+            self._conn.commit()
+
+    def delete_session(self, session_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM messages_fts WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM messages_fts").fetchone()[0]
+
+    def rebuild(self, db: Session, batch_size: int = 1000) -> int:
+        """DB의 MessageModel 전체로 인덱스를 다시 만듭니다. id 순서로 배치 단위 처리합니다."""
+        with self._lock:
+            self._conn.execute("DELETE FROM messages_fts")
+            self._conn.commit()
+        return self._index_messages(db, None, batch_size)
+
+    def index_session(self, db: Session, session_id: int, batch_size: int = 1000) -> int:
+        """ORM 이벤트 없이 일괄 추가된 세션 메시지(세션 fork 등)를 인덱스에 반영합니다."""
+        return self._index_messages(db, session_id, batch_size)
+
+    def _index_messages(self, db: Session, session_id: Optional[int], batch_size: int) -> int:
+        last_id = 0
+        total = 0
+        while True:
+            # user_id 는 세션 소유자 (search 의 user_id 필터용)
+            query = (
+                db.query(MessageModel, SessionModel.user_id)
+                .outerjoin(SessionModel, SessionModel.id == MessageModel.session_id)
+                .filter(MessageModel.id > last_id)
+            )
+            if session_id is not None:
+                query = query.filter(MessageModel.session_id == session_id)
+            batch = query.order_by(MessageModel.id).limit(batch_size).all()
+            if not batch:
+                break
+            self.upsert_many(
+                (m.id, m.session_id, m.content, m.role, m.created_at, "short_term", user_id)
+                for m, user_id in batch
+            )
+            last_id = batch[-1][0].id
+            total += len(batch)
+        return total
+
+    def search(
+        self,
+        query: str,
+        session_id: Optional[int] = None,
+        limit: int = 5,
+        query_filter: Optional[models.Filter] = None
+    ) -> List[Dict[str, Any]]:
+        """BM25 순으로 정렬된 검색 결과를 search_similar 와 같은 형태로 반환합니다."""
+        match = build_match_query(query)
+        if match is None:
+            return []
+
+        clauses = ["messages_fts MATCH ?"]
+        params: List[Any] = [match]
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        filter_clauses, filter_params = self._filter_to_sql(query_filter)
+        clauses.extend(filter_clauses)
+        params.extend(filter_params)
+        params.append(limit)
+
+        sql = (
+            "SELECT rowid, content, session_id, role, memory_type, user_id, created_at, "
+            "bm25(messages_fts) AS rank FROM messages_fts "
+            f"WHERE {' AND '.join(clauses)} ORDER BY rank LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "id": row[0],
+                "score": -row[7],  # bm25()는 낮을수록 관련도가 높음
+                "payload": {
+                    "content": row[1],
+                    "message_id": row[0],
+                    "session_id": row[2],
+                    "role": row[3],
+                    "memory_type": row[4],
+                    "user_id": row[5],
+                    "created_at": row[6]
+                }
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _filter_to_sql(query_filter: Optional[models.Filter]):
+        """build_payload_filter 가 만드는 must 조건(match/range)을 SQL 조건으로 옮깁니다."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        if query_filter is None:
+            return clauses, params
+        for condition in query_filter.must or []:
+            key = getattr(condition, "key", None)
+            if key not in FILTER_COLUMNS:
+                raise ValueError(f"Unsupported lexical filter field: {key}")
+            if condition.match is not None:
+                clauses.append(f"{key} = ?")
+                params.append(condition.match.value)
+            if condition.range is not None:
+                for attr, op in (("gt", ">"), ("gte", ">="), ("lt", "<"), ("lte", "<=")):
+                    bound = getattr(condition.range, attr)
+                    if bound is not None:
+                        clauses.append(f"{key} {op} ?")
+                        params.append(bound)
+        return clauses, params
+
+
+_lexical_index: Optional[LexicalIndex] = None
+
+
+def get_lexical_index() -> LexicalIndex:
+    """프로세스 전역 LexicalIndex 를 반환합니다."""
+    global _lexical_index
+    if _lexical_index is None:
+        _lexical_index = LexicalIndex(settings.LEXICAL_INDEX_PATH)
+    return _lexical_index
+
+
+# --- MessageModel 변경 사항을 커밋 시점에 인덱스에 반영 ---
+
+def _queue_upsert(mapper, connection, target: MessageModel) -> None:
+    # 세션 소유자는 같은 트랜잭션의 연결로 조회 (flush 중이므로 ORM 세션은 쓰지 않음)
+    user_id = connection.execute(
+        select(SessionModel.user_id).where(SessionModel.id == target.session_id)
+    ).scalar()
+    _pending.queue(
+        target, ("upsert", target.id, target.session_id, target.content, target.role, target.created_at, user_id)
+    )
+
+
+def _apply_pending(pending) -> None:
+    index = get_lexical_index()
+    try:
+        upserts = []
+        for op, message_id, session_id, content, role, created_at, user_id in pending:
+            if op == "delete":
+                index.upsert_many(upserts)
+                upserts = []
+                index.delete(message_id)
+            else:
+                upserts.append((message_id, session_id, content, role, created_at, "short_term", user_id))
+        index.upsert_many(upserts)
+    except Exception as e:
+        logger.error(f"Error updating lexical index: {e}")
+    # 키워드/hybrid 검색 결과가 바뀌므로 해당 세션의 캐시 무효화
+    search_cache = get_search_cache()
+    for session_id in {item[2] for item in pending}:
+        search_cache.bump(session_id)
+
+
+_pending = CommitQueue("lexical_index", _apply_pending)
+event.listen(MessageModel, "after_insert", _queue_upsert)
+event.listen(MessageModel, "after_update", _queue_upsert)
+_pending.track(
+    MessageModel, "after_delete",
+    lambda target: ("delete", target.id, target.session_id, target.content, target.role, target.created_at, None)
+)
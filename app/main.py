@@ -1,56 +1,123 @@
-from fastapi import FastAPI
+"""EchoPrompt API 애플리케이션.
+
+모듈 import 는 부수 효과가 없으며(환경 변수 검증, 무거운 SDK import 없음), 앱은 create_app()
+에서 만들어집니다. `uvicorn app.main:app` 처럼 `app` 속성에 처음 접근할 때 create_app() 이
+한 번 호출되며, `uvicorn --factory app.main:create_app` 으로 직접 사용할 수도 있습니다.
+"""
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import session_router, query_router, chat_router
-from app.database import create_db_and_tables
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from app.routers import session_router, query_router, chat_router, vector_router, file_router, admin_router
+from app.database import create_db_and_tables, db_factory
+from app.lexical_index import get_lexical_index
+from app.qdrant_client import get_qdrant_client
+from app.session_stats import get_session_stats
+from app.utils.admin_auth import ADMIN_KEY_HEADER, admin_key_valid
+from app.utils.metrics import metrics
+from app.utils.profiler import SamplingProfiler, enforce_retention, profile_request, track_request_threads
+from app.utils.token_utils import preload_encoding
 from app.config import settings
+import asyncio
 import os
 import logging
+import random
+import re
+import threading
+import time
+import uuid
 
-# 필수 환경 변수 확인
-if not os.getenv('VITE_FRONTEND_PORT'):
-    raise ValueError("VITE_FRONTEND_PORT environment variable is not set")
+root_router = APIRouter()
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+PROFILE_HEADER = b"x-profile"
 
-app = FastAPI(
-    title="EchoPrompt API",
-    description="EchoPrompt Backend API",
-    version="1.0.0"
-)
 
-# CORS 설정
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        settings.FRONTEND_URL,
-        f"http://localhost:{os.getenv('VITE_FRONTEND_PORT')}",
-        f"http://127.0.0.1:{os.getenv('VITE_FRONTEND_PORT')}"
-    ],  # 프론트엔드 URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class ProfilingMiddleware:
+    """선택된 요청을 샘플링 프로파일러로 감싸고 결과를 PROFILING_DIR 에 저장하는 ASGI 미들웨어.
 
-# API 라우터 등록
-app.include_router(session_router.router)
-app.include_router(query_router.router)
-app.include_router(chat_router.router)
+    X-Profile: 1 헤더와 올바른 X-Admin-Key 가 함께 온 요청은 항상, 나머지는 PROFILING_SAMPLE_RATE
+    비율로 프로파일링합니다. 헤더로 요청한 경우 응답의 X-Profile-Id 헤더에 파일 이름을 돌려줍니다.
+    PROFILING_ENABLED=False 이면 create_app() 이 이 미들웨어를 등록하지 않으므로 비용이 없습니다.
+    """
 
-@app.on_event("startup")
-async def startup_event():
-    """서버 시작 시 DB 테이블 생성"""
-    create_db_and_tables()
+    def __init__(self, app):
+        self.app = app
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def _wants_profile(self, scope) -> bool:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER) == b"1":
+            admin_key = headers.get(ADMIN_KEY_HEADER.lower().encode())
+            return admin_key_valid(admin_key.decode("latin-1") if admin_key else None)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._wants_profile(scope)
+        if not requested and (settings.PROFILING_SAMPLE_RATE <= 0 or random.random() >= settings.PROFILING_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+        with self._lock:
+            if self._active >= settings.PROFILING_MAX_CONCURRENT:
+                metrics.inc("profiling_skipped_total")
+                requested = False
+                profile_id = None
+            else:
+                self._active += 1
+                profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        if profile_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message):
+            if requested and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
 
-@app.get("/api/v1/health")
+        profiler = SamplingProfiler(interval=settings.PROFILING_INTERVAL_SECONDS)
+        profiler.start()
+        try:
+            with profile_request(profiler):
+                await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.stop()
+            with self._lock:
+                self._active -= 1
+            if requested or profiler.duration >= settings.PROFILING_MIN_DURATION_SECONDS:
+                route = re.sub(r"[^A-Za-z0-9_.-]+", "_", scope["path"].strip("/"))[:80]
+                name = f"{profile_id}_{scope['method']}_{route}"
+                await run_in_threadpool(self._save, profiler, name)
+
+    @staticmethod
+    def _save(profiler: SamplingProfiler, name: str) -> None:
+        try:
+            path = profiler.write(settings.PROFILING_DIR, name, settings.PROFILING_FORMAT)
+            max_total_bytes = (
+                int(settings.PROFILING_MAX_TOTAL_MB * 1024 * 1024) if settings.PROFILING_MAX_TOTAL_MB else None
+            )
+            enforce_retention(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES, max_total_bytes)
+            metrics.inc("profiling_profiles_total")
+            metrics.observe("profiling_request_seconds", profiler.duration)
+            logging.info(f"Request profile written to {path} ({profiler.sample_count} samples)")
+        except Exception as e:
+            logging.error(f"Failed to write request profile {name}: {e}")
+
+
+@root_router.get("/api/v1/health")
 async def health_check():
     return {"status": "healthy"}
 
-@app.get(
+@root_router.get("/api/v1/metrics", tags=["Root"], summary="Process metrics")
+async def get_metrics():
+    """OpenAI 호출 대기열 길이, 스로틀 시간 등 프로세스 내 지표를 반환합니다."""
+    return metrics.snapshot()
+
+@root_router.get(
     "/",
     tags=["Root"],
     summary="API root",
@@ -59,3 +126,105 @@ async def health_check():
 async def root():
     """Root endpoint returning a welcome message."""
     return {"message": "Welcome to EchoPrompt API"}
+
+
+async def startup_event():
+    """서버 시작 시 DB 테이블 생성"""
+    # 첫 요청이 tiktoken BPE 로딩을 기다리지 않도록 백그라운드에서 미리 불러옴
+    preload_encoding()
+
+    if settings.AUTO_CREATE_TABLES:
+        create_db_and_tables()
+
+    # 오래 쓰지 않은 세션 컬렉션을 주기적으로 on-disk/스냅샷으로 내림
+    if settings.SESSION_TIERING_ENABLED:
+        get_qdrant_client().tiering.start()
+
+    # /admin/stats 용 세션 통계를 주기적으로 다시 계산 (첫 샘플은 시작 직후)
+    if settings.SESSION_STATS_INTERVAL_SECONDS > 0:
+        get_session_stats().start(db_factory, get_qdrant_client())
+
+    # 키워드 검색 인덱스가 비어 있으면 DB 메시지로 재구성
+    lexical_index = get_lexical_index()
+    if lexical_index.count() == 0:
+        db = db_factory.SessionLocal()
+        try:
+            rebuilt = lexical_index.rebuild(db)
+            logging.info(f"Lexical index rebuilt with {rebuilt} messages")
+        except Exception as e:
+            logging.error(f"Lexical index rebuild failed: {e}")
+        finally:
+            db.close()
+
+
+def create_app() -> FastAPI:
+    """설정을 읽어 FastAPI 앱을 구성합니다."""
+    # 필수 환경 변수 확인
+    if not os.getenv('VITE_FRONTEND_PORT'):
+        raise ValueError("VITE_FRONTEND_PORT environment variable is not set")
+
+    # 로깅 설정
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    application = FastAPI(
+        title="EchoPrompt API",
+        description="EchoPrompt Backend API",
+        version="1.0.0",
+        default_response_class=ORJSONResponse
+    )
+
+    # CORS 설정
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            settings.FRONTEND_URL,
+            f"http://localhost:{os.getenv('VITE_FRONTEND_PORT')}",
+            f"http://127.0.0.1:{os.getenv('VITE_FRONTEND_PORT')}"
+        ],  # 프론트엔드 URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # 큰 응답(긴 대화 목록, 검색 결과)은 Accept-Encoding 에 따라 gzip 압축
+    if settings.RESPONSE_GZIP_MIN_BYTES > 0:
+        application.add_middleware(GZipMiddleware, minimum_size=settings.RESPONSE_GZIP_MIN_BYTES)
+
+    # 요청 프로파일링 (꺼져 있으면 미들웨어 자체를 등록하지 않음)
+    if settings.PROFILING_ENABLED:
+        application.add_middleware(ProfilingMiddleware)
+
+    # API 라우터 등록
+    application.include_router(session_router.router, prefix=settings.API_PREFIX)
+    application.include_router(query_router.router, prefix=settings.API_PREFIX)
+    application.include_router(chat_router.router, prefix=settings.API_PREFIX)
+    application.include_router(vector_router.router, prefix=settings.API_PREFIX)
+    application.include_router(file_router.router, prefix=settings.API_PREFIX)
+    application.include_router(admin_router.router, prefix=settings.API_PREFIX)
+    application.include_router(root_router)
+
+    if settings.PROFILING_ENABLED:
+        # sync 엔드포인트는 스레드풀에서 실행되므로 실행 스레드를 요청의 프로파일러에 등록하도록 감쌈
+        for route in application.routes:
+            if isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(route.dependant.call):
+                route.dependant.call = track_request_threads(route.dependant.call)
+
+    application.add_event_handler("startup", startup_event)
+    return application
+
+
+_app = None
+
+
+def __getattr__(name: str):
+    # `app.main:app` 으로 참조하는 기존 실행 방식 호환 (처음 접근할 때 앱 생성)
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,66 @@
+"""기존 DB 스키마를 모델에 맞추는 마이그레이션 작업.
+
+create_all 은 없는 테이블만 만들고 기존 테이블은 바꾸지 않으므로, 모델에 새로 추가된 nullable
+컬럼(예: messages.token_count, updated_at)과 인덱스는 이 작업으로 추가합니다. 서버 시작 시에는
+실행하지 않으므로 새 버전을 배포하기 전에 한 번 실행합니다. 이미 있는 컬럼/인덱스는 건너뛰므로
+여러 번 실행해도 안전합니다.
+
+    python -m app.migrate
+    python -m app.migrate --dry-run
+"""
+import argparse
+import logging
+from typing import List, Optional, Sequence
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+from app.database import db_factory
+import app.models  # noqa: F401  (모든 테이블을 SQLModel.metadata 에 등록)
+
+logger = logging.getLogger("migrate")
+
+
+def add_missing_columns(engine: Engine, dry_run: bool = False) -> List[str]:
+    """기존 테이블에 없는 nullable 컬럼과 인덱스를 추가하고 실행한(dry_run 이면 실행할) 변경 목록을 반환합니다."""
+    inspector = inspect(engine)
+    changes: List[str] = []
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                statement = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                changes.append(statement)
+                if not dry_run:
+                    conn.execute(text(statement))
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                changes.append(f"CREATE INDEX {index.name} ON {table.name}")
+                if not dry_run:
+                    index.create(bind=conn, checkfirst=True)
+    return changes
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Add columns and indexes that are missing from existing tables")
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes without applying them")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    db_factory.create_tables()
+    changes = add_missing_columns(db_factory.engine, dry_run=args.dry_run)
+    for change in changes:
+        logger.info(change)
+    logger.info(f"Migration {'planned' if args.dry_run else 'finished'}: {len(changes)} changes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,12 @@
-from .session import SessionModel, SessionCreate, SessionUpdate, SessionResponse
+from .session import (
+    SessionModel,
+    SessionCreate,
+    SessionUpdate,
+    SessionResponse,
+    SessionTokenUsage,
+    SessionFork,
+    SessionForkResponse,
+)
 from .message import MessageModel, MessageCreate, MessageUpdate, MessageResponse, MessagePairResponse
 from .query import (
     QueryRequest,
@@ -6,16 +14,30 @@ from .query import (
     SemanticSearchRequest,
     SemanticSearchResult,
     SemanticSearchResponse,
+    GlobalSearchRequest,
+    GlobalSearchSessionResult,
+    GlobalSearchResponse,
 )
 from .chat import ChatRequest, ChatResponse
 from .error import ErrorResponse, ErrorCode
 from .vector_payload import VectorPayload
+from .vector_batch import (
+    VectorBatchInsertRequest,
+    VectorBatchInsertResponse,
+    VectorBatchSearchRequest,
+    VectorBatchSearchResponse,
+)
+from .file import FileIngestStatus, FileSearchRequest, FileSearchResult, FileSearchResponse
+from .admin import SessionStorageStats, StorageTotals, StorageStatsResponse
 
 __all__ = [
     'SessionModel',
     'SessionCreate',
     'SessionResponse',
     'SessionUpdate',
+    'SessionTokenUsage',
+    'SessionFork',
+    'SessionForkResponse',
     'MessageModel',
     'MessageCreate',
     'MessageUpdate',
@@ -26,10 +48,24 @@ __all__ = [
     'SemanticSearchRequest',
     'SemanticSearchResult',
     'SemanticSearchResponse',
+    'GlobalSearchRequest',
+    'GlobalSearchSessionResult',
+    'GlobalSearchResponse',
     'ChatRequest',
     'ChatResponse',
     'ErrorResponse',
     'ErrorCode',
-    'VectorPayload'
+    'VectorPayload',
+    'VectorBatchInsertRequest',
+    'VectorBatchInsertResponse',
+    'VectorBatchSearchRequest',
+    'VectorBatchSearchResponse',
+    'FileIngestStatus',
+    'FileSearchRequest',
+    'FileSearchResult',
+    'FileSearchResponse',
+    'SessionStorageStats',
+    'StorageTotals',
+    'StorageStatsResponse'
 ]
  
\ No newline at end of file
@@ -0,0 +1,46 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class SessionStorageStats(BaseModel):
+    """Storage statistics for one session."""
+
+    session_id: int = Field(..., description="Session ID")
+    user_id: Optional[str] = Field(None, description="Session owner")
+    message_count: int = Field(..., description="Number of messages")
+    token_count: int = Field(..., description="Sum of stored message token counts")
+    uncounted_messages: int = Field(0, description="Messages without a stored token count")
+    vector_count: int = Field(..., description="Points in the session collection (one per message chunk)")
+    indexed_vector_count: int = Field(0, description="Points already in the HNSW index")
+    segment_count: Optional[int] = Field(None, description="Collection segments")
+    collection_status: Optional[str] = Field(None, description="Qdrant collection status (green, yellow, grey, red)")
+    optimizer_ok: Optional[bool] = Field(None, description="Whether the Qdrant optimizer reports no error")
+    on_disk: bool = Field(False, description="Whether original vectors are stored on disk")
+    quantization: Optional[str] = Field(None, description="Quantization type: scalar, product, binary or none")
+    dimension: Optional[int] = Field(None, description="Vector dimension")
+    estimated_memory_bytes: int = Field(..., description="Estimated RAM used by vectors and the HNSW graph")
+    tier: Optional[str] = Field(None, description="Tiering state (memory, on_disk, archived) when tiering is enabled")
+    updated_at: float = Field(..., description="Epoch seconds of the last incremental update or sample")
+
+class StorageTotals(BaseModel):
+    """Fleet-wide storage totals."""
+
+    sessions: int = Field(..., description="Number of sessions")
+    sessions_with_vectors: int = Field(..., description="Sessions that have at least one vector")
+    on_disk_sessions: int = Field(..., description="Sessions whose vectors are stored on disk")
+    quantized_sessions: int = Field(..., description="Sessions with a quantized collection")
+    message_count: int = Field(..., description="Messages across all sessions")
+    token_count: int = Field(..., description="Stored tokens across all sessions")
+    uncounted_messages: int = Field(..., description="Messages without a stored token count")
+    vector_count: int = Field(..., description="Vectors across all session collections")
+    unindexed_vectors: int = Field(..., description="Vectors not yet in an HNSW index")
+    collections_not_green: int = Field(..., description="Session collections whose status is not green")
+    estimated_memory_bytes: int = Field(..., description="Estimated RAM used by session vectors and indexes")
+    sampled_at: Optional[float] = Field(None, description="Epoch seconds of the last full sample")
+    sample_seconds: Optional[float] = Field(None, description="Duration of the last full sample")
+
+class StorageStatsResponse(BaseModel):
+    """Fleet totals and the largest sessions."""
+
+    totals: StorageTotals = Field(..., description="Totals across all sessions")
+    sessions: List[SessionStorageStats] = Field(..., description="Largest sessions by the requested field")
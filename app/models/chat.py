@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 class ChatRequest(BaseModel):
@@ -5,8 +6,16 @@ class ChatRequest(BaseModel):
 
     session_id: int = Field(..., description="Target session ID", example=1)
     prompt: str = Field(..., description="User prompt", example="Hello")
+    deadline_ms: Optional[int] = Field(
+        None,
+        gt=0,
+        description="End-to-end latency budget in milliseconds (defaults to the server setting)",
+        example=10000,
+    )
 
 class ChatResponse(BaseModel):
     """Response for /chat endpoint."""
 
     message: str = Field(..., description="LLM response text")
+    degraded: bool = Field(False, description="True when retrieval stages were skipped to meet the deadline or because a dependency is unavailable")
+    skipped_stages: List[str] = Field(default_factory=list, description="Pipeline stages that were skipped (embedding, store, search)")
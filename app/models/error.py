@@ -12,6 +12,7 @@ class ErrorCode:
     SESSION_CREATE_FAILED = "SESSION_CREATE_FAILED"
     SESSION_UPDATE_FAILED = "SESSION_UPDATE_FAILED"
     SESSION_DELETE_FAILED = "SESSION_DELETE_FAILED"
+    SESSION_FORK_FAILED = "SESSION_FORK_FAILED"
     
     # 메시지 관련 에러
     MESSAGE_NOT_FOUND = "MESSAGE_NOT_FOUND"
@@ -24,7 +25,16 @@ class ErrorCode:
     EMBEDDING_ERROR = "EMBEDDING_ERROR"
     QDRANT_ERROR = "QDRANT_ERROR"
     
+    # 파일 업로드 관련 에러
+    FILE_NOT_FOUND = "FILE_NOT_FOUND"
+    FILE_TOO_LARGE = "FILE_TOO_LARGE"
+    UNSUPPORTED_FILE_TYPE = "UNSUPPORTED_FILE_TYPE"
+    FILE_UPLOAD_FAILED = "FILE_UPLOAD_FAILED"
+    
     # 시스템 에러
     INTERNAL_SERVER_ERROR = "INTERNAL_SERVER_ERROR"
     VALIDATION_ERROR = "VALIDATION_ERROR"
+    FORBIDDEN = "FORBIDDEN"
+    UPSTREAM_TIMEOUT = "UPSTREAM_TIMEOUT"
+    UPSTREAM_UNAVAILABLE = "UPSTREAM_UNAVAILABLE"
     DATABASE_ERROR = "DATABASE_ERROR" 
\ No newline at end of file
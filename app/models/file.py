@@ -0,0 +1,47 @@
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+from pydantic import BaseModel, Field
+
+
+class FileIngestStatus(BaseModel):
+    """Progress of an uploaded file's indexing job."""
+
+    document_id: str = Field(..., description="ID shared by every chunk of the document", example="doc_3f2a9c")
+    filename: str = Field(..., description="Original file name", example="manual.pdf")
+    kind: str = Field(..., description="Detected file type: text, markdown or pdf", example="pdf")
+    size_bytes: int = Field(..., description="Size of the stored upload in bytes")
+    session_id: Optional[int] = Field(None, description="Session the document is attached to")
+    user_id: Optional[str] = Field(None, description="Owner of the document")
+    state: str = Field(..., description="queued, processing, completed or failed", example="processing")
+    pages: int = Field(0, description="Pages (PDF) or text files read so far")
+    chunks_extracted: int = Field(0, description="Chunks cut from the extracted text so far")
+    chunks_embedded: int = Field(0, description="Chunks embedded so far")
+    chunks_stored: int = Field(0, description="Chunks upserted into Qdrant so far")
+    error: Optional[str] = Field(None, description="Failure reason when state is failed")
+    created_at: datetime = Field(..., description="Upload time")
+    finished_at: Optional[datetime] = Field(None, description="Time the job completed or failed")
+    elapsed_seconds: Optional[float] = Field(None, description="Running time of an unfinished job")
+
+class FileSearchRequest(BaseModel):
+    """Semantic search over uploaded document chunks."""
+
+    query: str = Field(..., description="Search text", example="How do I reset the device?")
+    limit: int = Field(5, description="Maximum number of chunks to return", example=5)
+    document_id: Optional[str] = Field(None, description="Restrict results to one document")
+    session_id: Optional[int] = Field(None, description="Restrict results to documents attached to a session")
+    user_id: Optional[str] = Field(None, description="Restrict results to one user's documents")
+
+class FileSearchResult(BaseModel):
+    """One matching document chunk."""
+
+    document_id: str = Field(..., description="Document the chunk belongs to")
+    chunk_id: int = Field(..., description="Position of the chunk within the document")
+    text: str = Field(..., description="Chunk text")
+    score: float = Field(..., description="Cosine similarity to the query")
+    source: Optional[str] = Field(None, description="Original file name")
+    page: Optional[int] = Field(None, description="Page the chunk starts on")
+
+class FileSearchResponse(BaseModel):
+    """Document search results, best match first."""
+
+    results: List[FileSearchResult] = Field(..., description="Matching chunks")
@@ -2,6 +2,9 @@ from sqlmodel import SQLModel, Field
 from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
+from sqlalchemy import Index, event, inspect
+
+from app.utils.token_utils import count_tokens
 
 class MessageBase(SQLModel):
     """Common fields for a chat message."""
@@ -44,6 +47,10 @@ class MessageResponse(MessageBase):
         None,
         description="Last modification timestamp",
     )
+    token_count: Optional[int] = Field(
+        None,
+        description="Number of tokens in the content (cl100k_base)",
+    )
 
 class MessagePairResponse(BaseModel):
     """Response model for a pair of user and assistant messages."""
@@ -54,8 +61,31 @@ class MessagePairResponse(BaseModel):
 class MessageModel(MessageBase, table=True):
     """Database model for storing messages."""
 
+    # (session_id, token_count): 세션 토큰 합계를 인덱스만으로 계산
+    # (session_id, created_at): 세션의 최근 대화 조회
+    __table_args__ = (
+        Index("ix_messagemodel_session_id_token_count", "session_id", "token_count"),
+        Index("ix_messagemodel_session_id_created_at", "session_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: int = Field(foreign_key="sessionmodel.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: Optional[datetime] = None
+    # 쓰기 시점에 한 번 계산 (기존 행은 python -m app.token_backfill 로 채움)
+    token_count: Optional[int] = None
+
+
+@event.listens_for(MessageModel, "before_insert")
+@event.listens_for(MessageModel, "before_update")
+def _set_token_count(mapper, connection, target: MessageModel) -> None:
+    """내용이 새로 저장되거나 바뀔 때 token_count 를 계산합니다.
+
+    bulk_insert_mappings 같은 일괄 경로는 이 이벤트를 거치지 않으므로 count_tokens_batch 로
+    직접 채워야 합니다.
+    """
+    if target.content is None:
+        return
+    if target.token_count is None or inspect(target).attrs.content.history.has_changes():
+        target.token_count = count_tokens(target.content)
  
\ No newline at end of file
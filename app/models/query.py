@@ -1,4 +1,5 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
+from datetime import datetime
 from pydantic import BaseModel, Field
 
 class QueryRequest(BaseModel):
@@ -18,7 +19,27 @@ class SemanticSearchRequest(BaseModel):
 
     session_id: int = Field(..., description="Target session ID", example=1)
     query: str = Field(..., description="Query text", example="Hello")
-    limit: int = Field(5, description="Number of results to return", example=5)
+    limit: int = Field(5, description="Number of results to return (upper bound when adaptive_k is set)", example=5)
+    mode: Literal["dense", "lexical", "hybrid"] = Field(
+        "dense",
+        description="Retrieval mode: vector search, keyword search without an embedding call, or both fused with RRF",
+        example="hybrid",
+    )
+    similarity_threshold: Optional[float] = Field(
+        None,
+        description="Minimum vector similarity, applied by Qdrant (ignored by lexical search)",
+        example=0.3,
+    )
+    adaptive_k: bool = Field(
+        False,
+        description="Cut the results at the largest score drop instead of always returning `limit` hits",
+    )
+    min_k: int = Field(1, ge=0, description="Minimum number of hits kept by adaptive_k", example=1)
+    role: Optional[str] = Field(None, description="Only return messages with this role", example="user")
+    memory_type: Optional[str] = Field(None, description="Only return vectors of this memory type", example="short_term")
+    user_id: Optional[str] = Field(None, description="Only return vectors owned by this user")
+    created_after: Optional[datetime] = Field(None, description="Only return messages created at or after this time")
+    created_before: Optional[datetime] = Field(None, description="Only return messages created at or before this time")
 
     class Config:
         from_attributes = True
@@ -54,4 +75,34 @@ class SemanticSearchResponse(BaseModel):
     class Config:
         from_attributes = True
 
- 
\ No newline at end of file
+class GlobalSearchRequest(BaseModel):
+    """Request body for searching across all of a user's sessions."""
+
+    query: str = Field(..., description="Query text", example="deployment error")
+    user_id: str = Field(..., description="Owner whose sessions are searched", example="user_123")
+    limit: int = Field(10, description="Number of results to return across all sessions", example=10)
+    candidate_sessions: Optional[int] = Field(
+        None,
+        description="Number of sessions picked by centroid routing before the precise search (0 searches every session)",
+        example=50,
+    )
+    role: Optional[str] = Field(None, description="Only return messages with this role", example="user")
+    created_after: Optional[datetime] = Field(None, description="Only return messages created at or after this time")
+    created_before: Optional[datetime] = Field(None, description="Only return messages created at or before this time")
+
+class GlobalSearchSessionResult(BaseModel):
+    """Search hits from a single session."""
+
+    session_id: int = Field(..., description="Session ID")
+    session_name: str = Field(..., description="Session name")
+    max_score: float = Field(..., description="Best score within the session")
+    results: List[SemanticSearchResult] = Field(..., description="Hits from this session ordered by score")
+
+class GlobalSearchResponse(BaseModel):
+    """Cross-session search response grouped by session."""
+
+    sessions: List[GlobalSearchSessionResult] = Field(..., description="Sessions ordered by their best hit")
+    total: int = Field(..., description="Total number of hits")
+    status: str = Field("success", description="Response status")
+    message: str = Field("", description="Response message")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Search metadata")
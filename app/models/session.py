@@ -12,7 +12,11 @@ class SessionBase(SQLModel):
     )
 
 class SessionCreate(SessionBase):
-    pass
+    user_id: Optional[str] = Field(
+        None,
+        description="Owner of the session",
+        sa_column_kwargs={"comment": "user_abc_123"},
+    )
 
 class SessionUpdate(SQLModel):
     """Schema for updating an existing session."""
@@ -27,16 +31,48 @@ class SessionResponse(SessionBase):
     """Response model for session information."""
 
     id: int = Field(..., description="Session ID", sa_column_kwargs={"comment": "1"})
+    user_id: Optional[str] = Field(None, description="Owner of the session")
     created_at: datetime = Field(..., description="Creation timestamp")
     updated_at: Optional[datetime] = Field(
         None,
         description="Last modification timestamp",
     )
 
+class SessionFork(SQLModel):
+    """Options for forking a session."""
+
+    name: Optional[str] = Field(
+        None,
+        description="Name of the new session (defaults to '<source name> (fork)')",
+    )
+    up_to_message_id: Optional[int] = Field(
+        None,
+        description="Copy only messages up to and including this message ID (defaults to all messages)",
+    )
+
+class SessionForkResponse(SessionResponse):
+    """Response model for a forked session."""
+
+    forked_from: int = Field(..., description="ID of the source session")
+    message_count: int = Field(..., description="Number of messages copied")
+    vector_count: int = Field(..., description="Number of message embeddings copied")
+
+class SessionTokenUsage(SQLModel):
+    """Token totals for a session."""
+
+    session_id: int = Field(..., description="Session ID")
+    token_count: int = Field(..., description="Sum of stored message token counts")
+    message_count: int = Field(..., description="Number of messages in the session")
+    uncounted_messages: int = Field(
+        0,
+        description="Messages without a stored token count (run the token backfill job)",
+    )
+
 class SessionModel(SessionBase, table=True):
     """Database model for storing sessions."""
 
     id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: Optional[str] = Field(default=None, index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
  
\ No newline at end of file
@@ -0,0 +1,40 @@
+from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field
+
+from .vector_payload import VectorPayload
+
+
+class VectorBatchInsertRequest(BaseModel):
+    """Request body for inserting many vectors in one call."""
+
+    payloads: List[VectorPayload] = Field(..., description="One payload per vector, in the same order")
+    vectors: Optional[List[List[float]]] = Field(None, description="Vectors as JSON float lists")
+    vectors_base64: Optional[str] = Field(
+        None, description="Vectors as one base64 block of little-endian float32 values, row-major"
+    )
+    dim: Optional[int] = Field(None, description="Vector dimension (required with vectors_base64)", example=1536)
+    ids: Optional[List[int]] = Field(None, description="Point IDs; generated when omitted")
+    wait: bool = Field(True, description="Wait until Qdrant has applied the upsert before responding")
+
+class VectorBatchInsertResponse(BaseModel):
+    """Result of a batch insert."""
+
+    ids: List[int] = Field(..., description="IDs of the inserted points, in request order")
+    inserted: int = Field(..., description="Number of inserted points")
+    status: str = Field(..., description="'completed' when waited for, otherwise 'acknowledged'")
+
+class VectorBatchSearchRequest(BaseModel):
+    """Request body for running many vector searches in one call."""
+
+    vectors: Optional[List[List[float]]] = Field(None, description="Query vectors as JSON float lists")
+    vectors_base64: Optional[str] = Field(
+        None, description="Query vectors as one base64 block of little-endian float32 values, row-major"
+    )
+    dim: Optional[int] = Field(None, description="Vector dimension (required with vectors_base64)", example=1536)
+    limit: int = Field(5, description="Number of results per query", example=5)
+    with_payload: bool = Field(True, description="Include point payloads in the results")
+
+class VectorBatchSearchResponse(BaseModel):
+    """Results of a batch search, one list per query vector."""
+
+    results: List[List[Dict[str, Any]]] = Field(..., description="Hits per query, in request order")
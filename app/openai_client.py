@@ -1,17 +1,33 @@
-import openai
-from openai import OpenAI
+from __future__ import annotations
+
 import os
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 from dotenv import load_dotenv
 import logging
+from app.config import settings
+from app.utils.lazy_import import lazy_import
+
+openai = lazy_import("openai")
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 # .env 파일 로드
 load_dotenv()
 
 logger = logging.getLogger("openai_client")
 
+_client: Optional[OpenAI] = None
+
 def get_openai_client() -> OpenAI:
-    """FastAPI 의존성 주입을 위한 OpenAI 클라이언트 생성 함수"""
+    """FastAPI 의존성 주입을 위한 OpenAI 클라이언트 반환 함수
+
+    클라이언트(HTTP 연결 풀)는 첫 호출 때 한 번 만들어 재사용합니다.
+    """
+    global _client
+    if _client is not None:
+        return _client
+
     api_key = os.getenv("OPENAI_API_KEY")
     organization_id = os.getenv("OPENAI_ORGANIZATION_ID")
     
@@ -25,15 +41,22 @@ def get_openai_client() -> OpenAI:
     # os.environ["HTTP_PROXY"] = "http://your.proxy.server"
     # os.environ["HTTPS_PROXY"] = "http://your.proxy.server"
     
+    options = {}
+    if settings.OPENAI_TIMEOUT_SECONDS is not None:
+        options["timeout"] = settings.OPENAI_TIMEOUT_SECONDS
+
     try:
-        client = OpenAI(
+        client = openai.OpenAI(
             api_key=api_key,
             organization=organization_id,
-            base_url="https://api.openai.com/v1"
+            base_url=settings.OPENAI_BASE_URL,
+            max_retries=0,  # 재시도는 OpenAIGovernor 에서 처리
+            **options
         )
-        logger.info("OpenAI client initialized successfully")
+        logger.info(f"OpenAI client initialized successfully ({settings.OPENAI_BASE_URL})")
     except Exception as e:
         logger.error(f"OpenAI client initialization failed: {e}")
         raise
     
+    _client = client
     return client 
\ No newline at end of file
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import logging
+import time
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError, wait
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from app.config import settings
+from app.utils.lazy_import import lazy_import
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.metrics import metrics
+from app.utils.profiler import bind_request_profiler
+from app.utils.rate_limit import TokenBucket
+from app.utils.token_utils import count_tokens
+
+openai = lazy_import("openai")
+
+logger = logging.getLogger("openai_governor")
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """재시도 대상: 429, 타임아웃, 연결 오류, 5xx"""
+    return isinstance(error, (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    ))
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """응답의 Retry-After 헤더(초)를 반환합니다."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+class LatencyTracker:
+    """최근 호출 지연 시간의 p95를 계산합니다."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+class OpenAIGovernor:
+    """모든 OpenAI 호출이 거쳐 가는 공용 호출 관리자.
+
+    - 분당 요청 수/토큰 수 토큰 버킷으로 조직 rate limit 초과를 막습니다.
+    - 일시적 오류는 지터가 있는 지수 백오프로 재시도하고 Retry-After 를 따릅니다.
+    - (선택) 임베딩 호출이 최근 p95 보다 늦어지면 같은 요청을 한 번 더 보내 먼저 온 응답을 씁니다.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_retries: int = 5,
+        hedge_embeddings: bool = False
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.hedge_embeddings = hedge_embeddings
+        self.embedding_latency = LatencyTracker()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="openai-hedge")
+
+    # --- 공개 API ---
+
+    def create_embeddings(self, client: openai.OpenAI, model: str, input: Union[str, List[str]]):
+        texts = input if isinstance(input, list) else [input]
+        estimated_tokens = sum(count_tokens(text) for text in texts)
+        return self._call(
+            "embeddings",
+            lambda: client.embeddings.create(model=model, input=input),
+            estimated_tokens,
+            hedge=self.hedge_embeddings
+        )
+
+    def create_chat_completion(
+        self,
+        client: openai.OpenAI,
+        model: str,
+        messages: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None,
+        **kwargs
+    ):
+        """deadline 이 주어지면 각 시도의 timeout 을 남은 시간으로 두고, 시간이 다 되면 재시도하지 않습니다."""
+        estimated_tokens = sum(count_tokens(str(m.get("content") or "")) for m in messages)
+        estimated_tokens += kwargs.get("max_tokens") or 0
+
+        def create():
+            if deadline is not None:
+                if deadline.expired():
+                    raise DeadlineExceeded("Chat completion deadline exceeded")
+                kwargs["timeout"] = deadline.remaining()
+            return client.chat.completions.create(model=model, messages=messages, **kwargs)
+
+        return self._call("chat", create, estimated_tokens, deadline=deadline)
+
+    # --- 내부 구현 ---
+
+    def _call(
+        self,
+        endpoint: str,
+        fn: Callable[[], Any],
+        estimated_tokens: int,
+        hedge: bool = False,
+        deadline: Optional[Deadline] = None
+    ):
+        stop = stop_after_attempt(self.max_retries + 1)
+        wait = self._wait
+        if deadline is not None:
+            # 마감 이후로는 재시도하지 않고, 백오프도 남은 시간까지만 기다림
+            stop = stop | (lambda retry_state: deadline.expired())
+            wait = lambda retry_state: min(self._wait(retry_state), deadline.remaining())
+        retrying = Retrying(
+            stop=stop,
+            wait=wait,
+            retry=retry_if_exception(_is_retryable),
+            before_sleep=lambda state: self._on_retry(endpoint, state),
+            reraise=True
+        )
+        return retrying(self._attempt, endpoint, fn, estimated_tokens, hedge)
+
+    @staticmethod
+    def _wait(retry_state) -> float:
+        retry_after = _retry_after(retry_state.outcome.exception())
+        if retry_after is not None:
+            # 서버가 지정한 시간에 약간의 지터를 더해 동시에 몰리지 않게 함
+            return retry_after + random.uniform(0, 0.5)
+        return wait_random_exponential(multiplier=0.5, max=20)(retry_state)
+
+    @staticmethod
+    def _on_retry(endpoint: str, retry_state) -> None:
+        metrics.inc(f"openai_{endpoint}_retries_total")
+        logger.warning(
+            f"OpenAI {endpoint} call failed (attempt {retry_state.attempt_number}): "
+            f"{retry_state.outcome.exception()}"
+        )
+
+    def _throttle(self, endpoint: str, estimated_tokens: int) -> None:
+        metrics.add_gauge("openai_queue_depth", 1)
+        try:
+            delay = max(self.request_bucket.reserve(1), self.token_bucket.reserve(estimated_tokens))
+            if delay > 0:
+                time.sleep(delay)
+                metrics.inc(f"openai_{endpoint}_throttle_seconds_total", delay)
+        finally:
+            metrics.add_gauge("openai_queue_depth", -1)
+
+    def _timed(self, endpoint: str, fn: Callable[[], Any], estimated_tokens: int):
+        self._throttle(endpoint, estimated_tokens)
+        started = time.monotonic()
+        result = fn()
+        elapsed = time.monotonic() - started
+        metrics.observe(f"openai_{endpoint}_latency_seconds", elapsed)
+        if endpoint == "embeddings":
+            self.embedding_latency.record(elapsed)
+        return result
+
+    def _attempt(self, endpoint: str, fn: Callable[[], Any], estimated_tokens: int, hedge: bool):
+        deadline = self.embedding_latency.p95() if hedge else None
+        if deadline is None:
+            return self._timed(endpoint, fn, estimated_tokens)
+
+        timed = bind_request_profiler(self._timed)
+        primary = self._hedge_executor.submit(timed, endpoint, fn, estimated_tokens)
+        try:
+            return primary.result(timeout=deadline)
+        except FuturesTimeoutError:
+            pass
+
+        metrics.inc(f"openai_{endpoint}_hedged_total")
+        pending = {primary, self._hedge_executor.submit(timed, endpoint, fn, estimated_tokens)}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+
+_governor: Optional[OpenAIGovernor] = None
+
+
+def get_openai_governor() -> OpenAIGovernor:
+    """프로세스 전역 OpenAIGovernor 를 반환합니다."""
+    global _governor
+    if _governor is None:
+        _governor = OpenAIGovernor(
+            requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+            hedge_embeddings=settings.OPENAI_HEDGE_EMBEDDINGS
+        )
+    return _governor
@@ -1,25 +1,48 @@
+from __future__ import annotations
+
+import logging
 import os
-from typing import List, Tuple, Optional, Dict, Any
+import threading
+from typing import List, Tuple, Optional, Dict, Any, Iterable, Set, TYPE_CHECKING
 from datetime import datetime
 from app.models import VectorPayload
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
 from dotenv import load_dotenv
-import requests
-import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential
-import openai
+import heapq
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from app.openai_client import get_openai_client
+from app.openai_governor import get_openai_governor
 from app.config import settings
+from app.utils.lazy_import import lazy_import
+from app.utils.time_utils import to_epoch
+from app.utils.token_utils import split_tokens
+from app.utils.rank_fusion import reciprocal_rank_fusion
+from app.utils.adaptive_k import select_adaptive_k
+from app.utils.metrics import metrics
+from app.utils.profiler import bind_request_profiler
+from app.lexical_index import LexicalIndex, get_lexical_index
+from app.utils.search_cache import SearchCache, get_search_cache, normalize_query
+from app.centroid_index import SessionCentroidIndex
+from app.session_tiering import SessionTieringManager
+from app.session_stats import get_session_stats
+from app.utils.id_generator import next_vector_id
+
+# SDK는 첫 사용 시점에 import (app.main import 비용 절감)
+qdrant_sdk = lazy_import("qdrant_client")
+models = lazy_import("qdrant_client.http.models")
+np = lazy_import("numpy")
+
+# "qdrant_client" 는 SDK 로거 이름과 겹치므로 다른 이름 사용
+logger = logging.getLogger("qdrant_wrapper")
+
+if TYPE_CHECKING:
+    import numpy
+    import openai
+    from qdrant_client import QdrantClient
 
 # 환경 변수 로드
 load_dotenv()
 
-# Qdrant 클라이언트 설정
-qdrant_config = {
-    "QDRANT_URL": settings.QDRANT_URL
-}
-
 def validate_env_vars():
     """환경 변수 검증"""
     required_vars = {
@@ -34,17 +57,128 @@ def validate_env_vars():
     
     return required_vars
 
-# 환경 변수 검증 및 설정
-env_vars = validate_env_vars()
-QDRANT_URL = env_vars["QDRANT_URL"]
-OPENAI_API_KEY = env_vars["OPENAI_API_KEY"]
-OPENAI_ORG_ID = env_vars["OPENAI_ORGANIZATION_ID"]
 COLLECTION_NAME = "echoprompt_messages"
 
+# 검색 모드: dense(벡터), lexical(키워드, 임베딩 호출 없음), hybrid(둘을 RRF로 결합)
+SEARCH_MODES = ("dense", "lexical", "hybrid")
+
+# hybrid 검색에서 키워드 검색을 벡터 검색과 동시에 실행하기 위한 풀
+_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
+
+# 전역 검색에서 세션 컬렉션을 병렬로 조회하기 위한 풀 (설정을 읽어야 하므로 처음 사용할 때 생성)
+_fanout_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    global _fanout_executor
+    if _fanout_executor is None:
+        _fanout_executor = ThreadPoolExecutor(
+            max_workers=settings.GLOBAL_SEARCH_MAX_WORKERS, thread_name_prefix="global-search"
+        )
+    return _fanout_executor
+
+# 필터링에 사용되는 payload 필드와 인덱스 타입 (models.PayloadSchemaType 값)
+# created_at 은 범위 검색을 위해 epoch 초(float)로 저장합니다.
+PAYLOAD_INDEXES = {
+    "session_id": "integer",
+    "message_id": "integer",
+    "role": "keyword",
+    "memory_type": "keyword",
+    "created_at": "float",
+    "user_id": "keyword",
+}
+
+# 이 프로세스에서 payload 인덱스를 확인한 컬렉션. 인덱스를 추가하기 전에 만들어진 컬렉션도
+# 처음 접근할 때 빠진 인덱스를 한 번 만들어 줍니다.
+_indexed_collections: Set[str] = set()
+_indexed_collections_lock = threading.Lock()
+
+
+def build_payload_filter(
+    role: Optional[str] = None,
+    memory_type: Optional[str] = None,
+    user_id: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Optional[models.Filter]:
+    """검색 조건을 Qdrant 서버 측 필터로 변환합니다. 조건이 없으면 None을 반환합니다."""
+    must: List[models.FieldCondition] = []
+    for key, value in (("role", role), ("memory_type", memory_type), ("user_id", user_id)):
+        if value is not None:
+            must.append(models.FieldCondition(key=key, match=models.MatchValue(value=value)))
+    if created_after is not None or created_before is not None:
+        must.append(
+            models.FieldCondition(
+                key="created_at",
+                range=models.Range(
+                    gte=to_epoch(created_after) if created_after else None,
+                    lte=to_epoch(created_before) if created_before else None,
+                ),
+            )
+        )
+    return models.Filter(must=must) if must else None
+
+# 긴 메시지의 청크 포인트 id: 첫 청크는 메시지 id 그대로, 나머지는 상위 비트에 청크 번호를 넣음
+CHUNK_ID_SHIFT = 40
+
+
+def chunk_point_id(message_id: int, chunk_index: int) -> int:
+    return message_id | (chunk_index << CHUNK_ID_SHIFT)
+
+
+def message_filter(message_ids) -> models.Filter:
+    """메시지(하나 또는 여러 개)의 모든 청크 포인트를 가리키는 필터."""
+    if isinstance(message_ids, int):
+        match = models.MatchValue(value=message_ids)
+    else:
+        match = models.MatchAny(any=list(message_ids))
+    return models.Filter(must=[models.FieldCondition(key="message_id", match=match)])
+
+
+def mean_vector(vectors: List[List[float]]) -> List[float]:
+    """청크 벡터들의 정규화된 평균 (긴 메시지를 검색 쿼리로 쓸 때)."""
+    if len(vectors) == 1:
+        return vectors[0]
+    mean = np.asarray(vectors, dtype=np.float32).mean(axis=0)
+    return (mean / (np.linalg.norm(mean) or 1.0)).tolist()
+
+# gRPC 채널 압축 알고리즘 (grpc.Compression 값)
+GRPC_COMPRESSION = {"deflate": 1, "gzip": 2}
+
+
+def transport_options(
+    prefer_grpc: bool = False,
+    grpc_port: int = 6334,
+    grpc_compression: Optional[str] = None
+) -> Dict[str, Any]:
+    """QdrantClient 생성 인자 중 전송 방식(REST/gRPC) 관련 옵션을 만듭니다."""
+    if not prefer_grpc:
+        return {}
+    options: Dict[str, Any] = {"prefer_grpc": True, "grpc_port": grpc_port}
+    if grpc_compression:
+        if grpc_compression not in GRPC_COMPRESSION:
+            raise ValueError(f"Unknown gRPC compression: {grpc_compression}")
+        options["grpc_options"] = {"grpc.default_compression_algorithm": GRPC_COMPRESSION[grpc_compression]}
+    return options
+
+
 class QdrantClientWrapper:
-    def __init__(self, url: str, openai_client: Optional[openai.OpenAI] = None):
+    def __init__(
+        self,
+        url: str,
+        openai_client: Optional[openai.OpenAI] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        search_cache: Optional[SearchCache] = None,
+        client_options: Optional[Dict[str, Any]] = None
+    ):
         self._openai_client = openai_client
-        self.client = QdrantClient(url=url)
+        self._lexical_index = lexical_index
+        self.search_cache = search_cache or get_search_cache()
+        self.client = qdrant_sdk.QdrantClient(url=url, **(client_options or {}))
+        self.embedding_model = settings.OPENAI_EMBEDDING_MODEL
+        self.embedding_dimension = settings.EMBEDDING_DIMENSION
+        self._centroid_index: Optional[SessionCentroidIndex] = None
+        self._tiering: Optional[SessionTieringManager] = None
 
     @property
     def openai_client(self) -> openai.OpenAI:
@@ -52,74 +186,311 @@ class QdrantClientWrapper:
             self._openai_client = get_openai_client()
         return self._openai_client
 
+    @property
+    def lexical_index(self) -> LexicalIndex:
+        if self._lexical_index is None:
+            self._lexical_index = get_lexical_index()
+        return self._lexical_index
+
+    @property
+    def centroid_index(self) -> Optional[SessionCentroidIndex]:
+        if not settings.SESSION_CENTROIDS_ENABLED:
+            return None
+        if self._centroid_index is None or self._centroid_index.client is not self.client:
+            self._centroid_index = SessionCentroidIndex(self.client, self.embedding_dimension)
+        return self._centroid_index
+
+    @property
+    def tiering(self) -> Optional[SessionTieringManager]:
+        if not settings.SESSION_TIERING_ENABLED:
+            return None
+        if self._tiering is None:
+            self._tiering = SessionTieringManager(self)
+        return self._tiering
+
+    def _touch(self, session_id: int) -> None:
+        """세션 접근을 계층 관리자에 알립니다. 보관된 세션이면 컬렉션을 복원합니다."""
+        tiering = self.tiering
+        if tiering is not None:
+            tiering.touch(session_id)
+
+    def _update_centroid(
+        self,
+        session_id: int,
+        added: Optional[List[List[float]]] = None,
+        rebuild: bool = False
+    ) -> None:
+        """세션 centroid 라우팅 인덱스 갱신을 예약합니다 (flush 스레드가 모아서 반영)."""
+        centroid_index = self.centroid_index
+        if centroid_index is None:
+            return
+        if rebuild:
+            centroid_index.mark_stale(session_id)
+        elif added:
+            centroid_index.defer(session_id, np.asarray(added, dtype=np.float32).sum(axis=0), len(added))
+
     def _ensure_collection(self, session_id: int) -> None:
+        self._touch(session_id)
         collection_name = f"session_{session_id}"
         try:
-            self.client.get_collection(collection_name=collection_name)
+            info = self.client.get_collection(collection_name=collection_name)
         except Exception:
+            self.create_session_collection(collection_name)
+            return
+        self._ensure_payload_indexes(collection_name, info)
+
+    def _ensure_payload_indexes(self, collection_name: str, info: Any) -> None:
+        """기존 컬렉션에 빠진 payload 인덱스를 만듭니다 (프로세스마다 컬렉션당 한 번만 확인)."""
+        if collection_name in _indexed_collections:
+            return
+        existing = set((info.payload_schema or {}).keys())
+        missing = [field_name for field_name in PAYLOAD_INDEXES if field_name not in existing]
+        if missing:
+            # 포인트가 많은 컬렉션은 인덱스 생성이 오래 걸리므로 요청을 붙잡지 않음
+            self._create_payload_indexes(collection_name, missing, wait=False)
+        with _indexed_collections_lock:
+            _indexed_collections.add(collection_name)
+
+    def create_session_collection(self, collection_name: str, dimension: Optional[int] = None) -> None:
+        """세션 컬렉션을 payload 인덱스와 함께 생성합니다. 이미 존재하면 무시합니다."""
+        try:
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(
+                    size=dimension or self.embedding_dimension,
+                    distance=models.Distance.COSINE
+                )
+            )
+        except Exception as e:
+            # 409 Conflict(이미 존재) 에러는 무시
+            if "already exists" in str(e) or "409" in str(e):
+                return
+            raise
+        self._create_payload_indexes(collection_name)
+        with _indexed_collections_lock:
+            _indexed_collections.add(collection_name)
+
+    def _create_payload_indexes(
+        self,
+        collection_name: str,
+        field_names: Optional[Iterable[str]] = None,
+        wait: bool = True
+    ) -> None:
+        """필터 검색에 사용되는 payload 필드(기본값: PAYLOAD_INDEXES 전체)에 인덱스를 생성합니다."""
+        for field_name in field_names or PAYLOAD_INDEXES:
             try:
-                self.client.create_collection(
+                self.client.create_payload_index(
                     collection_name=collection_name,
-                    vectors_config=models.VectorParams(
-                        size=1536,  # OpenAI ada-002 모델의 임베딩 크기
-                        distance=models.Distance.COSINE
-                    )
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType(PAYLOAD_INDEXES[field_name]),
+                    wait=wait
                 )
             except Exception as e:
-                # 409 Conflict(이미 존재) 에러는 무시
-                if "already exists" in str(e) or "409" in str(e):
-                    pass
-                else:
-                    raise
+                logger.warning(f"Error creating payload index {field_name} on {collection_name}: {e}")
 
     def get_embedding(self, text: str) -> List[float]:
-        response = self.openai_client.embeddings.create(
-            model="text-embedding-ada-002",
+        response = get_openai_governor().create_embeddings(
+            self.openai_client,
+            model=self.embedding_model,
             input=text
         )
         return response.data[0].embedding
 
+    def get_embeddings(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """여러 텍스트를 한 번의 API 호출로 임베딩합니다. 입력 순서대로 반환합니다."""
+        if not texts:
+            return []
+        response = get_openai_governor().create_embeddings(
+            self.openai_client,
+            model=model or self.embedding_model,
+            input=texts
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def chunk_text(self, content: str) -> List[str]:
+        """EMBEDDING_CHUNK_MAX_TOKENS 를 넘는 텍스트를 겹치는 토큰 청크로 나눕니다. 짧으면 [content]."""
+        return split_tokens(
+            content, settings.EMBEDDING_CHUNK_MAX_TOKENS, settings.EMBEDDING_CHUNK_OVERLAP_TOKENS
+        )
+
+    def embed_message(self, content: str, chunks: Optional[List[str]] = None) -> List[List[float]]:
+        """메시지의 청크별 임베딩을 청크 순서대로 반환합니다. 여러 청크는 한 번의 API 호출로 임베딩합니다.
+
+        chunks 는 이미 계산한 chunk_text(content) 결과이며, 주면 다시 토큰화하지 않습니다.
+        """
+        if chunks is None:
+            chunks = self.chunk_text(content)
+        if len(chunks) == 1:
+            return [self.get_embedding(content)]
+        return self.get_embeddings(chunks)
+
+    def embed_query(self, text: str) -> List[float]:
+        """검색 쿼리 벡터. 임베딩 모델 입력 한도를 넘는 긴 쿼리는 청크 벡터의 평균을 사용합니다."""
+        return mean_vector(self.embed_message(text))
+
+    def build_points(
+        self,
+        message_id: int,
+        session_id: int,
+        content: str,
+        embeddings: List[List[float]],
+        chunks: Optional[List[str]] = None,
+        **payload_fields: Any
+    ) -> List[models.PointStruct]:
+        """메시지 청크별 포인트를 만듭니다. 모든 청크 payload 에 같은 message_id 가 들어갑니다."""
+        if chunks is None:
+            chunks = self.chunk_text(content) if len(embeddings) > 1 else [content]
+        if len(chunks) != len(embeddings):
+            raise ValueError(f"Got {len(embeddings)} embeddings for {len(chunks)} chunks of message {message_id}")
+        points = []
+        for index, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            payload = self.build_payload(message_id, session_id, chunk, **payload_fields)
+            if len(chunks) > 1:
+                payload.update(chunk_index=index, chunk_count=len(chunks))
+            points.append(models.PointStruct(id=chunk_point_id(message_id, index), vector=embedding, payload=payload))
+        return points
+
+    @staticmethod
+    def build_payload(
+        message_id: int,
+        session_id: int,
+        content: str,
+        role: str = "user",
+        memory_type: str = "short_term",
+        user_id: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        token_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """메시지 벡터에 저장되는 payload를 만듭니다."""
+        return {
+            "content": content,
+            "message_id": message_id,
+            "session_id": session_id,
+            "role": role,
+            "memory_type": memory_type,
+            "user_id": user_id,
+            "created_at": to_epoch(created_at or datetime.utcnow()),
+            "token_count": token_count
+        }
+
     def store_embedding(
         self,
         message_id: int,
         session_id: int,
         content: str,
-        embedding: List[float]
+        embedding: Optional[List[float]] = None,
+        role: str = "user",
+        memory_type: str = "short_term",
+        user_id: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        token_count: Optional[int] = None,
+        embeddings: Optional[List[List[float]]] = None,
+        chunks: Optional[List[str]] = None,
+        replace: bool = False
     ) -> None:
+        """메시지 벡터를 저장합니다. 긴 메시지는 청크별 포인트 여러 개로 저장합니다.
+
+        embeddings 는 embed_message() 의 청크별 벡터이며, 없으면 embedding(짧은 메시지의 벡터 하나)을
+        쓰거나 새로 임베딩합니다. chunks 는 embed_message() 에 넘긴 것과 같은 chunk_text(content) 결과로,
+        주면 메시지를 다시 토큰화하지 않습니다. 이미 저장된 메시지를 수정할 때는 replace=True 로 호출하며,
+        청크 수가 바뀔 수 있으므로 기존 청크 삭제(message_id 필터)와 새 청크 업서트를 한 번의 요청으로
+        처리합니다.
+        """
         self._ensure_collection(session_id)
         collection_name = f"session_{session_id}"
-        
-        self.client.upsert(
-            collection_name=collection_name,
-            points=[
-                models.PointStruct(
-                    id=message_id,
-                    vector=embedding,
-                    payload={
-                        "content": content,
-                        "message_id": message_id,
-                        "session_id": session_id
-                    }
-                )
-            ]
+        if chunks is None:
+            chunks = self.chunk_text(content)
+        if embeddings is None:
+            if embedding is not None and len(chunks) == 1:
+                embeddings = [embedding]
+            else:
+                embeddings = self.embed_message(content, chunks=chunks)
+        points = self.build_points(
+            message_id, session_id, content, embeddings, chunks=chunks,
+            role=role, memory_type=memory_type, user_id=user_id, created_at=created_at, token_count=token_count
         )
 
+        operations = [models.UpsertOperation(upsert=models.PointsList(points=points))]
+        replaced = 0
+        if replace:
+            # 세션 통계용으로 교체될 기존 청크 수를 셈 (새 메시지는 생략)
+            replaced = self._count_message_points(collection_name, message_id)
+            operations.insert(0, models.DeleteOperation(
+                delete=models.FilterSelector(filter=message_filter(message_id))
+            ))
+        self.client.batch_update_points(collection_name=collection_name, update_operations=operations)
+        # 쓰기 이후 버전을 올려 이 세션의 캐시된 검색 결과를 무효화
+        self.search_cache.bump(session_id)
+        if replace:
+            # 기존 청크 벡터를 읽어 오지 않으므로 centroid 는 다음 flush 에서 다시 계산
+            self._update_centroid(session_id, rebuild=True)
+        else:
+            self._update_centroid(session_id, added=embeddings)
+        get_session_stats().add_vectors(session_id, added=len(points), removed=replaced)
+
+    def _count_message_points(self, collection_name: str, message_id: int) -> int:
+        """메시지의 청크 포인트 수 (벡터가 없는 메시지는 0)."""
+        return self.client.count(
+            collection_name=collection_name,
+            count_filter=message_filter(message_id),
+            exact=True
+        ).count
+
     def delete_embedding(self, message_id: int, session_id: int) -> None:
+        """메시지의 모든 청크 포인트를 message_id 필터 한 번으로 삭제합니다."""
+        self._touch(session_id)
         collection_name = f"session_{session_id}"
         try:
-            self.client.delete(
-                collection_name=collection_name,
-                points_selector=models.PointIdsList(
-                    points=[message_id]
+            removed = self._count_message_points(collection_name, message_id)
+            if removed:
+                # 어시스턴트 메시지처럼 벡터가 없는 메시지는 삭제/centroid 재계산 생략
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=models.FilterSelector(filter=message_filter(message_id))
                 )
-            )
+                self._update_centroid(session_id, rebuild=True)
+                get_session_stats().add_vectors(session_id, added=0, removed=removed)
         except Exception as e:
             print(f"Error deleting embedding: {e}")
+        self.search_cache.bump(session_id)
+
+    def resolve_alias(self, alias_name: str) -> Optional[str]:
+        """alias가 가리키는 물리 컬렉션 이름을 반환합니다. alias가 아니면 None."""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == alias_name:
+                return alias.collection_name
+        return None
+
+    def swap_alias(self, alias_name: str, collection_name: str) -> Optional[str]:
+        """alias_name 으로 들어오는 읽기/쓰기를 collection_name 으로 전환합니다.
+
+        이미 alias인 경우 삭제/생성을 한 번의 요청으로 처리해 원자적으로 전환하고,
+        이전 물리 컬렉션 이름을 반환합니다. alias_name 이 기존 물리 컬렉션(재색인 이전에
+        만들어진 세션)이면 해당 컬렉션을 삭제한 뒤 alias를 만들며, 그 사이 짧은 공백이 있습니다.
+        """
+        current = self.resolve_alias(alias_name)
+        create = models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+        )
+        if current is not None:
+            self.client.update_collection_aliases(change_aliases_operations=[
+                models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias_name)),
+                create
+            ])
+            return current
+        try:
+            self.client.delete_collection(collection_name=alias_name)
+        except Exception as e:
+            if "not found" not in str(e).lower():
+                raise
+        self.client.update_collection_aliases(change_aliases_operations=[create])
+        return None
 
     def delete_session_embeddings(self, session_id: int) -> None:
         collection_name = f"session_{session_id}"
         try:
-            # 컬렉션 자체를 삭제
+            # 컬렉션 자체를 삭제 (재색인 후에는 alias가 가리키는 물리 컬렉션)
+            collection_name = self.resolve_alias(collection_name) or collection_name
             self.client.delete_collection(collection_name=collection_name)
             print(f"Collection {collection_name} deleted successfully")
         except Exception as e:
@@ -127,9 +498,86 @@ class QdrantClientWrapper:
             # 컬렉션이 없는 경우는 무시
             if "not found" not in str(e).lower():
                 raise
+        finally:
+            self.search_cache.bump(session_id)
+            with _indexed_collections_lock:
+                _indexed_collections.discard(f"session_{session_id}")
+            if self.tiering is not None:
+                self.tiering.forget(session_id)
+            if self.centroid_index is not None:
+                try:
+                    self.centroid_index.remove_session(session_id)
+                except Exception as e:
+                    logger.error(f"Error removing session centroid {session_id}: {e}")
+
+    def copy_session_embeddings(
+        self,
+        source_session_id: int,
+        target_session_id: int,
+        id_pairs: Iterable[Tuple[int, int]],
+        page_size: int = 512
+    ) -> int:
+        """원본 세션의 포인트를 벡터째 새 세션 컬렉션으로 복사하고 복사한 포인트 수를 반환합니다.
+
+        id_pairs 는 (원본 메시지 id, 새 메시지 id) 쌍입니다. page_size 개씩 끊어 그 메시지들의 청크
+        포인트를 message_id 필터로 스크롤하고, 포인트 id 와 payload 의 session_id/message_id 를
+        새 값으로 바꿔 페이지 단위로 upsert 합니다. 임베딩 API 는 호출하지 않습니다.
+        """
+        self._touch(source_session_id)
+        source_name = f"session_{source_session_id}"
+        target_name = f"session_{target_session_id}"
+        try:
+            info = self.client.get_collection(collection_name=source_name)
+        except Exception as e:
+            # 임베딩된 메시지가 없는 세션
+            if "not found" in str(e).lower() or "404" in str(e):
+                return 0
+            raise
+        dimension = info.config.params.vectors.size
+
+        copied = 0
+        vector_sum = np.zeros(dimension, dtype=np.float32)
+        pairs = iter(id_pairs)
+        created = False
+        while True:
+            new_ids = dict(islice(pairs, page_size))
+            if not new_ids:
+                break
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=source_name,
+                    scroll_filter=message_filter(new_ids),
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                if points:
+                    if not created:
+                        self.create_session_collection(target_name, dimension=dimension)
+                        created = True
+                    batch = []
+                    for point in points:
+                        message_id = new_ids[point.payload["message_id"]]
+                        batch.append(models.PointStruct(
+                            id=chunk_point_id(message_id, point.payload.get("chunk_index", 0)),
+                            vector=point.vector,
+                            payload={**point.payload, "session_id": target_session_id, "message_id": message_id}
+                        ))
+                    self.client.upsert(collection_name=target_name, points=batch)
+                    copied += len(batch)
+                    vector_sum += np.asarray([point.vector for point in batch], dtype=np.float32).sum(axis=0)
+                if offset is None:
+                    break
+
+        if copied and self.centroid_index is not None:
+            self.centroid_index.defer(target_session_id, vector_sum, copied)
+        return copied
 
     def delete_embeddings_by_filter(self, session_id: int, filter_conditions: Dict[str, Any]) -> None:
         """특정 조건에 맞는 임베딩들을 삭제합니다."""
+        self._touch(session_id)
         collection_name = f"session_{session_id}"
         try:
             self.client.delete(
@@ -148,36 +596,80 @@ class QdrantClientWrapper:
             )
         except Exception as e:
             print(f"Error deleting embeddings by filter: {e}")
+        self.search_cache.bump(session_id)
+        self._update_centroid(session_id, rebuild=True)
+
+    def delete_embeddings_by_similarity(
+        self,
+        session_id: int,
+        query: str,
+        similarity_threshold: float,
+        dry_run: bool = False,
+        page_size: int = 512,
+        delete_batch_size: int = 1000
+    ) -> int:
+        """특정 쿼리와의 유사도가 임계값 미만인 메시지들을 삭제하고 삭제(대상) 메시지 수를 반환합니다.
 
-    def delete_embeddings_by_similarity(self, session_id: int, query: str, similarity_threshold: float) -> None:
-        """특정 쿼리와의 유사도가 임계값 이하인 임베딩들을 삭제합니다."""
+        긴 메시지는 청크 포인트 여러 개로 저장되므로 청크 점수를 message_id 별 최고 점수로 모아
+        (검색의 max 집계와 같은 기준) 메시지 단위로 판단하고, 대상 메시지의 모든 청크를 message_id
+        필터로 함께 삭제합니다. 컬렉션 전체를 벡터와 함께 페이지 단위로 스크롤하며 코사인 유사도를
+        배치로 계산하므로, 세션 크기와 관계없이 한 페이지와 메시지별 점수만큼의 메모리만 사용합니다.
+        dry_run 이면 삭제하지 않고 대상 메시지 수만 셉니다. 중간에 실패하면 일부 삭제된 결과를 반환하지 않고
+        예외를 다시 발생시킵니다.
+        """
+        self._touch(session_id)
         collection_name = f"session_{session_id}"
+        best_scores: Dict[Any, float] = {}
+        targets: List[Any] = []
         try:
-            query_embedding = self.get_embedding(query)
-            search_result = self.client.search(
-                collection_name=collection_name,
-                query_vector=query_embedding,
-                limit=100  # 충분히 큰 수로 설정
-            )
-            
-            # 임계값 이하의 점수를 가진 포인트 ID 수집
-            points_to_delete = [
-                result.id for result in search_result
-                if result.score < similarity_threshold
-            ]
-            
-            if points_to_delete:
-                self.client.delete(
+            query_vector = np.asarray(self.embed_query(query), dtype=np.float32)
+            query_vector /= np.linalg.norm(query_vector) or 1.0
+
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
                     collection_name=collection_name,
-                    points_selector=models.PointIdsList(
-                        points=points_to_delete
-                    )
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=["message_id"],
+                    with_vectors=True
                 )
-        except Exception as e:
-            print(f"Error deleting embeddings by similarity: {e}")
+                if points:
+                    vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+                    norms = np.linalg.norm(vectors, axis=1)
+                    norms[norms == 0] = 1.0
+                    scores = (vectors @ query_vector) / norms
+                    for point, score in zip(points, scores.tolist()):
+                        message_id = (point.payload or {}).get("message_id", point.id)
+                        if score > best_scores.get(message_id, float("-inf")):
+                            best_scores[message_id] = score
+                if offset is None:
+                    break
+
+            targets = [message_id for message_id, score in best_scores.items() if score < similarity_threshold]
+            if not dry_run:
+                for start in range(0, len(targets), delete_batch_size):
+                    self.client.delete(
+                        collection_name=collection_name,
+                        points_selector=models.FilterSelector(
+                            filter=message_filter(targets[start:start + delete_batch_size])
+                        )
+                    )
+        except Exception:
+            if not dry_run:
+                # 일부만 삭제되었을 수 있으므로 캐시와 centroid 를 정리한 뒤 오류를 그대로 전달
+                self.search_cache.bump(session_id)
+                self._update_centroid(session_id, rebuild=True)
+            raise
+        if not dry_run and targets:
+            self.search_cache.bump(session_id)
+            # 삭제된 청크 벡터를 모두 들고 있지 않으므로 centroid 는 다시 계산
+            self._update_centroid(session_id, rebuild=True)
+        return len(targets)
 
     def cleanup_old_embeddings(self, session_id: int, days_threshold: int = 30) -> None:
         """특정 일수 이상 지난 임베딩들을 삭제합니다."""
+        self._touch(session_id)
         collection_name = f"session_{session_id}"
         try:
             from datetime import datetime, timedelta
@@ -191,7 +683,7 @@ class QdrantClientWrapper:
                             models.FieldCondition(
                                 key="created_at",
                                 range=models.Range(
-                                    lt=threshold_date.isoformat()
+                                    lt=to_epoch(threshold_date)
                                 )
                             )
                         ]
@@ -200,35 +692,257 @@ class QdrantClientWrapper:
             )
         except Exception as e:
             print(f"Error cleaning up old embeddings: {e}")
+        self.search_cache.bump(session_id)
+        self._update_centroid(session_id, rebuild=True)
 
     def search_similar(
         self,
         query: str,
         session_id: int,
-        limit: Optional[int] = 5
+        limit: Optional[int] = 5,
+        query_filter: Optional[models.Filter] = None,
+        mode: str = "dense",
+        score_threshold: Optional[float] = None,
+        adaptive_k: bool = False,
+        min_k: int = 1,
+        query_vector: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
-        self._ensure_collection(session_id)
-        collection_name = f"session_{session_id}"
-        
-        query_embedding = self.get_embedding(query)
-        
+        """세션 내 유사 메시지를 검색합니다.
+
+        score_threshold 는 벡터 검색(dense, hybrid 의 벡터 쪽)에서 Qdrant 서버 측으로 전달되어
+        기준 미만의 후보는 전송되지 않습니다. adaptive_k 이면 limit 을 max_k 로 보고 후보를
+        SEARCH_ADAPTIVE_K_OVERSAMPLE 배 가져온 뒤, 점수가 크게 떨어지는 지점까지만
+        (최소 min_k 개) 반환합니다. query_vector 를 주면 쿼리 임베딩을 다시 만들지 않습니다.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+
         # limit이 None이면 기본값 5 사용
         search_limit = limit if limit is not None else 5
+
+        cache_key = (
+            normalize_query(query),
+            search_limit,
+            query_filter.json() if query_filter is not None else None,
+            mode,
+            score_threshold,
+            min_k if adaptive_k else None
+        )
+        return self.search_cache.get_or_compute(
+            session_id,
+            cache_key,
+            lambda: self._search_adaptive(
+                query, session_id, search_limit, query_filter, mode, score_threshold, adaptive_k, min_k,
+                query_vector
+            )
+        )
+
+    def _search_adaptive(
+        self,
+        query: str,
+        session_id: int,
+        search_limit: int,
+        query_filter: Optional[models.Filter],
+        mode: str,
+        score_threshold: Optional[float],
+        adaptive_k: bool,
+        min_k: int,
+        query_vector: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        if not adaptive_k:
+            return self._search(query, session_id, search_limit, query_filter, mode, score_threshold, query_vector)
+
+        # 경계 판단을 위해 max_k 보다 최소 1개 이상 더 가져옴
+        candidate_limit = max(search_limit * settings.SEARCH_ADAPTIVE_K_OVERSAMPLE, search_limit + 1)
+        candidates = self._search(
+            query, session_id, candidate_limit, query_filter, mode, score_threshold, query_vector
+        )
+        selected = select_adaptive_k(
+            candidates,
+            min_k=min_k,
+            max_k=search_limit,
+            min_relative_gap=settings.SEARCH_ADAPTIVE_K_MIN_RELATIVE_GAP
+        )
+        metrics.observe("search_adaptive_k", len(selected))
+        return selected
+
+    def _search(
+        self,
+        query: str,
+        session_id: int,
+        search_limit: int,
+        query_filter: Optional[models.Filter],
+        mode: str,
+        score_threshold: Optional[float] = None,
+        query_vector: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        if mode == "lexical":
+            return self.lexical_index.search(query, session_id, search_limit, query_filter)
+        if mode == "dense":
+            return self._dense_search(query, session_id, search_limit, query_filter, score_threshold, query_vector)
+
+        # hybrid: 키워드 검색을 별도 스레드에서 실행하는 동안 임베딩/벡터 검색 수행
+        # 융합 품질을 위해 각 검색은 limit의 2배까지 후보를 가져옴
+        candidate_limit = search_limit * 2
+        lexical_future = _search_executor.submit(
+            bind_request_profiler(self.lexical_index.search), query, session_id, candidate_limit, query_filter
+        )
+        try:
+            dense_results = self._dense_search(
+                query, session_id, candidate_limit, query_filter, score_threshold, query_vector
+            )
+        except Exception as e:
+            # 임베딩/Qdrant 장애 시 키워드 검색 결과로 대체
+            logger.warning(f"Dense search failed, falling back to lexical results: {e}")
+            return lexical_future.result()[:search_limit]
+        return reciprocal_rank_fusion([dense_results, lexical_future.result()], limit=search_limit)
+
+    def _dense_search(
+        self,
+        query: str,
+        session_id: int,
+        limit: int,
+        query_filter: Optional[models.Filter] = None,
+        score_threshold: Optional[float] = None,
+        query_vector: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        self._ensure_collection(session_id)
+        collection_name = f"session_{session_id}"
         
-        search_result = self.client.search(
+        query_embedding = query_vector if query_vector is not None else self.embed_query(query)
+        return self._search_messages(collection_name, query_embedding, limit, query_filter, score_threshold)
+
+    def _search_messages(
+        self,
+        collection_name: str,
+        query_vector: List[float],
+        limit: int,
+        query_filter: Optional[models.Filter] = None,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """청크 포인트를 message_id 로 묶어 메시지당 결과 하나씩 점수 내림차순으로 반환합니다.
+
+        SEARCH_CHUNK_AGGREGATION 이 max 이면 가장 잘 맞는 청크의 점수, sum 이면 상위
+        SEARCH_CHUNK_GROUP_SIZE 개 청크 점수의 합을 메시지 점수로 씁니다. payload 는 가장 잘 맞는
+        청크의 것입니다. score_threshold 는 청크 단위 유사도에 적용됩니다.
+        """
+        summed = settings.SEARCH_CHUNK_AGGREGATION == "sum"
+        result = self.client.search_groups(
             collection_name=collection_name,
-            query_vector=query_embedding,
-            limit=search_limit
+            query_vector=query_vector,
+            group_by="message_id",
+            query_filter=query_filter,
+            limit=limit,
+            group_size=settings.SEARCH_CHUNK_GROUP_SIZE if summed else 1,
+            score_threshold=score_threshold
         )
-        
-        return [
+        hits = [
             {
-                "id": result.id,
-                "score": result.score,
-                "payload": result.payload
+                "id": group.id,
+                "score": sum(hit.score for hit in group.hits) if summed else group.hits[0].score,
+                "payload": group.hits[0].payload
             }
-            for result in search_result
+            for group in result.groups
         ]
+        if summed:
+            hits.sort(key=lambda hit: hit["score"], reverse=True)
+        return hits
+
+    def search_sessions(
+        self,
+        query: str,
+        session_ids: List[int],
+        limit: int = 10,
+        query_filter: Optional[models.Filter] = None,
+        max_in_flight: Optional[int] = None,
+        candidate_sessions: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """여러 세션을 병렬로 검색해 전역 상위 limit 개 결과를 점수 순으로 반환합니다.
+
+        쿼리 임베딩은 한 번만 생성합니다. candidate_sessions 가 주어지고 세션 수가 그보다 많으면
+        먼저 centroid 인덱스로 상위 후보 세션만 고른 뒤 그 세션들과 centroid 가 없는 세션만 정밀
+        검색합니다.
+        상위 limit 개가 채워지면 그 최저 점수를 이후 세션 검색의 score_threshold 로 넘겨,
+        결과를 바꿀 수 없는 후보는 Qdrant에서 걸러냅니다.
+        """
+        if not session_ids or limit <= 0:
+            return []
+        query_vector = self.embed_query(query)
+        max_in_flight = max_in_flight or settings.GLOBAL_SEARCH_MAX_WORKERS
+
+        if candidate_sessions and len(session_ids) > candidate_sessions and self.centroid_index is not None:
+            routed = [
+                route["session_id"] for route in self.centroid_index.route(query_vector, candidate_sessions, session_ids)
+            ]
+            # centroid 가 없거나 아직 반영되지 않은 세션은 라우팅할 수 없으므로 함께 정밀 검색
+            routed_set = set(routed)
+            session_ids = routed + [
+                session_id for session_id in self.centroid_index.unrouted(session_ids) if session_id not in routed_set
+            ]
+
+        top: List[tuple] = []  # (score, 순번, 결과) 최소 힙
+        counter = 0
+        pending_ids = iter(session_ids)
+        in_flight: Dict[Any, int] = {}
+
+        def submit_next() -> bool:
+            session_id = next(pending_ids, None)
+            if session_id is None:
+                return False
+            # 합산 점수(sum)는 청크 점수 임계값으로 쓸 수 없으므로 max 일 때만 적용
+            prune = len(top) >= limit and settings.SEARCH_CHUNK_AGGREGATION != "sum"
+            threshold = top[0][0] if prune else None
+            future = _get_fanout_executor().submit(
+                bind_request_profiler(self._search_collection), session_id, query_vector, limit, query_filter, threshold
+            )
+            in_flight[future] = session_id
+            return True
+
+        for _ in range(max_in_flight):
+            if not submit_next():
+                break
+
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                session_id = in_flight.pop(future)
+                try:
+                    hits = future.result()
+                except Exception as e:
+                    logger.warning(f"Error searching session {session_id}: {e}")
+                    hits = []
+                # 세션별 결과는 점수 내림차순이므로 더 이상 힙에 들어갈 수 없으면 중단
+                for hit in hits:
+                    if len(top) >= limit and hit["score"] <= top[0][0]:
+                        break
+                    counter += 1
+                    entry = (hit["score"], counter, hit)
+                    if len(top) < limit:
+                        heapq.heappush(top, entry)
+                    else:
+                        heapq.heapreplace(top, entry)
+                submit_next()
+
+        return [entry[2] for entry in sorted(top, key=lambda entry: (-entry[0], entry[1]))]
+
+    def _search_collection(
+        self,
+        session_id: int,
+        query_vector: List[float],
+        limit: int,
+        query_filter: Optional[models.Filter] = None,
+        score_threshold: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """임베딩이 이미 있는 경우 세션 컬렉션 하나를 검색합니다. 컬렉션이 없으면 빈 결과."""
+        self._touch(session_id)
+        try:
+            return self._search_messages(
+                f"session_{session_id}", query_vector, limit, query_filter, score_threshold
+            )
+        except Exception as e:
+            if "not found" in str(e).lower() or "404" in str(e):
+                return []
+            raise
 
     def delete_collection(self, collection_name: str) -> None:
         try:
@@ -243,13 +957,63 @@ class QdrantClientFactory:
         url: Optional[str] = None,
         openai_client: Optional[openai.OpenAI] = None
     ) -> QdrantClientWrapper:
-        """Qdrant 클라이언트를 생성합니다."""
-        return QdrantClientWrapper(url=url or QDRANT_URL, openai_client=openai_client)
+        """Qdrant 클라이언트를 생성합니다. QDRANT_PREFER_GRPC 이면 gRPC 전송을 사용합니다."""
+        env_vars = validate_env_vars()
+        return QdrantClientWrapper(
+            url=url or env_vars["QDRANT_URL"],
+            openai_client=openai_client,
+            client_options=transport_options(
+                prefer_grpc=settings.QDRANT_PREFER_GRPC,
+                grpc_port=settings.QDRANT_GRPC_PORT,
+                grpc_compression=settings.QDRANT_GRPC_COMPRESSION
+            )
+        )
+
+
+_qdrant_client: Optional[QdrantClientWrapper] = None
+
 
 # FastAPI 의존성으로 제공
 def get_qdrant_client() -> QdrantClientWrapper:
-    """FastAPI 의존성 주입을 위한 Qdrant 클라이언트 생성 함수"""
-    return QdrantClientFactory.create_client()
+    """FastAPI 의존성 주입을 위한 Qdrant 클라이언트 반환 함수
+
+    요청마다 HTTP 연결을 새로 만들지 않도록 첫 요청 때 만든 클라이언트를 재사용합니다.
+    """
+    global _qdrant_client
+    if _qdrant_client is None:
+        _qdrant_client = QdrantClientFactory.create_client()
+    return _qdrant_client
+
+
+def exclude_message_filter(message_id: int) -> models.Filter:
+    """메시지 자신(모든 청크)을 검색 후보에서 빼는 필터."""
+    return models.Filter(must_not=[
+        models.FieldCondition(key="message_id", match=models.MatchValue(value=message_id))
+    ])
+
+
+def search_chat_context(
+    client: QdrantClientWrapper,
+    query: str,
+    session_id: int,
+    query_vector: Optional[List[float]] = None,
+    exclude_message_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """채팅 프롬프트의 컨텍스트로 넣을 유사 메시지를 CHAT_CONTEXT_* 설정에 따라 검색합니다.
+
+    exclude_message_id 는 방금 저장한 프롬프트 메시지입니다. 자기 자신은 점수가 ~1.0 이라 남겨 두면
+    adaptive-k 가 그 바로 뒤를 경계로 잡으므로, 후보를 고르기 전에 Qdrant 필터로 제외합니다.
+    """
+    return client.search_similar(
+        query=query,
+        session_id=session_id,
+        limit=settings.CHAT_CONTEXT_MAX_K,
+        query_filter=exclude_message_filter(exclude_message_id) if exclude_message_id is not None else None,
+        score_threshold=settings.CHAT_CONTEXT_SCORE_THRESHOLD,
+        adaptive_k=settings.CHAT_CONTEXT_ADAPTIVE_K,
+        min_k=settings.CHAT_CONTEXT_MIN_K,
+        query_vector=query_vector
+    )
 
 
 def insert_vector(
@@ -261,7 +1025,7 @@ def insert_vector(
 ) -> int:
     """Insert a vector with payload into the specified collection."""
     if vector_id is None:
-        vector_id = int(datetime.utcnow().timestamp() * 1000)
+        vector_id = next_vector_id()
 
     client.upsert(
         collection_name=collection_name,
@@ -289,3 +1053,56 @@ def search_vectors(
     return [
         {"id": r.id, "score": r.score, "payload": r.payload} for r in results
     ]
+
+
+def insert_vectors(
+    client: QdrantClient,
+    collection_name: str,
+    vectors: numpy.ndarray,
+    payloads: List[VectorPayload],
+    ids: Optional[List[int]] = None,
+    wait: bool = True,
+    batch_size: Optional[int] = None,
+) -> List[int]:
+    """Insert many vectors, upserting them in batches of ``batch_size`` points."""
+    if len(payloads) != len(vectors):
+        raise ValueError(f"Got {len(vectors)} vectors but {len(payloads)} payloads")
+    if ids is None:
+        ids = [next_vector_id() for _ in range(len(vectors))]
+    elif len(ids) != len(vectors):
+        raise ValueError(f"Got {len(vectors)} vectors but {len(ids)} ids")
+    batch_size = batch_size or settings.VECTOR_UPSERT_BATCH_SIZE
+
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        client.upsert(
+            collection_name=collection_name,
+            points=models.Batch(
+                ids=ids[start:end],
+                vectors=vectors[start:end].tolist(),
+                payloads=[payload.dict() for payload in payloads[start:end]],
+            ),
+            wait=wait,
+        )
+    return ids
+
+
+def search_vectors_batch(
+    client: QdrantClient,
+    collection_name: str,
+    query_vectors: numpy.ndarray,
+    limit: int = 5,
+    with_payload: bool = True,
+) -> List[List[Dict[str, Any]]]:
+    """Run one search per query vector in a single Qdrant request."""
+    batches = client.search_batch(
+        collection_name=collection_name,
+        requests=[
+            models.SearchRequest(vector=vector, limit=limit, with_payload=with_payload)
+            for vector in query_vectors.tolist()
+        ],
+    )
+    return [
+        [{"id": r.id, "score": r.score, "payload": r.payload} for r in results]
+        for results in batches
+    ]
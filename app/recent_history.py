@@ -0,0 +1,181 @@
+"""세션별 최근 대화 링 버퍼.
+
+채팅 요청마다 최근 대화를 SQL로 다시 읽지 않도록 세션마다 마지막 N턴을 프로세스 메모리에
+보관합니다. 메시지 쓰기(commit)가 버퍼에 바로 반영되므로, 정상 상태에서는 DB 조회 없이
+최근 대화를 LLM 요청에 포함할 수 있습니다.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import MessageModel
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.orm_events import CommitQueue
+from app.utils.token_utils import count_tokens
+
+# LLM 대화 기록으로 보낼 수 있는 역할
+HISTORY_ROLES = ("user", "assistant", "system")
+
+
+def _turn_tokens(turn: Dict[str, Any]) -> int:
+    token_count = turn.get("token_count")
+    return token_count if token_count is not None else count_tokens(turn["content"] or "")
+
+
+class RecentHistory:
+    """세션별 최근 대화 버퍼 (세션 간 LRU).
+
+    - 세션마다 최대 max_turns 개의 턴을 보관하고, 토큰 합계가 max_tokens 를 넘으면 오래된 턴부터 버립니다.
+    - 버퍼가 없으면 (session_id, created_at) 인덱스를 쓰는 쿼리 한 번으로 채웁니다.
+    - 새 메시지는 commit 시 버퍼 끝에 추가되고, 메시지 수정/삭제 시 해당 세션 버퍼는 버려집니다.
+    - TTL 은 다른 워커 프로세스의 쓰기로 인한 오래된 기록을 제한하기 위한 안전장치입니다.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_turns: int = 20,
+        max_tokens: int = 2000,
+        ttl_seconds: float = 300.0
+    ):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[int, Tuple[float, Deque[Dict[str, Any]]]]" = OrderedDict()
+        # SQL 로 채우는 중인 세션 → 그 사이 쓰기가 있었는지 여부
+        self._loading: Dict[int, bool] = {}
+
+    def get(self, db: Session, session_id: int, exclude_ids: Iterable[int] = ()) -> List[Dict[str, Any]]:
+        """세션의 최근 턴을 오래된 순으로 반환합니다 (토큰 예산 안에서 최신 턴 우선)."""
+        if self.max_turns <= 0:
+            return []
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._sessions.move_to_end(session_id)
+                turns = list(entry[1])
+                metrics.inc("recent_history_hits_total")
+            else:
+                turns = None
+                self._loading[session_id] = False
+
+        if turns is None:
+            metrics.inc("recent_history_misses_total")
+            turns = self._load(db, session_id)
+            with self._lock:
+                # 읽는 동안 쓰기가 있었다면 읽은 내용이 이미 오래되었으므로 보관하지 않음
+                if not self._loading.pop(session_id, True):
+                    self._store(session_id, deque(turns))
+
+        excluded = set(exclude_ids)
+        selected: List[Dict[str, Any]] = []
+        budget = self.max_tokens
+        for turn in reversed(turns):
+            if turn["id"] in excluded:
+                continue
+            budget -= _turn_tokens(turn)
+            if budget < 0:
+                break
+            selected.append(turn)
+        selected.reverse()
+        return selected
+
+    def _load(self, db: Session, session_id: int) -> List[Dict[str, Any]]:
+        rows = (
+            db.query(MessageModel.id, MessageModel.role, MessageModel.content, MessageModel.token_count)
+            .filter(MessageModel.session_id == session_id)
+            .order_by(MessageModel.created_at.desc(), MessageModel.id.desc())
+            .limit(self.max_turns)
+            .all()
+        )
+        return [
+            {"id": message_id, "role": role, "content": content, "token_count": token_count}
+            for message_id, role, content, token_count in reversed(rows)
+        ]
+
+    def _store(self, session_id: int, turns: Deque[Dict[str, Any]]) -> None:
+        """(lock 안에서 호출) 턴 수/토큰 상한을 적용해 보관하고 LRU 를 정리합니다."""
+        while len(turns) > self.max_turns:
+            turns.popleft()
+        total = sum(_turn_tokens(turn) for turn in turns)
+        while len(turns) > 1 and total > self.max_tokens:
+            total -= _turn_tokens(turns.popleft())
+        self._sessions[session_id] = (time.monotonic(), turns)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def append(self, session_id: int, turn: Dict[str, Any]) -> None:
+        """새로 저장된 메시지를 버퍼 끝에 추가합니다 (버퍼가 없는 세션은 다음 조회 때 채움)."""
+        with self._lock:
+            if session_id in self._loading:
+                self._loading[session_id] = True
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+            turns = entry[1]
+            turns.append(turn)
+            self._store(session_id, turns)
+
+    def invalidate(self, session_id: int) -> None:
+        with self._lock:
+            if session_id in self._loading:
+                self._loading[session_id] = True
+            self._sessions.pop(session_id, None)
+
+
+def history_messages(turns: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """버퍼의 턴을 chat completion messages 형식으로 변환합니다."""
+    return [
+        {"role": turn["role"], "content": turn["content"]}
+        for turn in turns
+        if turn["role"] in HISTORY_ROLES and turn["content"]
+    ]
+
+
+_recent_history: Optional[RecentHistory] = None
+
+
+def get_recent_history() -> RecentHistory:
+    """프로세스 전역 RecentHistory 를 반환합니다."""
+    global _recent_history
+    if _recent_history is None:
+        _recent_history = RecentHistory(
+            max_sessions=settings.HISTORY_CACHE_MAX_SESSIONS,
+            max_turns=settings.HISTORY_MAX_TURNS,
+            max_tokens=settings.HISTORY_MAX_TOKENS,
+            ttl_seconds=settings.HISTORY_CACHE_TTL_SECONDS
+        )
+    return _recent_history
+
+
+# --- ORM 이벤트: commit 된 쓰기만 버퍼에 반영 ---
+
+def _message_change(op: str):
+    return lambda target: (
+        op,
+        target.session_id,
+        {"id": target.id, "role": target.role, "content": target.content, "token_count": target.token_count}
+    )
+
+
+def _apply_pending(pending) -> None:
+    history = get_recent_history()
+    for op, session_id, turn in pending:
+        if op == "append":
+            history.append(session_id, turn)
+        else:
+            history.invalidate(session_id)
+
+
+_pending = CommitQueue("recent_history", _apply_pending)
+_pending.track(MessageModel, "after_insert", _message_change("append"))
+_pending.track(MessageModel, "after_update", _message_change("invalidate"))
+_pending.track(MessageModel, "after_delete", _message_change("invalidate"))
@@ -0,0 +1,338 @@
+"""메시지 테이블로부터 Qdrant 벡터를 다시 만드는 재색인 작업.
+
+임베딩 모델을 바꾸거나 Qdrant 볼륨을 잃었을 때 사용합니다. 메시지를 id 순으로 읽어
+배치 단위로 임베딩하고, 세션별 shadow 컬렉션(session_{id}_{tag})에 업서트합니다.
+진행 상황은 체크포인트 파일에 기록되므로 중단 후 같은 tag로 다시 실행하면 이어서 진행합니다.
+모든 메시지를 처리하면 session_{id} alias를 shadow 컬렉션으로 전환합니다. 전환 전까지
+실시간 요청은 기존 컬렉션을 계속 사용합니다. 전환 뒤에 처리하는 메시지는 session_{id} 에 바로
+쓰고, alias 가 가리키지 않는 이 tag 의 shadow 컬렉션은 지웁니다.
+
+    python -m app.reindex --tag v2
+    python -m app.reindex --tag v3 --model text-embedding-3-large --dimension 3072 --skip-swap
+
+모델을 바꾸는 경우 --skip-swap 으로 shadow 컬렉션을 만든 뒤, OPENAI_EMBEDDING_MODEL /
+EMBEDDING_DIMENSION 설정 배포와 함께 --skip-swap 없이 다시 실행해 전환합니다.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from qdrant_client.http import models
+from sqlalchemy.orm import Session
+
+from app.database import db_factory
+from app.models import MessageModel, SessionModel
+from app.qdrant_client import QdrantClientWrapper, QdrantClientFactory, message_filter
+from app.centroid_index import SessionCentroidIndex
+from app.utils.rate_limit import TokenBucket
+from app.utils.token_utils import count_tokens_batch
+
+logger = logging.getLogger("reindex")
+
+
+class ReindexJob:
+    """MessageModel → shadow 컬렉션 재색인 및 alias 전환."""
+
+    def __init__(
+        self,
+        db: Session,
+        qdrant: QdrantClientWrapper,
+        tag: str,
+        model: Optional[str] = None,
+        dimension: Optional[int] = None,
+        batch_size: int = 256,
+        tokens_per_minute: int = 1_000_000,
+        roles: Sequence[str] = ("user",),
+        checkpoint_path: Optional[str] = None,
+        keep_old: bool = False
+    ):
+        self.db = db
+        self.qdrant = qdrant
+        self.tag = tag
+        self.model = model or qdrant.embedding_model
+        self.dimension = dimension or qdrant.embedding_dimension
+        self.batch_size = batch_size
+        self.budget = TokenBucket(tokens_per_minute)
+        self.roles = list(roles)
+        self.checkpoint_path = checkpoint_path or f"./reindex_{tag}.json"
+        self.keep_old = keep_old
+        self.state = self._load_checkpoint()
+
+    # --- 체크포인트 ---
+
+    def _load_checkpoint(self) -> Dict:
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+            if state.get("model") != self.model:
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint_path} was created with model {state.get('model')}, "
+                    f"not {self.model}"
+                )
+            logger.info(f"Resuming reindex {self.tag} after message {state['last_id']}")
+            return state
+        return {
+            "tag": self.tag,
+            "model": self.model,
+            "dimension": self.dimension,
+            "started_at": datetime.utcnow().isoformat(),
+            "last_id": 0,
+            "embedded": 0,
+            "sessions": [],
+            "swapped": False
+        }
+
+    def _save_checkpoint(self) -> None:
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def shadow_name(self, session_id: int) -> str:
+        return f"session_{session_id}_{self.tag}"
+
+    def target_name(self, session_id: int) -> str:
+        """배치를 쓸 컬렉션. 전환 후에는 alias(또는 전환 후 생긴 세션의 컬렉션)에 씁니다."""
+        return f"session_{session_id}" if self.state["swapped"] else self.shadow_name(session_id)
+
+    # --- 재색인 ---
+
+    def _embeddable(self):
+        return self.db.query(MessageModel).filter(MessageModel.role.in_(self.roles))
+
+    def _index_messages(self, messages: List[MessageModel]) -> None:
+        """메시지 배치를 임베딩하고 세션별로 묶어 shadow 컬렉션에 업서트합니다."""
+        # 빈 메시지는 임베딩 API가 거부하므로 제외
+        messages = [m for m in messages if m.content and m.content.strip()]
+        if not messages:
+            return
+        # 긴 메시지는 청크로 나눠 모든 청크를 한 번에 임베딩
+        chunked = [self.qdrant.chunk_text(m.content) for m in messages]
+        texts = [chunk for chunks in chunked for chunk in chunks]
+        # 저장된 token_count 를 쓰고, 백필 전이라 비어 있는 행만 한 번에 계산
+        missing = [m for m in messages if m.token_count is None]
+        for message, token_count in zip(missing, count_tokens_batch([m.content for m in missing])):
+            message.token_count = token_count
+        self.budget.acquire(sum(m.token_count for m in messages))
+        embeddings = self.qdrant.get_embeddings(texts, model=self.model)
+        # payload 의 user_id 는 세션 소유자 (search 의 user_id 필터용)
+        owners = dict(
+            self.db.query(SessionModel.id, SessionModel.user_id)
+            .filter(SessionModel.id.in_({m.session_id for m in messages}))
+            .all()
+        )
+
+        points_by_session: Dict[int, List[models.PointStruct]] = {}
+        ids_by_session: Dict[int, List[int]] = {}
+        position = 0
+        for message, chunks in zip(messages, chunked):
+            vectors = embeddings[position:position + len(chunks)]
+            position += len(chunks)
+            points_by_session.setdefault(message.session_id, []).extend(
+                self.qdrant.build_points(
+                    message.id, message.session_id, message.content, vectors, chunks=chunks,
+                    role=message.role, user_id=owners.get(message.session_id),
+                    created_at=message.created_at, token_count=message.token_count
+                )
+            )
+            ids_by_session.setdefault(message.session_id, []).append(message.id)
+
+        sessions = set(self.state["sessions"])
+        for session_id, points in points_by_session.items():
+            if session_id not in sessions:
+                # 전환 후 생긴 세션은 alias 없이 session_{id} 를 쓰므로 shadow 를 만들지 않음
+                self.qdrant.create_session_collection(self.target_name(session_id), self.dimension)
+                if not self.state["swapped"]:
+                    sessions.add(session_id)
+            # 다시 임베딩한(수정된) 메시지의 청크 수가 줄었을 수 있으므로 기존 청크를 지우고 업서트
+            self.qdrant.client.batch_update_points(
+                collection_name=self.target_name(session_id),
+                update_operations=[
+                    models.DeleteOperation(
+                        delete=models.FilterSelector(filter=message_filter(ids_by_session[session_id]))
+                    ),
+                    models.UpsertOperation(upsert=models.PointsList(points=points)),
+                ],
+                wait=False
+            )
+        self.state["sessions"] = sorted(sessions)
+        self.state["embedded"] += len(messages)
+
+    def _stream_new(self) -> int:
+        """체크포인트 이후의 메시지를 id 순으로 처리합니다."""
+        processed = 0
+        while True:
+            batch = (
+                self._embeddable()
+                .filter(MessageModel.id > self.state["last_id"])
+                .order_by(MessageModel.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not batch:
+                return processed
+            self._index_messages(batch)
+            self.state["last_id"] = batch[-1].id
+            self._save_checkpoint()
+            processed += len(batch)
+            logger.info(f"Reindexed up to message {self.state['last_id']} ({self.state['embedded']} total)")
+
+    def _catch_up_updates(self) -> int:
+        """재색인 시작 이후 수정된(이미 처리한) 메시지를 다시 임베딩합니다."""
+        started_at = datetime.fromisoformat(self.state["started_at"])
+        processed = 0
+        last_id = 0
+        while True:
+            batch = (
+                self._embeddable()
+                .filter(
+                    MessageModel.id > last_id,
+                    MessageModel.id <= self.state["last_id"],
+                    MessageModel.updated_at >= started_at
+                )
+                .order_by(MessageModel.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not batch:
+                return processed
+            self._index_messages(batch)
+            last_id = batch[-1].id
+            processed += len(batch)
+
+    def _reconcile_deletes(self, session_id: int, page_size: int = 1000) -> int:
+        """재색인 중 삭제된 메시지의 포인트를 shadow 컬렉션에서 제거합니다."""
+        collection_name = self.shadow_name(session_id)
+        removed = 0
+        offset = None
+        while True:
+            points, offset = self.qdrant.client.scroll(
+                collection_name=collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=["message_id"],
+                with_vectors=False
+            )
+            # 청크 포인트의 id 는 메시지 id 와 다르므로 payload 의 message_id 로 비교
+            # (message_id 가 없는 예전 포인트는 포인트 id 가 메시지 id)
+            owners = {point.id: (point.payload or {}).get("message_id", point.id) for point in points}
+            message_ids = set(owners.values())
+            if message_ids:
+                existing = {
+                    row[0] for row in
+                    self.db.query(MessageModel.id).filter(MessageModel.id.in_(message_ids)).all()
+                }
+                missing = [point_id for point_id, message_id in owners.items() if message_id not in existing]
+                if missing:
+                    self.qdrant.client.delete(
+                        collection_name=collection_name,
+                        points_selector=models.PointIdsList(points=missing)
+                    )
+                    removed += len(missing)
+            if offset is None:
+                return removed
+
+    def _wait_for_writes(self, collection_name: str) -> None:
+        """wait=False 로 보낸 업서트가 모두 적용될 때까지 기다립니다.
+
+        컬렉션의 변경은 순서대로 적용되므로, 빈 삭제를 wait=True 로 보내 앞선 배치가 끝나기를 기다립니다.
+        """
+        self.qdrant.client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=[]),
+            wait=True
+        )
+
+    def swap(self) -> None:
+        """모든 세션의 alias를 shadow 컬렉션으로 전환합니다."""
+        live_sessions = {row[0] for row in self.db.query(SessionModel.id).all()}
+        # 전환된 세션의 centroid 는 새 벡터(차원)로 다시 계산
+        centroid_index = None
+        if self.qdrant.centroid_index is not None:
+            centroid_index = SessionCentroidIndex(self.qdrant.client, self.dimension)
+        for session_id in self.state["sessions"]:
+            shadow = self.shadow_name(session_id)
+            if session_id not in live_sessions:
+                # 재색인 중 삭제된 세션
+                self.qdrant.delete_collection(shadow)
+                continue
+            self._wait_for_writes(shadow)
+            self._reconcile_deletes(session_id)
+            previous = self.qdrant.swap_alias(f"session_{session_id}", shadow)
+            self.qdrant.search_cache.bump(session_id)
+            if centroid_index is not None:
+                centroid_index.rebuild(session_id, shadow)
+            if previous and previous != shadow and not self.keep_old:
+                self.qdrant.delete_collection(previous)
+        self.state["swapped"] = True
+        self._save_checkpoint()
+
+    def _drop_orphan_shadows(self) -> int:
+        """어떤 alias 도 가리키지 않는 이 tag 의 shadow 컬렉션을 지웁니다.
+
+        전환 후 생긴 세션에 예전 버전이 만들어 둔 shadow 컬렉션 같은 것들입니다.
+        """
+        swapped = {self.shadow_name(session_id) for session_id in self.state["sessions"]}
+        pattern = re.compile(rf"session_\d+_{re.escape(self.tag)}")
+        removed = 0
+        for collection in self.qdrant.client.get_collections().collections:
+            name = collection.name
+            if pattern.fullmatch(name) and name not in swapped:
+                self.qdrant.delete_collection(name)
+                removed += 1
+        if removed:
+            logger.info(f"Deleted {removed} orphan shadow collections for {self.tag}")
+        return removed
+
+    def run(self, swap: bool = True) -> Dict:
+        self._stream_new()
+        self._catch_up_updates()
+        if swap and not self.state["swapped"]:
+            self.swap()
+            # 마지막 조회 이후 전환 전까지 기존 컬렉션에만 기록된 메시지 반영 (alias 대상에 씀)
+            self._stream_new()
+        if self.state["swapped"]:
+            self._drop_orphan_shadows()
+        return self.state
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild Qdrant session collections from the message table")
+    parser.add_argument("--tag", required=True, help="Suffix for the shadow collections, e.g. v2")
+    parser.add_argument("--model", help="Embedding model (default: OPENAI_EMBEDDING_MODEL setting)")
+    parser.add_argument("--dimension", type=int, help="Embedding dimension (default: EMBEDDING_DIMENSION setting)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--tokens-per-minute", type=int, default=1_000_000)
+    parser.add_argument("--roles", nargs="+", default=["user"], help="Message roles to embed")
+    parser.add_argument("--checkpoint", help="Checkpoint file path (default: ./reindex_<tag>.json)")
+    parser.add_argument("--keep-old", action="store_true", help="Keep the previous collections after the swap")
+    parser.add_argument("--skip-swap", action="store_true", help="Build the shadow collections without switching reads")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    db = db_factory.SessionLocal()
+    try:
+        job = ReindexJob(
+            db,
+            QdrantClientFactory.create_client(),
+            tag=args.tag,
+            model=args.model,
+            dimension=args.dimension,
+            batch_size=args.batch_size,
+            tokens_per_minute=args.tokens_per_minute,
+            roles=args.roles,
+            checkpoint_path=args.checkpoint,
+            keep_old=args.keep_old
+        )
+        state = job.run(swap=not args.skip_swap)
+        logger.info(f"Reindex {args.tag} finished: {state['embedded']} messages, {len(state['sessions'])} sessions")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import SessionStorageStats, StorageStatsResponse, ErrorResponse, ErrorCode
+from app.qdrant_client import get_qdrant_client, QdrantClientWrapper
+from app.session_stats import get_session_stats
+from app.utils.admin_auth import require_admin_key
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin_key)])
+
+SortField = Literal["vector_count", "message_count", "token_count", "estimated_memory_bytes"]
+
+
+@router.get(
+    "/stats",
+    response_model=StorageStatsResponse,
+    summary="Storage statistics",
+    description=(
+        "Fleet-wide totals and the largest sessions, served from aggregates that are updated on write and "
+        "re-sampled every SESSION_STATS_INTERVAL_SECONDS."
+    ),
+)
+def get_storage_stats(
+    sort_by: SortField = Query("vector_count", description="Field to rank sessions by"),
+    limit: int = Query(50, ge=0, le=1000, description="Number of sessions to return")
+):
+    stats = get_session_stats()
+    return StorageStatsResponse(totals=stats.totals(), sessions=stats.top(sort_by, limit))
+
+
+@router.get("/stats/sessions/{session_id}", response_model=SessionStorageStats, summary="Session storage statistics")
+def get_session_storage_stats(session_id: int = Path(..., description="Session ID")):
+    session_stats = get_session_stats().get(session_id)
+    if session_stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorResponse(
+                error=ErrorCode.SESSION_NOT_FOUND,
+                message=f"Session with ID {session_id} not found"
+            ).dict()
+        )
+    return session_stats
+
+
+@router.post(
+    "/stats/refresh",
+    response_model=StorageStatsResponse,
+    summary="Re-sample storage statistics",
+    description="Recompute all session statistics now instead of waiting for the next background sample.",
+)
+async def refresh_storage_stats(
+    limit: int = Query(50, ge=0, le=1000, description="Number of sessions to return"),
+    db: Session = Depends(get_db),
+    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
+):
+    stats = get_session_stats()
+    try:
+        await run_in_threadpool(stats.sample, db, qdrant_client)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ErrorResponse(
+                error=ErrorCode.QDRANT_ERROR,
+                message="Failed to sample storage statistics",
+                details={"error": str(e)}
+            ).dict()
+        )
+    return StorageStatsResponse(totals=stats.totals(), sessions=stats.top("vector_count", limit))
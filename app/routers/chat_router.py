@@ -1,10 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 from app.database import get_db
 from app.models import (
-    SessionModel,
     MessageModel,
     ChatRequest,
     ChatResponse,
@@ -13,13 +12,66 @@ from app.models import (
 )
 from app.qdrant_client import get_qdrant_client, QdrantClientWrapper
 from app.openai_client import get_openai_client
+from app.openai_governor import get_openai_governor
+from app.recent_history import get_recent_history, history_messages
+from app.session_cache import SessionCache, get_session_cache
+from app.chat_pipeline import retrieve_context
 from app.config import settings
+from app.utils.circuit_breaker import get_circuit_breaker
+from app.utils.deadline import Deadline, DeadlineExceeded
+from app.utils.lazy_import import lazy_import
+from app.utils.metrics import metrics
+
+openai = lazy_import("openai")
 
 router = APIRouter(
-    prefix=f"{settings.API_PREFIX}/chat",
+    prefix="/chat",
     tags=["Chat"]
 )
 
+
+def _request_deadline(request: ChatRequest) -> Deadline:
+    if request.deadline_ms is not None:
+        return Deadline(request.deadline_ms / 1000)
+    return Deadline(settings.CHAT_DEADLINE_SECONDS)
+
+
+def _complete(openai_client, messages: List[Dict[str, str]], deadline: Deadline) -> Any:
+    """남은 예산 안에서 LLM 을 호출합니다. 시간이 다 되면 504, breaker 가 열려 있으면 503."""
+    breaker = get_circuit_breaker("openai_chat")
+    if not breaker.allow():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=ErrorResponse(
+                error=ErrorCode.UPSTREAM_UNAVAILABLE,
+                message="The language model is temporarily unavailable"
+            ).dict()
+        )
+    try:
+        response = get_openai_governor().create_chat_completion(
+            openai_client,
+            model=settings.OPENAI_CHAT_MODEL,
+            messages=messages,
+            deadline=deadline
+        )
+    except (DeadlineExceeded, openai.APITimeoutError) as e:
+        breaker.record_failure()
+        metrics.inc("chat_deadline_exceeded_total")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=ErrorResponse(
+                error=ErrorCode.UPSTREAM_TIMEOUT,
+                message="The chat request did not complete within its deadline",
+                details={"deadline_seconds": deadline.budget_seconds, "error": str(e)}
+            ).dict()
+        )
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return response
+
+
 @router.post(
     "",
     response_model=ChatResponse,
@@ -27,18 +79,24 @@ router = APIRouter(
     summary="Chat with LLM",
     description="Send a prompt to the LLM and store the assistant response in the session.",
 )
-async def chat(
+def chat(
     request: ChatRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client),
-    openai_client = Depends(get_openai_client)
+    openai_client = Depends(get_openai_client),
+    session_cache: SessionCache = Depends(get_session_cache)
 ):
-    """채팅 요청을 처리하고 응답을 생성합니다."""
+    """채팅 요청을 처리하고 응답을 생성합니다.
+
+    검색 단계 대기와 LLM 호출이 블로킹이므로 이벤트 루프가 아닌 스레드 풀에서 실행되도록 def 로 둡니다.
+    요청의 지연 예산 안에서 임베딩/저장/검색을 실행하고, 예산을 넘기거나 의존 서비스가 불안정하면
+    검색 컨텍스트 없이 응답합니다 (degraded). 이때 벡터 저장은 응답 후로 미뤄집니다.
+    """
+    deadline = _request_deadline(request)
     try:
-        # 세션 존재 여부 확인
-        session = db.query(SessionModel).filter(SessionModel.id == request.session_id).first()
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
+        # 세션 존재 여부 확인 (다른 워커가 삭제했을 수 있으므로 캐시 대신 트랜잭션 안에서 확인)
+        session = session_cache.require_for_write(db, request.session_id)
 
         # 사용자 메시지 저장
         user_message = MessageModel(
@@ -50,35 +108,28 @@ async def chat(
         db.commit()
         db.refresh(user_message)
 
-        # 임베딩 생성 및 저장
-        embedding = qdrant_client.get_embedding(request.prompt)
-        qdrant_client.store_embedding(
-            message_id=user_message.id,
-            session_id=request.session_id,
-            content=request.prompt,
-            embedding=embedding
-        )
-
-        # 유사한 메시지 검색
-        similar_messages = qdrant_client.search_similar(
-            query=request.prompt,
-            session_id=request.session_id,
-            limit=5
+        # 임베딩 생성/저장과 유사 메시지 검색 (예산을 넘기는 단계는 건너뜀)
+        similar_messages, skipped_stages = retrieve_context(
+            qdrant_client, user_message, deadline, background_tasks, user_id=session["user_id"]
         )
+        if skipped_stages:
+            metrics.inc("chat_degraded_total")
 
         # 컨텍스트 구성
-        context = "\n".join([msg["content"] for msg in similar_messages])
+        context = "\n".join([msg["payload"]["content"] for msg in similar_messages if "content" in msg["payload"]])
 
-        # OpenAI API 호출
-        response = openai_client.chat.completions.create(
-            model=settings.OPENAI_CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": f"Context: {context}\n\nUser: {request.prompt}"}
-            ]
-        )
+        # 최근 대화 (방금 저장한 사용자 메시지는 아래에서 따로 보냄)
+        history = get_recent_history().get(db, request.session_id, exclude_ids=[user_message.id])
 
-        # 응답 메시지 저장
+        # OpenAI API 호출
+        response = _complete(openai_client, [
+            {"role": "system", "content": "You are a helpful assistant."},
+            *history_messages(history),
+            {"role": "user", "content": f"Context: {context}\n\nUser: {request.prompt}"}
+        ], deadline)
+
+        # 응답 메시지 저장 (LLM 호출 중 세션이 삭제되었을 수 있으므로 다시 확인)
+        session_cache.require_for_write(db, request.session_id)
         assistant_message = MessageModel(
             session_id=request.session_id,
             content=response.choices[0].message.content,
@@ -90,26 +141,29 @@ async def chat(
 
         return ChatResponse(
             message=assistant_message.content,
-            similar_messages=[msg["content"] for msg in similar_messages]
+            degraded=bool(skipped_stages),
+            skipped_stages=skipped_stages
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Chat 엔드포인트 에러: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/message", response_model=ChatResponse)
-async def chat(
+def chat_message(
     request: ChatRequest,
     db: Session = Depends(get_db),
     qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client),
-    openai_client = Depends(get_openai_client)
+    openai_client = Depends(get_openai_client),
+    session_cache: SessionCache = Depends(get_session_cache)
 ):
     """채팅 요청을 처리하고 응답을 생성합니다."""
+    deadline = _request_deadline(request)
     try:
-        # 세션 존재 여부 확인
-        session = db.query(SessionModel).filter(SessionModel.id == request.session_id).first()
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
+        # 세션 존재 여부 확인 (다른 워커가 삭제했을 수 있으므로 캐시 대신 트랜잭션 안에서 확인)
+        session_cache.require_for_write(db, request.session_id)
 
         # 사용자 메시지 저장
         user_message = MessageModel(
@@ -121,16 +175,18 @@ async def chat(
         db.commit()
         db.refresh(user_message)
 
-        # OpenAI API 호출
-        response = openai_client.chat.completions.create(
-            model=settings.OPENAI_CHAT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": request.prompt}
-            ]
-        )
+        # 최근 대화 (방금 저장한 사용자 메시지는 아래에서 따로 보냄)
+        history = get_recent_history().get(db, request.session_id, exclude_ids=[user_message.id])
 
-        # 응답 메시지 저장
+        # OpenAI API 호출
+        response = _complete(openai_client, [
+            {"role": "system", "content": "You are a helpful assistant."},
+            *history_messages(history),
+            {"role": "user", "content": request.prompt}
+        ], deadline)
+
+        # 응답 메시지 저장 (LLM 호출 중 세션이 삭제되었을 수 있으므로 다시 확인)
+        session_cache.require_for_write(db, request.session_id)
         assistant_message = MessageModel(
             session_id=request.session_id,
             content=response.choices[0].message.content,
@@ -140,11 +196,10 @@ async def chat(
         db.commit()
         db.refresh(assistant_message)
 
-        return ChatResponse(
-            message=assistant_message.content,
-            similar_messages=[]
-        )
+        return ChatResponse(message=assistant_message.content)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Chat 엔드포인트 에러: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,208 @@
+import os
+import shutil
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_db
+from app.file_ingest import (
+    DOCUMENT_ID_PATTERN,
+    IngestJob,
+    delete_document_points,
+    detect_kind,
+    document_dir,
+    forget_job,
+    get_job_status,
+    kind_available,
+    new_document_id,
+    original_path,
+    register_job,
+    search_documents,
+    submit_ingest,
+)
+from app.models import (
+    FileIngestStatus,
+    FileSearchRequest,
+    FileSearchResult,
+    FileSearchResponse,
+    ErrorResponse,
+    ErrorCode,
+)
+from app.qdrant_client import get_qdrant_client, QdrantClientWrapper
+from app.session_cache import SessionCache, get_session_cache
+
+router = APIRouter(prefix="/files", tags=["Files"])
+
+
+def _not_found(document_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=ErrorResponse(
+            error=ErrorCode.FILE_NOT_FOUND,
+            message=f"File with ID {document_id} not found"
+        ).dict()
+    )
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=ErrorResponse(
+            error=ErrorCode.FILE_TOO_LARGE,
+            message=f"File exceeds the {settings.FILE_MAX_UPLOAD_BYTES} byte upload limit"
+        ).dict()
+    )
+
+
+async def _save_upload(request: Request, path: str) -> int:
+    """요청 본문을 메모리에 모으지 않고 받는 대로 파일에 씁니다. 쓴 바이트 수를 반환합니다."""
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.FILE_MAX_UPLOAD_BYTES:
+        raise _too_large()
+    size = 0
+    with open(path, "wb") as f:
+        async for block in request.stream():
+            size += len(block)
+            if size > settings.FILE_MAX_UPLOAD_BYTES:
+                raise _too_large()
+            if block:
+                await run_in_threadpool(f.write, block)
+    return size
+
+
+@router.post(
+    "",
+    response_model=FileIngestStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Upload file",
+    description=(
+        "Body is the raw file content (text/plain, text/markdown or application/pdf). The upload is streamed to "
+        "disk, then extracted, chunked, embedded and stored in the background (at most FILE_INGEST_MAX_CONCURRENT "
+        "files at a time; others stay queued); poll GET /files/{document_id} for progress."
+    ),
+)
+async def upload_file(
+    request: Request,
+    filename: str = Query(..., description="Original file name; its extension is used when Content-Type is generic"),
+    session_id: Optional[int] = Query(None, description="Session to attach the document to"),
+    user_id: Optional[str] = Query(None, description="Owner of the document"),
+    db: Session = Depends(get_db),
+    session_cache: SessionCache = Depends(get_session_cache),
+    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
+):
+    kind = detect_kind(filename, request.headers.get("content-type"))
+    if kind is None or not kind_available(kind):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=ErrorResponse(
+                error=ErrorCode.UNSUPPORTED_FILE_TYPE,
+                message=(
+                    "Supported file types are plain text, Markdown and PDF" if kind is None
+                    else f"{kind} uploads are not enabled on this server (missing extraction dependency)"
+                )
+            ).dict()
+        )
+    if session_id is not None:
+        # 삭제된 세션에 문서를 붙이지 않도록 캐시 대신 DB 에서 확인
+        session_cache.require_for_write(db, session_id)
+
+    document_id = new_document_id()
+    os.makedirs(document_dir(document_id), exist_ok=True)
+    try:
+        size = await _save_upload(request, original_path(document_id))
+    except HTTPException:
+        shutil.rmtree(document_dir(document_id), ignore_errors=True)
+        raise
+    except Exception as e:
+        shutil.rmtree(document_dir(document_id), ignore_errors=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ErrorResponse(
+                error=ErrorCode.FILE_UPLOAD_FAILED,
+                message="Failed to store uploaded file",
+                details={"error": str(e)}
+            ).dict()
+        )
+
+    job = IngestJob(
+        document_id=document_id,
+        filename=os.path.basename(filename),
+        kind=kind,
+        size_bytes=size,
+        session_id=session_id,
+        user_id=user_id
+    )
+    register_job(job)
+    job.save()
+    # 대기열의 작업이 바로 시작될 수 있으므로 응답은 제출 전 상태(queued)로
+    accepted = job.snapshot()
+    submit_ingest(qdrant_client, job, original_path(document_id))
+    return accepted
+
+
+@router.get("/{document_id}", response_model=FileIngestStatus, summary="File indexing progress")
+async def get_file_status(document_id: str = Path(..., pattern=DOCUMENT_ID_PATTERN)):
+    job_status = get_job_status(document_id)
+    if job_status is None:
+        raise _not_found(document_id)
+    return job_status
+
+
+@router.post("/search", response_model=FileSearchResponse, summary="Search uploaded files")
+def search_files(
+    request: FileSearchRequest,
+    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
+):
+    try:
+        hits = search_documents(
+            qdrant_client,
+            request.query,
+            limit=request.limit,
+            document_id=request.document_id,
+            session_id=request.session_id,
+            user_id=request.user_id
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ErrorResponse(
+                error=ErrorCode.SEARCH_FAILED,
+                message="Failed to search files",
+                details={"error": str(e)}
+            ).dict()
+        )
+    return FileSearchResponse(results=[
+        FileSearchResult(
+            document_id=hit["payload"]["document_id"],
+            chunk_id=hit["payload"]["chunk_id"],
+            text=hit["payload"]["text"],
+            score=hit["score"],
+            source=hit["payload"].get("source"),
+            page=(hit["payload"].get("metadata") or {}).get("page")
+        )
+        for hit in hits
+    ])
+
+
+@router.delete("/{document_id}", summary="Delete file")
+def delete_file(
+    document_id: str = Path(..., pattern=DOCUMENT_ID_PATTERN),
+    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
+):
+    job_status = get_job_status(document_id)
+    if job_status is None:
+        raise _not_found(document_id)
+    if job_status["state"] in ("queued", "processing"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ErrorResponse(
+                error=ErrorCode.VALIDATION_ERROR,
+                message=f"File {document_id} is still being indexed"
+            ).dict()
+        )
+    delete_document_points(qdrant_client, document_id)
+    forget_job(document_id)
+    shutil.rmtree(document_dir(document_id), ignore_errors=True)
+    return {"status": "deleted", "document_id": document_id}
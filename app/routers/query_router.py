@@ -9,16 +9,19 @@ from app.models import (
     SemanticSearchRequest,
     SemanticSearchResult,
     SemanticSearchResponse,
+    GlobalSearchRequest,
+    GlobalSearchSessionResult,
+    GlobalSearchResponse,
     ErrorResponse,
     ErrorCode
 )
 from app.database import get_db
-from app.qdrant_client import get_qdrant_client, QdrantClientWrapper
-from app.openai_client import get_openai_client
+from app.qdrant_client import get_qdrant_client, QdrantClientWrapper, build_payload_filter
+from app.session_cache import SessionCache, get_session_cache
 from app.config import settings
 
 router = APIRouter(
-    prefix=f"{settings.API_PREFIX}/query",
+    prefix="/query",
     tags=["Query"]
 )
 
@@ -29,13 +32,17 @@ router = APIRouter(
     summary="Semantic search",
     description="Search messages semantically within a session.",
 )
-async def semantic_search(
+def semantic_search(
     request: SemanticSearchRequest,
     db: Session = Depends(get_db),
     qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client),
-    openai_client = Depends(get_openai_client)
+    session_cache: SessionCache = Depends(get_session_cache)
 ):
-    """세션 내에서 의미 기반 검색을 수행합니다."""
+    """세션 내에서 의미 기반 검색을 수행합니다.
+
+    쿼리 임베딩은 search_similar 내부에서 생성되며, 캐시 적중 시에는 생략됩니다. 임베딩 호출은
+    governor 의 스로틀/재시도 대기를 포함하므로 스레드 풀에서 실행되도록 def 로 둡니다.
+    """
     try:
         # 디버그 로깅 추가
         print(f"[DEBUG] 요청 데이터:")
@@ -45,42 +52,29 @@ async def semantic_search(
         print(f"- request type: {type(request)}")
         print(f"- request dict: {request.dict()}")
 
-        # 세션 존재 여부 확인
-        session = db.query(SessionModel).filter(SessionModel.id == request.session_id).first()
-        if not session:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=ErrorResponse(
-                    error=ErrorCode.SESSION_NOT_FOUND,
-                    message=f"Session with ID {request.session_id} not found"
-                ).dict()
-            )
+        # 필터 조건은 Qdrant 서버 측 query_filter로 전달
+        query_filter = build_payload_filter(
+            role=request.role,
+            memory_type=request.memory_type,
+            user_id=request.user_id,
+            created_after=request.created_after,
+            created_before=request.created_before
+        )
 
-        # 쿼리 임베딩 생성
-        try:
-            print(f"임베딩 모델: {settings.OPENAI_EMBEDDING_MODEL}")
-            response = openai_client.embeddings.create(
-                input=request.query,
-                model=settings.OPENAI_EMBEDDING_MODEL
-            )
-            query_embedding = response.data[0].embedding
-        except Exception as e:
-            print(f"임베딩 생성 에러: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=ErrorResponse(
-                    error=ErrorCode.EMBEDDING_ERROR,
-                    message="Failed to generate embedding for query",
-                    details={"error": str(e)}
-                ).dict()
-            )
+        # 세션 존재 여부 확인
+        session_cache.require(db, request.session_id)
 
         # Qdrant에서 검색
         try:
             search_results = qdrant_client.search_similar(
                 query=request.query,
                 session_id=request.session_id,
-                limit=request.limit
+                limit=request.limit,
+                query_filter=query_filter,
+                mode=request.mode,
+                score_threshold=request.similarity_threshold,
+                adaptive_k=request.adaptive_k,
+                min_k=request.min_k
             )
             print(f"검색 결과: {search_results}")
         except Exception as e:
@@ -105,6 +99,9 @@ async def semantic_search(
                     "session_id": request.session_id,
                     "query": request.query,
                     "limit": request.limit,
+                    "mode": request.mode,
+                    "similarity_threshold": request.similarity_threshold,
+                    "adaptive_k": request.adaptive_k,
                     "min_score": None,
                     "max_score": None
                 }
@@ -137,7 +134,10 @@ async def semantic_search(
         total_results = qdrant_client.search_similar(
             query=request.query,
             session_id=request.session_id,
-            limit=None
+            limit=None,
+            query_filter=query_filter,
+            mode=request.mode,
+            score_threshold=request.similarity_threshold
         )
         total_count = len(total_results)
 
@@ -150,6 +150,9 @@ async def semantic_search(
                 "session_id": request.session_id,
                 "query": request.query,
                 "limit": request.limit,
+                "mode": request.mode,
+                "similarity_threshold": request.similarity_threshold,
+                "adaptive_k": request.adaptive_k,
                 "min_score": min_score,
                 "max_score": max_score
             }
@@ -168,24 +171,113 @@ async def semantic_search(
             ).dict()
         )
 
-@router.post("/query", response_model=QueryResponse)
-def query(
-    request: QueryRequest,
+@router.post(
+    "/global_search",
+    response_model=GlobalSearchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Global search",
+    description="Search messages across all sessions of a user, grouped by session.",
+)
+def global_search(
+    request: GlobalSearchRequest,
     db: Session = Depends(get_db),
     qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
 ):
-    """세션 내에서 유사한 메시지를 검색합니다."""
+    """사용자의 모든 세션을 병렬로 검색하고 세션별로 묶어 반환합니다."""
     try:
-        # 세션 존재 확인
-        session = db.query(SessionModel).filter(SessionModel.id == request.session_id).first()
-        if not session:
+        # user_id 는 필수이므로 다른 사용자의 세션은 검색하지 않음
+        sessions_query = db.query(SessionModel.id, SessionModel.name).filter(SessionModel.user_id == request.user_id)
+        # 최근 세션부터 검색해 상위 결과 기준 점수를 빨리 확보
+        sessions = sessions_query.order_by(SessionModel.updated_at.desc()).all()
+        session_names = {session_id: name for session_id, name in sessions}
+
+        query_filter = build_payload_filter(
+            role=request.role,
+            created_after=request.created_after,
+            created_before=request.created_before
+        )
+        candidate_sessions = (
+            request.candidate_sessions
+            if request.candidate_sessions is not None
+            else settings.GLOBAL_SEARCH_CANDIDATE_SESSIONS
+        )
+        try:
+            hits = qdrant_client.search_sessions(
+                query=request.query,
+                session_ids=list(session_names),
+                limit=request.limit,
+                query_filter=query_filter,
+                candidate_sessions=candidate_sessions
+            )
+        except Exception as e:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=ErrorResponse(
-                    error=ErrorCode.SESSION_NOT_FOUND,
-                    message=f"Session with ID {request.session_id} not found"
+                    error=ErrorCode.QDRANT_ERROR,
+                    message="Failed to perform global search",
+                    details={"error": str(e)}
                 ).dict()
             )
+
+        # 결과는 점수 순이므로 세션이 처음 등장한 순서가 세션의 최고 점수 순서
+        groups = {}
+        for hit in hits:
+            payload = hit.get("payload") or {}
+            session_id = int(payload.get("session_id"))
+            group = groups.get(session_id)
+            if group is None:
+                group = groups[session_id] = GlobalSearchSessionResult(
+                    session_id=session_id,
+                    session_name=session_names.get(session_id, ""),
+                    max_score=float(hit["score"]),
+                    results=[]
+                )
+            group.results.append(SemanticSearchResult(
+                id=str(hit["id"]),
+                score=float(hit["score"]),
+                payload={
+                    "content": str(payload.get("content", "")),
+                    "role": str(payload.get("role", "unknown"))
+                }
+            ))
+
+        return GlobalSearchResponse(
+            sessions=list(groups.values()),
+            total=len(hits),
+            status="success",
+            message="Search completed successfully" if hits else "No matching results found",
+            metadata={
+                "user_id": request.user_id,
+                "query": request.query,
+                "limit": request.limit,
+                "sessions_searched": (
+                    min(candidate_sessions, len(session_names)) if candidate_sessions else len(session_names)
+                )
+            }
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ErrorResponse(
+                error=ErrorCode.INTERNAL_SERVER_ERROR,
+                message="An unexpected error occurred",
+                details={"error": str(e)}
+            ).dict()
+        )
+
+@router.post("/query", response_model=QueryResponse)
+def query(
+    request: QueryRequest,
+    db: Session = Depends(get_db),
+    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client),
+    session_cache: SessionCache = Depends(get_session_cache)
+):
+    """세션 내에서 유사한 메시지를 검색합니다."""
+    try:
+        # 세션 존재 확인
+        session_cache.require(db, request.session_id)
         
         # 유사한 메시지 검색
         try:
@@ -205,8 +297,15 @@ def query(
             )
         
         return QueryResponse(
-            messages=[msg["content"] for msg in similar_messages],
-            scores=[msg["score"] for msg in similar_messages]
+            results=similar_messages,
+            total=len(similar_messages),
+            status="success",
+            message="Search completed successfully",
+            metadata={
+                "session_id": request.session_id,
+                "query": request.query,
+                "limit": request.limit
+            }
         )
     except HTTPException:
         raise
@@ -1,5 +1,8 @@
+import logging
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Body, Path, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import (
@@ -7,6 +10,9 @@ from app.models import (
     SessionCreate,
     SessionUpdate,
     SessionResponse,
+    SessionTokenUsage,
+    SessionFork,
+    SessionForkResponse,
     MessageModel,
     MessageCreate,
     MessageUpdate,
@@ -15,14 +21,20 @@ from app.models import (
     ErrorResponse,
     ErrorCode
 )
-from app.qdrant_client import get_qdrant_client, QdrantClientWrapper
-from app.config import settings
+from app.qdrant_client import get_qdrant_client, QdrantClientWrapper, mean_vector, search_chat_context
 from datetime import datetime
 from app.openai_client import get_openai_client
-import openai
+from app.openai_governor import get_openai_governor
+from app.recent_history import get_recent_history, history_messages
+from app.session_cache import SessionCache, get_session_cache
+from app.session_fork import copy_messages, forked_id_pairs, last_message_id
+from app.session_stats import get_session_stats
+from app.utils.serialization import MESSAGE_FIELDS, message_columns, project_rows
+
+logger = logging.getLogger("session_router")
 
 router = APIRouter(
-    prefix=f"{settings.API_PREFIX}/sessions",
+    prefix="/sessions",
     tags=["Sessions"]
 )
 
@@ -45,6 +57,7 @@ async def create_session(session: SessionCreate, db: Session = Depends(get_db)):
     try:
         db_session = SessionModel(
             name=session.name,
+            user_id=session.user_id,
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
@@ -64,17 +77,12 @@ async def create_session(session: SessionCreate, db: Session = Depends(get_db)):
         )
 
 @router.get("/{session_id}", response_model=SessionModel)
-async def get_session(session_id: int, db: Session = Depends(get_db)):
-    session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=ErrorResponse(
-                error=ErrorCode.SESSION_NOT_FOUND,
-                message=f"Session with ID {session_id} not found"
-            ).dict()
-        )
-    return session
+async def get_session(
+    session_id: int,
+    db: Session = Depends(get_db),
+    session_cache: SessionCache = Depends(get_session_cache)
+):
+    return session_cache.require(db, session_id)
 
 @router.delete("/{session_id}")
 async def delete_session(
@@ -83,8 +91,8 @@ async def delete_session(
     qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
 ):
     try:
-        # 세션 존재 확인
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        # 세션 존재 확인 (메시지를 넣는 중인 트랜잭션이 끝날 때까지 기다리도록 행 잠금)
+        session = db.query(SessionModel).filter(SessionModel.id == session_id).with_for_update().first()
         if not session:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -97,12 +105,14 @@ async def delete_session(
         # 관련된 모든 메시지 삭제
         db.query(MessageModel).filter(MessageModel.session_id == session_id).delete()
         
-        # Qdrant 임베딩 삭제
+        # Qdrant 임베딩 및 키워드 인덱스 삭제 (일괄 삭제는 ORM 이벤트가 발생하지 않음)
         qdrant_client.delete_session_embeddings(session_id)
+        qdrant_client.lexical_index.delete_session(session_id)
         
         # 세션 삭제
         db.delete(session)
         db.commit()
+        get_recent_history().invalidate(session_id)
         
         return {"message": "Session and all related data deleted successfully"}
     except HTTPException:
@@ -118,6 +128,103 @@ async def delete_session(
             ).dict()
         )
 
+@router.post(
+    "/{session_id}/fork",
+    response_model=SessionForkResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Fork session",
+    description="Copy a session's messages and embeddings into a new session without re-embedding them.",
+)
+def fork_session_endpoint(
+    session_id: int = Path(..., description="Source session ID"),
+    fork: Optional[SessionFork] = Body(None, description="Fork options"),
+    db: Session = Depends(get_db),
+    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
+):
+    fork = fork or SessionFork()
+    source = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    if not source:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ErrorResponse(
+                error=ErrorCode.SESSION_NOT_FOUND,
+                message=f"Session with ID {session_id} not found"
+            ).dict()
+        )
+
+    up_to_id = fork.up_to_message_id
+    if up_to_id is not None:
+        exists = (
+            db.query(MessageModel.id)
+            .filter(MessageModel.id == up_to_id, MessageModel.session_id == session_id)
+            .first()
+        )
+        if not exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=ErrorResponse(
+                    error=ErrorCode.MESSAGE_NOT_FOUND,
+                    message=f"Message with ID {up_to_id} not found in session {session_id}"
+                ).dict()
+            )
+    else:
+        # fork 도중 원본에 추가되는 메시지는 복사하지 않음
+        up_to_id = last_message_id(db, session_id) or 0
+
+    new_session_id = None
+    try:
+        now = datetime.utcnow()
+        new_session = SessionModel(
+            name=fork.name or f"{source.name} (fork)",
+            user_id=source.user_id,
+            created_at=now,
+            updated_at=now
+        )
+        db.add(new_session)
+        db.flush()
+        new_session_id = new_session.id
+
+        message_count = copy_messages(db, session_id, new_session_id, up_to_id)
+        # 벡터 복사가 실패하면 메시지 복사도 함께 롤백되도록 commit 전에 복사
+        vector_count = qdrant_client.copy_session_embeddings(
+            session_id, new_session_id, forked_id_pairs(db, session_id, new_session_id, up_to_id)
+        )
+        db.commit()
+        db.refresh(new_session)
+    except Exception as e:
+        db.rollback()
+        if new_session_id is not None:
+            qdrant_client.delete_session_embeddings(new_session_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ErrorResponse(
+                error=ErrorCode.SESSION_FORK_FAILED,
+                message="Failed to fork session",
+                details={"error": str(e)}
+            ).dict()
+        )
+
+    # 일괄 INSERT 는 ORM 이벤트를 거치지 않으므로 키워드 인덱스와 세션 통계는 직접 반영
+    try:
+        qdrant_client.lexical_index.index_session(db, new_session_id)
+    except Exception as e:
+        logger.error(f"Error indexing forked session {new_session_id}: {e}")
+    try:
+        get_session_stats().refresh_session(db, qdrant_client, new_session_id)
+    except Exception as e:
+        logger.warning(f"Error refreshing stats for forked session {new_session_id}: {e}")
+
+    return SessionForkResponse(
+        id=new_session.id,
+        name=new_session.name,
+        user_id=new_session.user_id,
+        created_at=new_session.created_at,
+        updated_at=new_session.updated_at,
+        forked_from=session_id,
+        message_count=message_count,
+        vector_count=vector_count
+    )
+
 @router.post(
     "/{session_id}/messages",
     response_model=MessagePairResponse,
@@ -130,12 +237,12 @@ def create_message_endpoint(
     session_id: int = Path(..., description="Session ID"),
     message: MessageCreate = Body(..., description="Message payload"),
     qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client),
-    openai_client: openai.OpenAI = Depends(get_openai_client)
+    openai_client = Depends(get_openai_client),
+    session_cache: SessionCache = Depends(get_session_cache)
 ):
     """Create a message and store its embedding. Also generate LLM response."""
-    session_obj = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-    if not session_obj:
-        raise HTTPException(status_code=404, detail="Session not found")
+    # 다른 워커가 세션을 삭제했을 수 있으므로 캐시 대신 트랜잭션 안에서 확인
+    session = session_cache.require_for_write(db, session_id)
     
     try:
         # 사용자 메시지 생성
@@ -152,23 +259,28 @@ def create_message_endpoint(
             try:
                 # 임베딩 생성 및 저장
                 print(f"[DEBUG] 임베딩 생성 시작")
-                embedding = qdrant_client.get_embedding(message.content)
+                chunks = qdrant_client.chunk_text(message.content)
+                embeddings = qdrant_client.embed_message(message.content, chunks=chunks)
                 qdrant_client._ensure_collection(session_id)
                 qdrant_client.store_embedding(
                     message_id=new_message.id,
                     session_id=session_id,
                     content=message.content,
-                    embedding=embedding
+                    embeddings=embeddings,
+                    chunks=chunks,
+                    role=new_message.role,
+                    user_id=session["user_id"],
+                    created_at=new_message.created_at,
+                    token_count=new_message.token_count
                 )
                 print(f"[DEBUG] 임베딩 저장 완료")
                 
                 # 유사한 메시지 검색
                 print(f"[DEBUG] 유사 메시지 검색 시작")
                 try:
-                    similar_messages = qdrant_client.search_similar(
-                        query=message.content,
-                        session_id=session_id,
-                        limit=5
+                    similar_messages = search_chat_context(
+                        qdrant_client, message.content, session_id,
+                        query_vector=mean_vector(embeddings), exclude_message_id=new_message.id
                     )
                     print(f"[DEBUG] 검색된 메시지 수: {len(similar_messages)}")
                     print(f"[DEBUG] 검색 결과 상세: {similar_messages}")
@@ -190,10 +302,13 @@ def create_message_endpoint(
                     print(f"- 컨텍스트: {context}")
                     print(f"- 사용자 메시지: {message.content}")
                     
-                    response = openai_client.chat.completions.create(
+                    history = get_recent_history().get(db, session_id, exclude_ids=[new_message.id])
+                    response = get_openai_governor().create_chat_completion(
+                        openai_client,
                         model="gpt-3.5-turbo",
                         messages=[
                             {"role": "system", "content": "You are a helpful assistant."},
+                            *history_messages(history),
                             {"role": "user", "content": f"Context: {context}\n\nUser: {message.content}"}
                         ]
                     )
@@ -211,6 +326,7 @@ def create_message_endpoint(
                 
                 # 응답 메시지 저장
                 print(f"[DEBUG] 응답 메시지 저장 시작")
+                session_cache.require_for_write(db, session_id)
                 assistant_message = MessageModel(
                     session_id=session_id,
                     content=response.choices[0].message.content,
@@ -227,6 +343,8 @@ def create_message_endpoint(
                     "user_message": new_message
                 }
                 
+            except HTTPException:
+                raise
             except Exception as e:
                 print(f"[ERROR] LLM 응답 생성 중 에러 발생: {str(e)}")
                 raise HTTPException(
@@ -235,6 +353,8 @@ def create_message_endpoint(
                 )
         
         return new_message
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
@@ -248,20 +368,17 @@ def create_message_endpoint(
 def get_messages_endpoint(
     db: Session = Depends(get_db),
     session_id: int = Path(..., description="Session ID"),
+    session_cache: SessionCache = Depends(get_session_cache)
 ):
     try:
-        session_obj = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-        if not session_obj:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=ErrorResponse(
-                    error=ErrorCode.SESSION_NOT_FOUND,
-                    message=f"Session with ID {session_id} not found"
-                ).dict()
-            )
+        session_cache.require(db, session_id)
         
-        messages = db.query(MessageModel).filter(MessageModel.session_id == session_id).all()
-        return messages
+        # 대화가 긴 세션은 직렬화 비용이 크므로 컬럼만 조회해 바로 JSON 으로 응답
+        messages = project_rows(
+            db.query(*message_columns(MessageModel)).filter(MessageModel.session_id == session_id),
+            MESSAGE_FIELDS
+        )
+        return ORJSONResponse(messages)
     except HTTPException:
         raise
     except Exception as e:
@@ -274,6 +391,32 @@ def get_messages_endpoint(
             ).dict()
         )
 
+@router.get(
+    "/{session_id}/tokens",
+    response_model=SessionTokenUsage,
+    summary="Session token usage",
+    description="Sum of the token counts stored with the session's messages.",
+)
+def get_session_tokens(
+    db: Session = Depends(get_db),
+    session_id: int = Path(..., description="Session ID"),
+    session_cache: SessionCache = Depends(get_session_cache)
+):
+    session_cache.require(db, session_id)
+
+    # (session_id, token_count) 인덱스만 읽는 집계 한 번으로 계산
+    token_count, message_count, counted = db.query(
+        func.coalesce(func.sum(MessageModel.token_count), 0),
+        func.count(),
+        func.count(MessageModel.token_count)
+    ).filter(MessageModel.session_id == session_id).one()
+    return SessionTokenUsage(
+        session_id=session_id,
+        token_count=token_count,
+        message_count=message_count,
+        uncounted_messages=message_count - counted
+    )
+
 @router.delete(
     "/{session_id}/messages/{message_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -301,7 +444,7 @@ def delete_message(
                 ).dict()
             )
 
-        qdrant_client.delete_embedding(message.id)
+        qdrant_client.delete_embedding(message.id, session_id)
         db.delete(message)
         db.commit()
     except HTTPException:
@@ -328,7 +471,8 @@ def update_message(
     message_id: int = Path(..., description="Message ID"),
     message: MessageUpdate = Body(...),
     db: Session = Depends(get_db),
-    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client)
+    qdrant_client: QdrantClientWrapper = Depends(get_qdrant_client),
+    session_cache: SessionCache = Depends(get_session_cache)
 ):
     """Update a message and regenerate its embedding."""
     message_obj = (
@@ -343,18 +487,27 @@ def update_message(
         message_obj.content = message.content
     if message.role is not None:
         message_obj.role = message.role
+    message_obj.updated_at = datetime.utcnow()
 
     db.commit()
     db.refresh(message_obj)
 
     # 임베딩 재생성
     if message.content is not None and message_obj.role == "user":
-        embedding = qdrant_client.get_embedding(message.content)
+        chunks = qdrant_client.chunk_text(message.content)
+        embeddings = qdrant_client.embed_message(message.content, chunks=chunks)
         qdrant_client.store_embedding(
             message_id=message_id,
             session_id=session_id,
             content=message.content,
-            embedding=embedding
+            embeddings=embeddings,
+            chunks=chunks,
+            role=message_obj.role,
+            # payload 의 user_id 필터가 세션 소유자의 벡터를 찾을 수 있도록 함께 저장
+            user_id=session_cache.require(db, session_id)["user_id"],
+            created_at=message_obj.created_at,
+            token_count=message_obj.token_count,
+            replace=True
         )
 
     return message_obj
@@ -1,13 +1,119 @@
+import json
 from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError, parse_obj_as
 from datetime import datetime
 
-from app.qdrant_client import get_qdrant_client, insert_vector, search_vectors
-from app.models import VectorPayload
-from app.utils.token_utils import count_tokens
 from app.config import settings
+from app.qdrant_client import (
+    get_qdrant_client,
+    insert_vector,
+    insert_vectors,
+    search_vectors,
+    search_vectors_batch,
+)
+from app.models import (
+    VectorPayload,
+    VectorBatchInsertRequest,
+    VectorBatchInsertResponse,
+    VectorBatchSearchRequest,
+    VectorBatchSearchResponse,
+    ErrorResponse,
+    ErrorCode,
+)
+from app.utils.token_utils import count_tokens, count_tokens_batch
+from app.utils.vector_codec import decode_raw_vectors, vectors_from_request
 
-router = APIRouter(prefix=f"{settings.API_PREFIX}/vectors", tags=["Vector"])
+OCTET_STREAM = "application/octet-stream"
+
+
+def is_reserved_collection(collection_name: str) -> bool:
+    """서버가 관리하는 컬렉션(세션/세션 centroid/재색인 shadow, 문서)인지 확인합니다."""
+    return collection_name.startswith("session_") or collection_name == settings.DOCUMENT_COLLECTION
+
+
+def reject_reserved_collection(collection_name: str) -> None:
+    """/vectors 로 서버 관리 컬렉션에 직접 쓰거나 검색하지 못하게 막습니다."""
+    if is_reserved_collection(collection_name):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=ErrorResponse(
+                error=ErrorCode.FORBIDDEN,
+                message=f"Collection {collection_name} is managed by the server and cannot be used via /vectors"
+            ).dict()
+        )
+
+
+router = APIRouter(prefix="/vectors", tags=["Vector"], dependencies=[Depends(reject_reserved_collection)])
+
+
+def _validation_error(message: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=ErrorResponse(error=ErrorCode.VALIDATION_ERROR, message=message).dict()
+    )
+
+
+def _qdrant_error(message: str, error: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=ErrorResponse(
+            error=ErrorCode.QDRANT_ERROR,
+            message=message,
+            details={"error": str(error)}
+        ).dict()
+    )
+
+
+def _fill_payload_defaults(payload: VectorPayload) -> VectorPayload:
+    if payload.token_count <= 0:
+        payload.token_count = count_tokens(payload.content)
+    if not payload.timestamp:
+        payload.timestamp = datetime.utcnow()
+    return payload
+
+
+async def _read_octet_stream(request: Request) -> bytes:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != OCTET_STREAM:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=ErrorResponse(
+                error=ErrorCode.VALIDATION_ERROR,
+                message=f"Expected Content-Type: {OCTET_STREAM}"
+            ).dict()
+        )
+    return await request.body()
+
+
+def _insert_batch(qdrant_client, collection_name, vectors, payloads, ids, wait) -> VectorBatchInsertResponse:
+    # 토큰 수가 없는 payload 는 한 번에 계산
+    missing = [payload for payload in payloads if payload.token_count <= 0]
+    for payload, token_count in zip(missing, count_tokens_batch([payload.content for payload in missing])):
+        payload.token_count = token_count
+    payloads = [_fill_payload_defaults(payload) for payload in payloads]
+    try:
+        ids = insert_vectors(qdrant_client.client, collection_name, vectors, payloads, ids=ids, wait=wait)
+    except ValueError as e:
+        raise _validation_error(str(e))
+    except Exception as e:
+        raise _qdrant_error("Failed to insert vectors", e)
+    return VectorBatchInsertResponse(
+        ids=ids,
+        inserted=len(ids),
+        status="completed" if wait else "acknowledged"
+    )
+
+
+def _search_batch(qdrant_client, collection_name, vectors, limit, with_payload) -> VectorBatchSearchResponse:
+    try:
+        results = search_vectors_batch(
+            qdrant_client.client, collection_name, vectors, limit=limit, with_payload=with_payload
+        )
+    except Exception as e:
+        raise _qdrant_error("Failed to search vectors", e)
+    return VectorBatchSearchResponse(results=results)
 
 
 @router.post("/{collection_name}")
@@ -17,12 +123,51 @@ def add_vector(
     payload: VectorPayload,
     qdrant_client=Depends(get_qdrant_client),
 ):
-    if payload.token_count <= 0:
-        payload.token_count = count_tokens(payload.content)
-    if not payload.timestamp:
-        payload.timestamp = datetime.utcnow()
-    insert_vector(qdrant_client.client, collection_name, vector, payload)
-    return {"status": "inserted"}
+    vector_id = insert_vector(qdrant_client.client, collection_name, vector, _fill_payload_defaults(payload))
+    return {"status": "inserted", "id": vector_id}
+
+
+@router.post("/{collection_name}/batch", response_model=VectorBatchInsertResponse)
+def add_vectors(
+    collection_name: str,
+    request: VectorBatchInsertRequest,
+    qdrant_client=Depends(get_qdrant_client),
+):
+    """여러 벡터를 한 번에 저장합니다 (JSON float 배열 또는 base64 float32 블록)."""
+    try:
+        vectors = vectors_from_request(request.vectors, request.vectors_base64, request.dim)
+    except ValueError as e:
+        raise _validation_error(str(e))
+    return _insert_batch(qdrant_client, collection_name, vectors, request.payloads, request.ids, request.wait)
+
+
+@router.post(
+    "/{collection_name}/batch/raw",
+    response_model=VectorBatchInsertResponse,
+    summary="Batch insert (binary)",
+    description=(
+        "Body is `application/octet-stream`: the first `payload_bytes` bytes are a UTF-8 JSON array of "
+        "payloads, followed by the vectors as little-endian float32 values, row-major."
+    ),
+)
+async def add_vectors_raw(
+    collection_name: str,
+    request: Request,
+    dim: int,
+    payload_bytes: int,
+    wait: bool = True,
+    qdrant_client=Depends(get_qdrant_client),
+):
+    """바이너리 본문을 복사 없이 NumPy 배열로 해석해 저장합니다."""
+    body = await _read_octet_stream(request)
+    try:
+        if not 0 < payload_bytes <= len(body):
+            raise ValueError("payload_bytes is out of range")
+        payloads = parse_obj_as(List[VectorPayload], json.loads(body[:payload_bytes]))
+        vectors = decode_raw_vectors(body, dim, offset=payload_bytes)
+    except (ValueError, ValidationError) as e:
+        raise _validation_error(str(e))
+    return await run_in_threadpool(_insert_batch, qdrant_client, collection_name, vectors, payloads, None, wait)
 
 
 @router.post("/{collection_name}/search")
@@ -33,3 +178,39 @@ def search_vector(
 ):
     results = search_vectors(qdrant_client.client, collection_name, query_vector)
     return {"results": results}
+
+
+@router.post("/{collection_name}/search/batch", response_model=VectorBatchSearchResponse)
+def search_vectors_in_batch(
+    collection_name: str,
+    request: VectorBatchSearchRequest,
+    qdrant_client=Depends(get_qdrant_client),
+):
+    """여러 쿼리 벡터를 Qdrant 요청 한 번으로 검색합니다."""
+    try:
+        vectors = vectors_from_request(request.vectors, request.vectors_base64, request.dim)
+    except ValueError as e:
+        raise _validation_error(str(e))
+    return _search_batch(qdrant_client, collection_name, vectors, request.limit, request.with_payload)
+
+
+@router.post(
+    "/{collection_name}/search/batch/raw",
+    response_model=VectorBatchSearchResponse,
+    summary="Batch search (binary)",
+    description="Body is `application/octet-stream` query vectors as little-endian float32 values, row-major.",
+)
+async def search_vectors_raw(
+    collection_name: str,
+    request: Request,
+    dim: int,
+    limit: int = 5,
+    with_payload: bool = True,
+    qdrant_client=Depends(get_qdrant_client),
+):
+    body = await _read_octet_stream(request)
+    try:
+        vectors = decode_raw_vectors(body, dim)
+    except ValueError as e:
+        raise _validation_error(str(e))
+    return await run_in_threadpool(_search_batch, qdrant_client, collection_name, vectors, limit, with_payload)
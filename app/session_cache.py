@@ -0,0 +1,141 @@
+"""세션 메타데이터 캐시.
+
+거의 모든 엔드포인트가 처리 전에 세션 존재 여부를 확인하므로, 세션 행을 프로세스 메모리에
+TTL 과 함께 보관해 요청마다 발생하던 조회를 없앱니다. 없는 세션 id 도 짧게 기억합니다
+(negative caching). 세션 생성/수정/삭제는 commit 시 ORM 이벤트로 캐시에 반영됩니다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.models import SessionModel, ErrorResponse, ErrorCode
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.orm_events import CommitQueue
+
+SESSION_FIELDS = ("id", "name", "user_id", "created_at", "updated_at")
+
+
+def _snapshot(session: SessionModel) -> Dict[str, Any]:
+    return {field: getattr(session, field) for field in SESSION_FIELDS}
+
+
+class SessionCache:
+    """세션 id → 메타데이터(dict) 또는 None(없는 세션) TTL/LRU 캐시."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0, negative_ttl_seconds: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, db: Session, session_id: int) -> Optional[Dict[str, Any]]:
+        """세션 메타데이터를 반환합니다. 없는 세션이면 None."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and time.monotonic() < entry[0]:
+                self._entries.move_to_end(session_id)
+                metrics.inc("session_cache_hits_total")
+                return entry[1]
+
+        metrics.inc("session_cache_misses_total")
+        row = (
+            db.query(*(getattr(SessionModel, field) for field in SESSION_FIELDS))
+            .filter(SessionModel.id == session_id)
+            .first()
+        )
+        data = dict(zip(SESSION_FIELDS, row)) if row is not None else None
+        self._set(session_id, data)
+        return data
+
+    def require(self, db: Session, session_id: int) -> Dict[str, Any]:
+        """세션 메타데이터를 반환하고, 없으면 404 HTTPException 을 발생시킵니다."""
+        data = self.get(db, session_id)
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=ErrorResponse(
+                    error=ErrorCode.SESSION_NOT_FOUND,
+                    message=f"Session with ID {session_id} not found"
+                ).dict()
+            )
+        return data
+
+    def require_for_write(self, db: Session, session_id: int) -> Dict[str, Any]:
+        """쓰기 경로용 require. 캐시를 건너뛰고 현재 트랜잭션 안에서 세션 행을 다시 확인합니다.
+
+        다른 워커가 세션을 지웠어도 이 프로세스의 캐시는 TTL 동안 남아 있으므로, 메시지를 넣기 전에는
+        캐시를 믿지 않습니다. 행에 공유 잠금(FOR SHARE, SQLite 에서는 무시)을 걸어 commit 전까지
+        세션 삭제와 겹치지 않게 하고, 읽은 결과로 캐시도 갱신합니다.
+        """
+        row = (
+            db.query(*(getattr(SessionModel, field) for field in SESSION_FIELDS))
+            .filter(SessionModel.id == session_id)
+            .with_for_update(read=True)
+            .first()
+        )
+        data = dict(zip(SESSION_FIELDS, row)) if row is not None else None
+        self._set(session_id, data)
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=ErrorResponse(
+                    error=ErrorCode.SESSION_NOT_FOUND,
+                    message=f"Session with ID {session_id} not found"
+                ).dict()
+            )
+        return data
+
+    def _set(self, session_id: int, data: Optional[Dict[str, Any]]) -> None:
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl_seconds if data is not None else self.negative_ttl_seconds
+        with self._lock:
+            self._entries[session_id] = (time.monotonic() + ttl, data)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, data: Dict[str, Any]) -> None:
+        self._set(data["id"], data)
+
+    def invalidate(self, session_id: int) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+_session_cache: Optional[SessionCache] = None
+
+
+def get_session_cache() -> SessionCache:
+    """프로세스 전역 SessionCache 를 반환합니다 (FastAPI 의존성으로도 사용)."""
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = SessionCache(
+            max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+            negative_ttl_seconds=settings.SESSION_CACHE_NEGATIVE_TTL_SECONDS
+        )
+    return _session_cache
+
+
+# --- ORM 이벤트: commit 된 세션 변경만 캐시에 반영 ---
+
+def _apply_pending(pending) -> None:
+    cache = get_session_cache()
+    for op, data in pending:
+        if op == "put":
+            cache.put(data)
+        else:
+            cache.invalidate(data["id"])
+
+
+_pending = CommitQueue("session_cache", _apply_pending)
+_pending.track(SessionModel, "after_insert", lambda target: ("put", _snapshot(target)))
+_pending.track(SessionModel, "after_update", lambda target: ("invalidate", _snapshot(target)))
+_pending.track(SessionModel, "after_delete", lambda target: ("invalidate", _snapshot(target)))
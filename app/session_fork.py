@@ -0,0 +1,74 @@
+"""세션 fork: 메시지와 임베딩을 새 세션으로 복사합니다 (재임베딩/LLM 호출 없음).
+
+메시지 행은 INSERT ... SELECT 한 번으로 DB 안에서 복사하고, 원본 id 와 새 id 는 두 세션을
+id 순으로 나란히 읽어 짝지은 뒤 Qdrant 포인트 복사(QdrantClientWrapper.copy_session_embeddings)에
+넘깁니다. 두 쪽 모두 페이지 단위로 읽으므로 세션 크기와 관계없이 메모리 사용량이 일정합니다.
+"""
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models import MessageModel
+
+# 새 세션으로 복사하는 컬럼 (id 는 새로 발급, token_count 는 다시 계산하지 않음)
+COPIED_COLUMNS = ("content", "role", "created_at", "updated_at", "token_count")
+
+
+def last_message_id(db: Session, session_id: int) -> Optional[int]:
+    return db.query(func.max(MessageModel.id)).filter(MessageModel.session_id == session_id).scalar()
+
+
+def copy_messages(db: Session, source_session_id: int, target_session_id: int, up_to_id: int) -> int:
+    """id 가 up_to_id 이하인 원본 메시지를 새 세션으로 복사하고 복사한 행 수를 반환합니다.
+
+    bulk INSERT 는 ORM 이벤트를 거치지 않으므로 키워드 인덱스는 호출한 쪽에서 갱신해야 합니다.
+    commit 은 하지 않습니다.
+    """
+    source_rows = (
+        select(literal(target_session_id), *(getattr(MessageModel, column) for column in COPIED_COLUMNS))
+        .where(MessageModel.session_id == source_session_id, MessageModel.id <= up_to_id)
+        # 새 id 가 원본 id 순서대로 발급되도록 정렬 (forked_id_pairs 가 이 순서에 의존)
+        .order_by(MessageModel.id)
+    )
+    result = db.execute(
+        insert(MessageModel).from_select(["session_id", *COPIED_COLUMNS], source_rows)
+    )
+    return result.rowcount
+
+
+def forked_id_pairs(
+    db: Session,
+    source_session_id: int,
+    target_session_id: int,
+    up_to_id: int,
+    batch_size: int = 1000
+) -> Iterator[Tuple[int, int]]:
+    """(원본 메시지 id, 새 메시지 id) 쌍을 원본 id 오름차순으로 반환합니다."""
+    last_source_id = 0
+    last_target_id = 0
+    while True:
+        source_ids = [row[0] for row in (
+            db.query(MessageModel.id)
+            .filter(
+                MessageModel.session_id == source_session_id,
+                MessageModel.id > last_source_id,
+                MessageModel.id <= up_to_id
+            )
+            .order_by(MessageModel.id)
+            .limit(batch_size)
+            .all()
+        )]
+        if not source_ids:
+            return
+        target_ids = [row[0] for row in (
+            db.query(MessageModel.id)
+            .filter(MessageModel.session_id == target_session_id, MessageModel.id > last_target_id)
+            .order_by(MessageModel.id)
+            .limit(len(source_ids))
+            .all()
+        )]
+        yield from zip(source_ids, target_ids)
+        if len(target_ids) < len(source_ids):
+            return
+        last_source_id, last_target_id = source_ids[-1], target_ids[-1]
@@ -0,0 +1,349 @@
+"""세션별 저장 용량 통계 (메시지/토큰/벡터 수, 인덱스·양자화 상태, 추정 메모리).
+
+관리용 통계를 요청마다 get_collections / count 로 다시 계산하지 않도록 프로세스 메모리에
+집계를 유지합니다.
+
+- 쓰기 시 증분 반영: 메시지 insert/update/delete 는 ORM 이벤트로 commit 시점에, 벡터 저장/삭제는
+  QdrantClientWrapper 가 직접 알려 줍니다.
+- 주기적 샘플링: SESSION_STATS_INTERVAL_SECONDS 마다 DB 집계 쿼리 한 번과 세션 컬렉션별
+  get_collection 으로 전체 값을 다시 맞춥니다. 일괄 경로(fork 의 INSERT ... SELECT, 다른 워커
+  프로세스의 쓰기)로 생긴 차이는 다음 샘플에서 바로잡힙니다.
+
+추정 메모리는 RAM 에 올라가는 원본 벡터(on_disk 가 아니면 포인트 수 × 차원 × 4바이트),
+양자화 벡터, HNSW 링크(포인트당 2m 개 × 4바이트)의 합이며 payload 는 포함하지 않습니다.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from sqlalchemy import func, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import MessageModel, SessionModel
+from app.session_tiering import ARCHIVED
+from app.utils.metrics import metrics
+from app.utils.orm_events import CommitQueue
+
+if TYPE_CHECKING:
+    from app.qdrant_client import QdrantClientWrapper
+
+logger = logging.getLogger("session_stats")
+
+_SESSION_COLLECTION = re.compile(r"^session_(\d+)$")
+
+# 숫자 통계 필드 (전체 합계 계산 대상)
+COUNTER_FIELDS = ("message_count", "token_count", "uncounted_messages", "vector_count", "estimated_memory_bytes")
+
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def estimate_memory_bytes(points: int, dimension: int, on_disk: bool, hnsw_m: int, quantization: Optional[str],
+                          compression: Optional[str] = None) -> int:
+    """컬렉션이 RAM 에서 차지하는 벡터/인덱스 크기를 추정합니다 (payload 제외)."""
+    raw = 0 if on_disk else points * dimension * 4
+    if quantization == "scalar":
+        quantized = points * dimension
+    elif quantization == "binary":
+        quantized = points * ((dimension + 7) // 8)
+    elif quantization == "product":
+        # compression 은 "x16" 처럼 float32 대비 압축 배율
+        ratio = int(compression[1:]) if compression and compression[1:].isdigit() else 16
+        quantized = points * dimension * 4 // ratio
+    else:
+        quantized = 0
+    links = points * hnsw_m * 2 * 4
+    return raw + quantized + links
+
+
+def collection_stats(info: Any) -> Dict[str, Any]:
+    """get_collection 결과에서 벡터 수, 인덱스/양자화 상태, 추정 메모리를 뽑습니다."""
+    params = info.config.params
+    vectors = params.vectors
+    if isinstance(vectors, dict):
+        # 이름 있는 벡터는 첫 번째 설정 기준
+        vectors = next(iter(vectors.values()))
+    quantization_config = vectors.quantization_config or info.config.quantization_config
+    quantization = None
+    compression = None
+    if quantization_config is not None:
+        for kind in ("scalar", "product", "binary"):
+            config = getattr(quantization_config, kind, None)
+            if config is not None:
+                quantization = kind
+                compression = _enum_value(getattr(config, "compression", None))
+                break
+    hnsw_config = vectors.hnsw_config or info.config.hnsw_config
+    hnsw_m = hnsw_config.m or 0
+    points = info.points_count or 0
+    return {
+        "vector_count": points,
+        "indexed_vector_count": info.indexed_vectors_count or 0,
+        "segment_count": info.segments_count,
+        "collection_status": _enum_value(info.status),
+        "optimizer_ok": _enum_value(info.optimizer_status) == "ok",
+        "on_disk": bool(vectors.on_disk),
+        "quantization": quantization,
+        "dimension": vectors.size,
+        "estimated_memory_bytes": estimate_memory_bytes(
+            points, vectors.size, bool(vectors.on_disk), hnsw_m, quantization, compression
+        ),
+    }
+
+
+class SessionStats:
+    """세션 통계 집계와 주기적 샘플러."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[int, Dict[str, Any]] = {}
+        self.sampled_at: Optional[float] = None
+        self.sample_seconds: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _entry(self, session_id: int) -> Dict[str, Any]:
+        # self._lock 안에서 호출
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = self._sessions[session_id] = {
+                "session_id": session_id,
+                "user_id": None,
+                "message_count": 0,
+                "token_count": 0,
+                "uncounted_messages": 0,
+                "vector_count": 0,
+                "indexed_vector_count": 0,
+                "segment_count": None,
+                "collection_status": None,
+                "optimizer_ok": None,
+                "on_disk": False,
+                "quantization": None,
+                "dimension": None,
+                "estimated_memory_bytes": 0,
+                "tier": None,
+                "updated_at": time.time(),
+            }
+        return entry
+
+    # --- 쓰기 시 증분 반영 ---
+
+    def add_messages(self, session_id: int, count: int, tokens: int, uncounted: int = 0) -> None:
+        with self._lock:
+            entry = self._entry(session_id)
+            entry["message_count"] = max(0, entry["message_count"] + count)
+            entry["token_count"] = max(0, entry["token_count"] + tokens)
+            entry["uncounted_messages"] = max(0, entry["uncounted_messages"] + uncounted)
+            entry["updated_at"] = time.time()
+
+    def add_vectors(self, session_id: int, added: int, removed: int = 0) -> None:
+        """저장/삭제한 벡터 수를 반영합니다. 추정 메모리는 포인트당 크기를 유지한 채 비례해서 조정합니다."""
+        with self._lock:
+            entry = self._entry(session_id)
+            before = entry["vector_count"]
+            entry["vector_count"] = max(0, before + added - removed)
+            if before and entry["estimated_memory_bytes"]:
+                entry["estimated_memory_bytes"] = entry["estimated_memory_bytes"] * entry["vector_count"] // before
+            elif not entry["on_disk"]:
+                dimension = entry["dimension"] or settings.EMBEDDING_DIMENSION
+                entry["estimated_memory_bytes"] = entry["vector_count"] * dimension * 4
+            entry["updated_at"] = time.time()
+
+    def set_session(self, session_id: int, user_id: Optional[str] = None) -> None:
+        with self._lock:
+            self._entry(session_id)["user_id"] = user_id
+
+    def forget(self, session_id: int) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    # --- 샘플링 ---
+
+    def refresh_session(self, db: Session, qdrant: QdrantClientWrapper, session_id: int) -> None:
+        """세션 하나의 통계를 DB 집계와 get_collection 으로 다시 계산합니다 (fork 같은 일괄 쓰기 후)."""
+        message_count, token_count, counted = db.query(
+            func.count(), func.coalesce(func.sum(MessageModel.token_count), 0), func.count(MessageModel.token_count)
+        ).filter(MessageModel.session_id == session_id).one()
+        try:
+            vector_stats = collection_stats(qdrant.client.get_collection(collection_name=f"session_{session_id}"))
+        except Exception:
+            vector_stats = {"vector_count": 0, "estimated_memory_bytes": 0}
+        with self._lock:
+            entry = self._entry(session_id)
+            entry.update(vector_stats)
+            entry.update(
+                message_count=message_count,
+                token_count=token_count,
+                uncounted_messages=message_count - counted,
+                updated_at=time.time()
+            )
+
+    def sample(self, db: Session, qdrant: QdrantClientWrapper) -> int:
+        """전체 세션 통계를 다시 계산하고 세션 수를 반환합니다."""
+        started = time.monotonic()
+        sessions: Dict[int, Dict[str, Any]] = {}
+        for session_id, user_id in db.query(SessionModel.id, SessionModel.user_id):
+            sessions[session_id] = {"user_id": user_id}
+        rows = db.query(
+            MessageModel.session_id,
+            func.count(),
+            func.coalesce(func.sum(MessageModel.token_count), 0),
+            func.count(MessageModel.token_count)
+        ).group_by(MessageModel.session_id)
+        for session_id, message_count, token_count, counted in rows:
+            sessions.setdefault(session_id, {"user_id": None}).update(
+                message_count=message_count,
+                token_count=token_count,
+                uncounted_messages=message_count - counted
+            )
+
+        # 재색인한 세션은 session_{id} 가 alias 이므로 alias 이름도 함께 확인
+        names = {collection.name for collection in qdrant.client.get_collections().collections}
+        names.update(alias.alias_name for alias in qdrant.client.get_aliases().aliases)
+        for name in names:
+            match = _SESSION_COLLECTION.match(name)
+            if not match:
+                continue
+            try:
+                info = qdrant.client.get_collection(collection_name=name)
+            except Exception as e:
+                logger.warning(f"Error sampling collection {name}: {e}")
+                continue
+            sessions.setdefault(int(match.group(1)), {"user_id": None}).update(collection_stats(info))
+
+        tiering = qdrant.tiering
+        now = time.time()
+        with self._lock:
+            previous = self._sessions
+            self._sessions = {}
+            for session_id, values in sessions.items():
+                entry = self._entry(session_id)
+                if tiering is not None:
+                    entry["tier"] = tiering.tier(session_id)
+                    old = previous.get(session_id)
+                    if entry["tier"] == ARCHIVED and old is not None and "vector_count" not in values:
+                        # 보관된 세션은 컬렉션이 없으므로 마지막으로 알던 벡터 수를 유지 (메모리는 0)
+                        entry["vector_count"] = old["vector_count"]
+                entry.update(values)
+                entry["updated_at"] = now
+            self.sampled_at = now
+            self.sample_seconds = time.monotonic() - started
+
+        totals = self.totals()
+        metrics.set_gauge("session_stats_sessions", totals["sessions"])
+        metrics.set_gauge("session_stats_vectors", totals["vector_count"])
+        metrics.set_gauge("session_stats_estimated_memory_bytes", totals["estimated_memory_bytes"])
+        metrics.observe("session_stats_sample_seconds", self.sample_seconds)
+        return len(sessions)
+
+    def start(self, db_factory: Any, qdrant: QdrantClientWrapper, interval_seconds: Optional[float] = None) -> None:
+        """시작 직후 한 번, 이후 주기적으로 sample 을 실행하는 데몬 스레드를 시작합니다."""
+        if self._thread is not None:
+            return
+        interval = interval_seconds or settings.SESSION_STATS_INTERVAL_SECONDS
+
+        def run() -> None:
+            db = db_factory.SessionLocal()
+            try:
+                self.sample(db, qdrant)
+            except Exception as e:
+                logger.error(f"Session stats sample failed: {e}")
+            finally:
+                db.close()
+
+        def loop() -> None:
+            run()
+            while not self._stop.wait(interval):
+                run()
+
+        self._thread = threading.Thread(target=loop, name="session-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # --- 조회 ---
+
+    def get(self, session_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return dict(entry) if entry is not None else None
+
+    def top(self, sort_by: str = "vector_count", limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [dict(entry) for entry in self._sessions.values()]
+        entries.sort(key=lambda entry: entry[sort_by], reverse=True)
+        return entries[:limit]
+
+    def totals(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._sessions.values())
+            sampled_at = self.sampled_at
+            sample_seconds = self.sample_seconds
+        totals: Dict[str, Any] = {field: sum(entry[field] for entry in entries) for field in COUNTER_FIELDS}
+        totals.update(
+            sessions=len(entries),
+            sessions_with_vectors=sum(1 for entry in entries if entry["vector_count"]),
+            on_disk_sessions=sum(1 for entry in entries if entry["on_disk"]),
+            quantized_sessions=sum(1 for entry in entries if entry["quantization"]),
+            unindexed_vectors=sum(
+                max(0, entry["vector_count"] - entry["indexed_vector_count"]) for entry in entries
+            ),
+            collections_not_green=sum(
+                1 for entry in entries if entry["collection_status"] not in (None, "green")
+            ),
+            sampled_at=sampled_at,
+            sample_seconds=sample_seconds,
+        )
+        return totals
+
+
+_session_stats: Optional[SessionStats] = None
+
+
+def get_session_stats() -> SessionStats:
+    """프로세스 전역 SessionStats 를 반환합니다."""
+    global _session_stats
+    if _session_stats is None:
+        _session_stats = SessionStats()
+    return _session_stats
+
+
+# --- ORM 이벤트: commit 된 쓰기만 집계에 반영 ---
+
+def _message_token_change(target: MessageModel) -> Optional[tuple]:
+    history = inspect(target).attrs.token_count.history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = target.token_count
+    return ("messages", target.session_id, 0, (new or 0) - (old or 0), int(new is None) - int(old is None))
+
+
+def _apply_pending(pending) -> None:
+    stats = get_session_stats()
+    for change in pending:
+        if change[0] == "messages":
+            stats.add_messages(*change[1:])
+        elif change[0] == "session":
+            stats.set_session(*change[1:])
+        else:
+            stats.forget(change[1])
+
+
+_pending = CommitQueue("session_stats", _apply_pending)
+_pending.track(MessageModel, "after_insert", lambda target: (
+    "messages", target.session_id, 1, target.token_count or 0, int(target.token_count is None)
+))
+_pending.track(MessageModel, "after_update", _message_token_change)
+_pending.track(MessageModel, "after_delete", lambda target: (
+    "messages", target.session_id, -1, -(target.token_count or 0), -int(target.token_count is None)
+))
+_pending.track(SessionModel, "after_insert", lambda target: ("session", target.id, target.user_id))
+_pending.track(SessionModel, "after_delete", lambda target: ("forget", target.id))
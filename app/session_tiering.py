@@ -0,0 +1,402 @@
+"""세션 컬렉션 hot/cold 계층 관리.
+
+대부분의 세션은 하루가 지나면 다시 쓰이지 않지만 `session_{id}` 컬렉션은 계속 Qdrant 메모리에
+올라가 있습니다. SessionTieringManager 는 세션별 마지막 접근 시각을 기록하고, 주기적으로
+오래 쓰이지 않은 컬렉션을 다음 계층으로 내립니다.
+
+- memory: 기본 상태 (벡터/payload 가 RAM 에 있음)
+- on_disk: 벡터와 payload 를 디스크에 두도록 컬렉션 설정 변경 (검색은 그대로 가능, 느려짐)
+- archived: 포인트(id, 벡터, payload)를 SESSION_SNAPSHOT_DIR 의 파일로 내보낸 뒤 컬렉션 삭제
+
+archived 세션은 다음 접근(저장/검색/삭제) 때 파일에서 컬렉션을 다시 만들고(지연 복원) 등록된
+warm-up hook 을 실행합니다. on_disk 세션은 접근하면 백그라운드에서 메모리로 되돌립니다.
+idle 기준 외에 SESSION_TIERING_MEMORY_BUDGET_MB 를 넘으면 가장 오래 접근하지 않은 세션부터
+on_disk 로 내립니다. 마지막 접근 시각은 프로세스 메모리에만 있으므로, 재시작 후에는 처음 본
+시각부터 다시 셉니다.
+
+여러 워커 프로세스가 같은 SESSION_SNAPSHOT_DIR 을 쓰면 다른 워커가 보관한 세션을 이 프로세스는
+memory 로 알고 있을 수 있으므로, 접근할 때 스냅샷 파일이 있는지 확인해 빈 컬렉션을 새로 만드는 대신
+복원합니다. 보관(파일 교체 + 컬렉션 삭제)과 복원은 디렉터리의 잠금 파일로 프로세스 간에도 직렬화합니다.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, TYPE_CHECKING
+
+import orjson
+
+from app.config import settings
+from app.utils.lazy_import import lazy_import
+from app.utils.metrics import metrics
+
+np = lazy_import("numpy")
+models = lazy_import("qdrant_client.http.models")
+
+if TYPE_CHECKING:
+    import numpy
+    from app.qdrant_client import QdrantClientWrapper
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없음 (단일 워커로 실행해야 함)
+    fcntl = None
+
+logger = logging.getLogger("session_tiering")
+
+MEMORY = "memory"
+ON_DISK = "on_disk"
+ARCHIVED = "archived"
+
+_SESSION_COLLECTION = re.compile(r"^session_(\d+)$")
+
+
+class SessionTieringManager:
+    """세션 컬렉션을 memory → on_disk → archived 로 내리고, 접근 시 되돌립니다."""
+
+    def __init__(
+        self,
+        qdrant: QdrantClientWrapper,
+        snapshot_dir: Optional[str] = None,
+        on_disk_after_seconds: Optional[float] = None,
+        archive_after_seconds: Optional[float] = None,
+        memory_budget_mb: Optional[float] = None,
+        page_size: int = 512
+    ):
+        self.qdrant = qdrant
+        self.snapshot_dir = snapshot_dir or settings.SESSION_SNAPSHOT_DIR
+        self.on_disk_after_seconds = (
+            on_disk_after_seconds if on_disk_after_seconds is not None
+            else settings.SESSION_TIERING_ON_DISK_AFTER_SECONDS
+        )
+        self.archive_after_seconds = (
+            archive_after_seconds if archive_after_seconds is not None
+            else settings.SESSION_TIERING_ARCHIVE_AFTER_SECONDS
+        )
+        self.memory_budget_mb = (
+            memory_budget_mb if memory_budget_mb is not None else settings.SESSION_TIERING_MEMORY_BUDGET_MB
+        )
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        self._session_locks: Dict[int, threading.Lock] = {}
+        self._last_access: Dict[int, float] = {}
+        self._tiers: Dict[int, str] = {}
+        self._warmup_hooks: List[Callable[[int], None]] = []
+        self._promote_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-promote")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        # 재시작 전에 보관된 세션은 스냅샷 파일로 알아냄
+        for filename in os.listdir(self.snapshot_dir):
+            match = re.match(r"^session_(\d+)\.npz$", filename)
+            if match:
+                self._tiers[int(match.group(1))] = ARCHIVED
+
+    def add_warmup_hook(self, hook: Callable[[int], None]) -> None:
+        """세션이 archived/on_disk 에서 메모리로 돌아온 뒤 session_id 로 호출할 함수를 등록합니다."""
+        self._warmup_hooks.append(hook)
+
+    def tier(self, session_id: int) -> str:
+        with self._lock:
+            return self._tiers.get(session_id, MEMORY)
+
+    def snapshot_path(self, session_id: int) -> str:
+        return os.path.join(self.snapshot_dir, f"session_{session_id}.npz")
+
+    def _session_lock(self, session_id: int) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    @contextmanager
+    def _process_lock(self):
+        """스냅샷 디렉터리를 공유하는 다른 워커 프로세스와의 보관/복원 잠금."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.snapshot_dir, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def touch(self, session_id: int) -> None:
+        """세션 접근을 기록합니다. archived 이면 복원이 끝날 때까지 기다립니다."""
+        with self._lock:
+            self._last_access[session_id] = time.time()
+            tier = self._tiers.get(session_id, MEMORY)
+        if tier != ARCHIVED and os.path.exists(self.snapshot_path(session_id)):
+            # 다른 워커가 보관한 세션: 호출자가 빈 컬렉션을 만들기 전에 파일에서 복원
+            with self._lock:
+                self._tiers[session_id] = ARCHIVED
+            tier = ARCHIVED
+        if tier == ARCHIVED:
+            self.restore(session_id)
+        elif tier == ON_DISK:
+            self._promote_executor.submit(self.promote, session_id)
+
+    def forget(self, session_id: int) -> None:
+        """세션 삭제 시 접근 기록과 스냅샷 파일을 지웁니다."""
+        with self._session_lock(session_id):
+            with self._lock:
+                self._last_access.pop(session_id, None)
+                self._tiers.pop(session_id, None)
+            try:
+                os.remove(self.snapshot_path(session_id))
+            except FileNotFoundError:
+                pass
+
+    def _run_warmup_hooks(self, session_id: int) -> None:
+        for hook in self._warmup_hooks:
+            try:
+                hook(session_id)
+            except Exception as e:
+                logger.warning(f"Session warm-up hook failed for session {session_id}: {e}")
+
+    def _set_on_disk(self, collection_name: str, on_disk: bool) -> None:
+        self.qdrant.client.update_collection(
+            collection_name=collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=on_disk)},
+            collection_params=models.CollectionParamsDiff(on_disk_payload=on_disk)
+        )
+
+    def _physical_name(self, session_id: int) -> str:
+        # 재색인한 세션은 session_{id} 가 alias 이므로 설정 변경/삭제는 물리 컬렉션에 적용
+        collection_name = f"session_{session_id}"
+        return self.qdrant.resolve_alias(collection_name) or collection_name
+
+    def demote(self, session_id: int) -> None:
+        """컬렉션의 벡터와 payload 를 디스크에 두도록 바꿉니다."""
+        with self._session_lock(session_id):
+            if self.tier(session_id) != MEMORY:
+                return
+            self._set_on_disk(self._physical_name(session_id), True)
+            with self._lock:
+                self._tiers[session_id] = ON_DISK
+        metrics.inc("session_tiering_on_disk_total")
+        logger.info(f"Session {session_id} moved to on-disk storage")
+
+    def promote(self, session_id: int) -> None:
+        """on_disk 컬렉션을 다시 메모리에 두도록 바꿉니다."""
+        with self._session_lock(session_id):
+            if self.tier(session_id) != ON_DISK:
+                return
+            try:
+                self._set_on_disk(self._physical_name(session_id), False)
+            except Exception as e:
+                logger.error(f"Error promoting session {session_id}: {e}")
+                return
+            with self._lock:
+                self._tiers[session_id] = MEMORY
+        metrics.inc("session_tiering_promoted_total")
+        self._run_warmup_hooks(session_id)
+
+    def archive(self, session_id: int, last_access: Optional[float] = None) -> bool:
+        """포인트를 스냅샷 파일로 내보내고 컬렉션을 삭제합니다. 보관했으면 True.
+
+        내보내는 동안 세션에 접근했거나 포인트 수가 바뀌었으면 파일을 버리고 컬렉션을 그대로 둡니다.
+        """
+        collection_name = f"session_{session_id}"
+        path = self.snapshot_path(session_id)
+        with self._lock:
+            if last_access is None:
+                last_access = self._last_access.get(session_id)
+        try:
+            count = self.qdrant.client.count(collection_name=collection_name, exact=True).count
+            ids, vectors, payloads = self._export(collection_name)
+        except Exception as e:
+            logger.error(f"Error exporting session {session_id}: {e}")
+            return False
+
+        # 여러 워커가 같은 세션을 동시에 내보낼 수 있으므로 임시 파일은 프로세스별로
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.asarray(ids, dtype=np.uint64),
+                vectors=vectors,
+                payloads=np.frombuffer(orjson.dumps(payloads), dtype=np.uint8)
+            )
+
+        with self._session_lock(session_id), self._process_lock():
+            try:
+                unchanged = self.qdrant.client.count(collection_name=collection_name, exact=True).count == count
+            except Exception:
+                unchanged = False
+            # 접근 기록 확인과 상태 변경을 한 번에 해야, 이후의 touch() 가 복원을 기다림
+            with self._lock:
+                unchanged = unchanged and self._last_access.get(session_id) == last_access
+                if unchanged:
+                    self._tiers[session_id] = ARCHIVED
+            if not unchanged:
+                os.remove(tmp_path)
+                return False
+            os.replace(tmp_path, path)
+            try:
+                self.qdrant.client.delete_collection(collection_name=self._physical_name(session_id))
+                self._drop_alias(collection_name)
+            except Exception:
+                os.remove(path)
+                with self._lock:
+                    self._tiers[session_id] = MEMORY
+                raise
+        self.qdrant.search_cache.bump(session_id)
+        metrics.inc("session_tiering_archived_total")
+        logger.info(f"Session {session_id} archived ({len(ids)} points)")
+        return True
+
+    def _drop_alias(self, alias_name: str) -> None:
+        if self.qdrant.resolve_alias(alias_name) is None:
+            return
+        self.qdrant.client.update_collection_aliases(change_aliases_operations=[
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias_name))
+        ])
+
+    def _export(self, collection_name: str):
+        ids: List[int] = []
+        payloads: List[Dict] = []
+        pages: List[numpy.ndarray] = []
+        offset = None
+        while True:
+            points, offset = self.qdrant.client.scroll(
+                collection_name=collection_name,
+                limit=self.page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if points:
+                ids.extend(point.id for point in points)
+                payloads.extend(point.payload for point in points)
+                pages.append(np.asarray([point.vector for point in points], dtype=np.float32))
+            if offset is None:
+                break
+        if pages:
+            vectors = np.concatenate(pages)
+        else:
+            info = self.qdrant.client.get_collection(collection_name=collection_name)
+            vectors = np.zeros((0, info.config.params.vectors.size), dtype=np.float32)
+        return ids, vectors, payloads
+
+    def restore(self, session_id: int) -> None:
+        """스냅샷 파일에서 컬렉션을 다시 만들고 파일을 지웁니다. 이미 복원되었으면 무시합니다.
+
+        파일이 없으면 다른 워커가 먼저 복원한 것이므로 상태만 memory 로 바꿉니다.
+        """
+        with self._session_lock(session_id), self._process_lock():
+            if self.tier(session_id) != ARCHIVED:
+                return
+            started = time.monotonic()
+            path = self.snapshot_path(session_id)
+            try:
+                with np.load(path) as snapshot:
+                    ids = snapshot["ids"].tolist()
+                    vectors = snapshot["vectors"]
+                    payloads = orjson.loads(snapshot["payloads"].tobytes())
+            except FileNotFoundError:
+                with self._lock:
+                    self._tiers[session_id] = MEMORY
+                return
+
+            collection_name = f"session_{session_id}"
+            self.qdrant.create_session_collection(collection_name, dimension=vectors.shape[1])
+            for start in range(0, len(ids), self.page_size):
+                end = start + self.page_size
+                self.qdrant.client.upsert(
+                    collection_name=collection_name,
+                    points=models.Batch(
+                        ids=ids[start:end], vectors=vectors[start:end].tolist(), payloads=payloads[start:end]
+                    )
+                )
+            with self._lock:
+                self._tiers[session_id] = MEMORY
+            os.remove(path)
+            elapsed = time.monotonic() - started
+        self.qdrant.search_cache.bump(session_id)
+        metrics.observe("session_restore_seconds", elapsed)
+        metrics.inc("session_tiering_restored_total")
+        logger.info(f"Session {session_id} restored ({len(ids)} points) in {elapsed:.3f}s")
+        self._run_warmup_hooks(session_id)
+
+    def run_once(self) -> Dict[str, int]:
+        """idle 기준과 메모리 예산에 따라 세션을 한 번 내리고 처리한 개수를 반환합니다."""
+        now = time.time()
+        result = {"on_disk": 0, "archived": 0}
+        resident: List[tuple] = []  # (마지막 접근, session_id, 추정 바이트)
+
+        for collection in self.qdrant.client.get_collections().collections:
+            match = _SESSION_COLLECTION.match(collection.name)
+            if not match:
+                continue
+            session_id = int(match.group(1))
+            with self._lock:
+                last_access = self._last_access.setdefault(session_id, now)
+            idle = now - last_access
+            try:
+                if self.archive_after_seconds and idle >= self.archive_after_seconds:
+                    if self.archive(session_id, last_access):
+                        result["archived"] += 1
+                        continue
+                info = self.qdrant.client.get_collection(collection_name=collection.name)
+                vector_params = info.config.params.vectors
+                if vector_params.on_disk:
+                    with self._lock:
+                        if self._tiers.get(session_id, MEMORY) == MEMORY:
+                            self._tiers[session_id] = ON_DISK
+                    continue
+                if self.on_disk_after_seconds and idle >= self.on_disk_after_seconds:
+                    self.demote(session_id)
+                    result["on_disk"] += 1
+                    continue
+                points = info.points_count or 0
+                resident.append((last_access, session_id, points * vector_params.size * 4))
+            except Exception as e:
+                logger.error(f"Error tiering session {session_id}: {e}")
+
+        resident_bytes = sum(size for _, _, size in resident)
+        metrics.set_gauge("session_tiering_resident_bytes", resident_bytes)
+        if self.memory_budget_mb:
+            budget = self.memory_budget_mb * 1024 * 1024
+            # 가장 오래 접근하지 않은 세션부터 예산 안으로 들어올 때까지 내림
+            for _, session_id, size in sorted(resident):
+                if resident_bytes <= budget:
+                    break
+                try:
+                    self.demote(session_id)
+                except Exception as e:
+                    logger.error(f"Error tiering session {session_id}: {e}")
+                    continue
+                resident_bytes -= size
+                result["on_disk"] += 1
+            metrics.set_gauge("session_tiering_resident_bytes", resident_bytes)
+        with self._lock:
+            metrics.set_gauge("session_tiering_archived_sessions", sum(
+                1 for tier in self._tiers.values() if tier == ARCHIVED
+            ))
+        return result
+
+    def start(self, interval_seconds: Optional[float] = None) -> None:
+        """run_once 를 주기적으로 실행하는 데몬 스레드를 시작합니다."""
+        if self._thread is not None:
+            return
+        interval = interval_seconds or settings.SESSION_TIERING_INTERVAL_SECONDS
+
+        def loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"Session tiering pass failed: {e}")
+
+        self._thread = threading.Thread(target=loop, name="session-tiering", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
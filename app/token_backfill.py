@@ -0,0 +1,106 @@
+"""token_count 가 비어 있는 기존 메시지의 토큰 수를 채우는 백필 작업.
+
+메시지를 id 순으로 배치 단위로 읽어 count_tokens_batch 로 계산하고 DB에 일괄 반영합니다.
+--qdrant 를 주면 세션 컬렉션 payload 의 token_count 도 함께 갱신합니다.
+중단 후 다시 실행하면 아직 비어 있는 행부터 이어서 진행합니다.
+
+    python -m app.token_backfill
+    python -m app.token_backfill --batch-size 2000 --qdrant
+"""
+import argparse
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from qdrant_client.http import models
+from sqlalchemy.orm import Session
+
+from app.database import db_factory
+from app.models import MessageModel
+from app.qdrant_client import message_filter
+from app.utils.token_utils import count_tokens_batch
+
+logger = logging.getLogger("token_backfill")
+
+
+def _update_payloads(qdrant, session_id: int, counts: Dict[int, int]) -> None:
+    """세션 컬렉션에서 메시지의 모든 청크 포인트 payload 를 message_id 필터로 갱신합니다."""
+    collection_name = f"session_{session_id}"
+    try:
+        operations = [
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload={"token_count": token_count}, filter=message_filter(message_id)
+                )
+            )
+            for message_id, token_count in counts.items()
+        ]
+        qdrant.client.batch_update_points(
+            collection_name=collection_name, update_operations=operations, wait=False
+        )
+    except Exception as e:
+        # 컬렉션이 없는 세션(임베딩된 메시지가 없는 경우)은 건너뜀
+        logger.warning(f"Session {session_id}: payload update skipped: {e}")
+
+
+def backfill_token_counts(
+    db: Session,
+    batch_size: int = 1000,
+    qdrant=None
+) -> int:
+    """token_count 가 NULL 인 메시지를 모두 채우고 처리한 행 수를 반환합니다."""
+    last_id = 0
+    total = 0
+    while True:
+        rows: List[Tuple[int, int, str]] = (
+            db.query(MessageModel.id, MessageModel.session_id, MessageModel.content)
+            .filter(MessageModel.token_count.is_(None), MessageModel.id > last_id)
+            .order_by(MessageModel.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        token_counts = count_tokens_batch([content or "" for _, _, content in rows])
+
+        # 일괄 UPDATE 는 ORM 이벤트(키워드 인덱스 갱신 등)를 거치지 않음
+        db.bulk_update_mappings(MessageModel, [
+            {"id": message_id, "token_count": token_count}
+            for (message_id, _, _), token_count in zip(rows, token_counts)
+        ])
+        db.commit()
+
+        if qdrant is not None:
+            by_session: Dict[int, Dict[int, int]] = {}
+            for (message_id, session_id, _), token_count in zip(rows, token_counts):
+                by_session.setdefault(session_id, {})[message_id] = token_count
+            for session_id, counts in by_session.items():
+                _update_payloads(qdrant, session_id, counts)
+
+        last_id = rows[-1][0]
+        total += len(rows)
+        logger.info(f"Backfilled {total} messages (last id {last_id})")
+    return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Fill in token_count for existing messages")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--qdrant", action="store_true", help="Also write token_count into the Qdrant payloads")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    qdrant = None
+    if args.qdrant:
+        from app.qdrant_client import QdrantClientFactory
+        qdrant = QdrantClientFactory.create_client()
+
+    db = db_factory.SessionLocal()
+    try:
+        total = backfill_token_counts(db, batch_size=args.batch_size, qdrant=qdrant)
+        logger.info(f"Token backfill finished: {total} messages")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from typing import List, Dict, Any
+
+
+def select_adaptive_k(
+    candidates: List[Dict[str, Any]],
+    min_k: int = 1,
+    max_k: int = 5,
+    min_relative_gap: float = 0.25
+) -> List[Dict[str, Any]]:
+    """점수 내림차순 후보 목록에서 점수가 크게 떨어지는 지점(elbow)까지만 남깁니다.
+
+    인접한 두 점수의 차이가 가장 큰 위치를 경계로 보고, 그 위치를 [min_k, max_k] 로 제한해
+    k 를 정합니다. 차이는 후보 전체의 점수 폭(최고점 - 최저점)에 대한 비율로 비교하며,
+    가장 큰 차이도 min_relative_gap 에 못 미치면 뚜렷한 경계가 없는 것으로 보고 max_k 개를
+    반환합니다. max_k 보다 많이 가져온(oversampled) 후보는 경계 판단과 점수 폭 계산에만 쓰입니다.
+    """
+    max_k = min(max_k, len(candidates))
+    min_k = max(0, min(min_k, max_k))
+    if max_k <= min_k:
+        return candidates[:max_k]
+
+    scores = [float(candidate["score"]) for candidate in candidates]
+    spread = scores[0] - scores[-1]
+    if spread <= 0:
+        return candidates[:max_k]
+
+    best_k, best_gap = max_k, 0.0
+    # k 개를 남긴다는 것은 scores[k-1] 과 scores[k] 사이를 자른다는 뜻
+    for k in range(1, min(max_k + 1, len(scores))):
+        gap = scores[k - 1] - scores[k]
+        if gap > best_gap:
+            best_k, best_gap = k, gap
+    if best_gap / spread < min_relative_gap:
+        return candidates[:max_k]
+    return candidates[:max(best_k, min_k)]
@@ -0,0 +1,36 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.config import settings
+from app.models import ErrorResponse, ErrorCode
+
+ADMIN_KEY_HEADER = "X-Admin-Key"
+
+
+def admin_key_valid(value: Optional[str]) -> bool:
+    """ADMIN_API_KEY 와 일치하는지 확인합니다 (키가 설정되지 않았으면 항상 False)."""
+    if not settings.ADMIN_API_KEY or not value:
+        return False
+    return hmac.compare_digest(value.encode(), settings.ADMIN_API_KEY.encode())
+
+
+def require_admin_key(x_admin_key: Optional[str] = Header(None, description="Admin API key")) -> None:
+    """관리용 엔드포인트 의존성. ADMIN_API_KEY 가 설정되지 않았으면 모든 요청을 거부합니다."""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=ErrorResponse(
+                error=ErrorCode.FORBIDDEN,
+                message="Admin endpoints are disabled because ADMIN_API_KEY is not configured"
+            ).dict()
+        )
+    if not admin_key_valid(x_admin_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=ErrorResponse(
+                error=ErrorCode.FORBIDDEN,
+                message=f"Missing or invalid {ADMIN_KEY_HEADER} header"
+            ).dict()
+        )
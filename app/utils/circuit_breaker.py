@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """의존 서비스별 circuit breaker.
+
+    연속 실패가 failure_threshold 에 이르면 열려서(open) reset_seconds 동안 호출을 바로 거절합니다.
+    그 뒤 한 번의 시험 호출(half-open)이 성공하면 닫히고, 실패하면 다시 열립니다.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """호출해도 되는지 반환합니다. half-open 상태에서는 시험 호출 하나만 허용합니다."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at < self.reset_seconds:
+                metrics.inc(f"circuit_{self.name}_rejected_total")
+                return False
+            if self._trial_in_flight:
+                metrics.inc(f"circuit_{self.name}_rejected_total")
+                return False
+            self._state = HALF_OPEN
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != CLOSED:
+                self._state = CLOSED
+                metrics.set_gauge(f"circuit_{self.name}_open", 0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    metrics.inc(f"circuit_{self.name}_opened_total")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                metrics.set_gauge(f"circuit_{self.name}_open", 1)
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """이름별 프로세스 전역 CircuitBreaker 를 반환합니다 (예: "qdrant", "openai_embeddings")."""
+    breaker: Optional[CircuitBreaker] = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(
+                    name,
+                    failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                    reset_seconds=settings.CIRCUIT_BREAKER_RESET_SECONDS
+                )
+    return breaker
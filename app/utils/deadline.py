@@ -0,0 +1,29 @@
+import time
+from typing import Optional
+
+
+class DeadlineExceeded(Exception):
+    """요청의 지연 예산을 모두 써서 더 진행할 수 없을 때 발생합니다."""
+
+
+class Deadline:
+    """요청 하나의 종단 간 지연 예산. 각 단계는 remaining() 안에서만 실행합니다."""
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.started = time.monotonic()
+        self.expires_at = self.started + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def budget_for(self, reserve: float = 0.0) -> Optional[float]:
+        """뒤 단계를 위해 reserve 초를 남겨 둘 때 지금 단계에 쓸 수 있는 시간. 없으면 None."""
+        budget = self.remaining() - reserve
+        return budget if budget > 0 else None
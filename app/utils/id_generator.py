@@ -0,0 +1,62 @@
+import logging
+import secrets
+import threading
+import time
+from typing import Optional
+
+# 2024-01-01T00:00:00Z (ms)
+_EPOCH_MS = 1704067200000
+_WORKER_BITS = 10
+_SEQUENCE_BITS = 12
+_MAX_SEQUENCE = (1 << _SEQUENCE_BITS) - 1
+
+logger = logging.getLogger("id_generator")
+
+
+class SnowflakeIdGenerator:
+    """시간순으로 증가하는 63비트 정수 id 생성기.
+
+    [41비트 ms 타임스탬프][10비트 worker id][12비트 순번] 구조로, 같은 밀리초에도
+    워커당 4096개까지 충돌 없이 발급합니다. 여러 프로세스/레플리카에서 쓰려면 프로세스마다
+    다른 worker_id(VECTOR_ID_WORKER_ID)를 지정해야 합니다. 지정하지 않으면 임의의 worker id 를
+    사용합니다 (컨테이너에서는 PID 가 모두 1 이라 PID 기반 값은 레플리카끼리 항상 겹침).
+    """
+
+    def __init__(self, worker_id: Optional[int] = None):
+        if worker_id is None:
+            worker_id = secrets.randbits(_WORKER_BITS)
+            logger.warning(
+                f"VECTOR_ID_WORKER_ID is not set; using random worker id {worker_id}. "
+                "Set a distinct value per process to rule out id collisions."
+            )
+        self.worker_id = worker_id & ((1 << _WORKER_BITS) - 1)
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        with self._lock:
+            now_ms = int(time.time() * 1000) - _EPOCH_MS
+            # 시계가 뒤로 가면 마지막 시각을 계속 사용
+            now_ms = max(now_ms, self._last_ms)
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & _MAX_SEQUENCE
+                if self._sequence == 0:
+                    # 이번 밀리초의 순번을 모두 사용했으면 다음 밀리초로 넘어감
+                    now_ms = self._last_ms + 1
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return (now_ms << (_WORKER_BITS + _SEQUENCE_BITS)) | (self.worker_id << _SEQUENCE_BITS) | self._sequence
+
+
+_id_generator: Optional[SnowflakeIdGenerator] = None
+
+
+def next_vector_id() -> int:
+    """프로세스 전역 생성기로 새 벡터 id를 발급합니다."""
+    global _id_generator
+    if _id_generator is None:
+        from app.config import settings
+        _id_generator = SnowflakeIdGenerator(settings.VECTOR_ID_WORKER_ID)
+    return _id_generator.next_id()
@@ -0,0 +1,23 @@
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """처음 속성에 접근할 때 실제 모듈을 import 하는 모듈 프록시.
+
+    qdrant_client, openai, numpy 처럼 import 비용이 큰 SDK를 `app.main` import 시점이 아니라
+    실제로 처음 사용할 때 불러오기 위해 사용합니다.
+    """
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self.__name__)
+        # 이후 접근은 __getattr__ 를 거치지 않도록 실제 모듈의 속성을 복사
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """이미 import 된 모듈은 그대로, 아니면 LazyModule 프록시를 반환합니다."""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
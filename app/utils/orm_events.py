@@ -0,0 +1,44 @@
+"""commit 된 ORM 쓰기만 프로세스 메모리 상태(캐시, 인덱스, 통계)에 반영하기 위한 공통 큐.
+
+flush 시점의 mapper 이벤트(after_insert/after_update/after_delete)에서 만든 변경을 Session.info 에
+모아 두었다가, Session after_commit 에서 한 번에 적용하고 after_rollback 이면 버립니다.
+
+    _pending = CommitQueue("recent_history", _apply)
+    _pending.track(MessageModel, "after_insert", lambda target: ("append", target.session_id, ...))
+"""
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+
+class CommitQueue:
+    """Session 별 대기 변경 목록. commit 되면 apply(변경 목록) 를 호출합니다."""
+
+    def __init__(self, name: str, apply: Callable[[List[Any]], None]):
+        self.key = f"{name}_pending"
+        self.apply = apply
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    def track(self, model: type, event_name: str, build: Callable[[Any], Optional[Any]]) -> None:
+        """model 의 mapper 이벤트마다 build(target) 결과를 큐에 넣습니다. None 을 반환하면 넣지 않습니다."""
+        def listener(mapper, connection, target):
+            change = build(target)
+            if change is not None:
+                self.queue(target, change)
+        event.listen(model, event_name, listener)
+
+    def queue(self, target: Any, change: Any) -> None:
+        db = object_session(target)
+        if db is None:
+            return
+        db.info.setdefault(self.key, []).append(change)
+
+    def _after_commit(self, db: Session) -> None:
+        pending = db.info.pop(self.key, None)
+        if pending:
+            self.apply(pending)
+
+    def _after_rollback(self, db: Session) -> None:
+        db.info.pop(self.key, None)
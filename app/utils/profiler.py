@@ -0,0 +1,222 @@
+"""요청 단위 샘플링 프로파일러 (외부 의존성 없음).
+
+별도 스레드가 interval 마다 sys._current_frames() 로 스택을 읽어 모읍니다. 프로파일 대상 코드에는
+계측(훅)을 넣지 않으므로 오버헤드는 샘플링 스레드의 GIL 점유뿐입니다.
+
+다른 요청의 작업이 섞이지 않도록 이 요청을 실행 중인 스레드만 샘플링합니다. 미들웨어가
+profile_request() 로 이벤트 루프 스레드를 등록하고 프로파일러를 contextvar 에 넣으면,
+track_request_threads() 로 감싼 sync 엔드포인트(run_in_threadpool 은 컨텍스트를 복사함)와
+bind_request_profiler() 로 감싸 executor 에 넘긴 작업이 실행되는 동안 그 스레드를 등록합니다.
+스레드별로 따로 기록하고, 대기 중인(idle) 스레드의 샘플은 버립니다.
+
+결과는 speedscope(https://www.speedscope.app) JSON 또는 flamegraph.pl / speedscope 가 읽는
+collapsed stack 텍스트로 저장합니다.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 리프 프레임이 이 파일들에 있으면 대기 중인 스레드로 보고 샘플에서 제외
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "socket.py")
+
+Frame = Tuple[str, str, int]  # (함수 이름, 파일, 함수 시작 줄)
+
+
+def _is_idle(frame) -> bool:
+    return os.path.basename(frame.f_code.co_filename) in IDLE_FILES
+
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class SamplingProfiler:
+    """start() 와 stop() 사이의 스레드별 스택 샘플을 모읍니다."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Dict[int, Counter] = {}
+        # 샘플링할 스레드 id → 등록 중첩 횟수
+        self._threads: Dict[int, int] = {}
+        self._threads_lock = threading.Lock()
+        self.thread_names: Dict[int, str] = {}
+        self.sample_count = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    @contextmanager
+    def track_current_thread(self):
+        """블록을 실행하는 동안 현재 스레드를 샘플링 대상에 넣습니다."""
+        thread_id = threading.get_ident()
+        with self._threads_lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._threads_lock:
+                if self._threads[thread_id] == 1:
+                    del self._threads[thread_id]
+                else:
+                    self._threads[thread_id] -= 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._threads_lock:
+                tracked = list(self._threads)
+            frames = sys._current_frames()
+            for thread_id in tracked:
+                frame = frames.get(thread_id)
+                if frame is None or _is_idle(frame):
+                    continue
+                self.samples.setdefault(thread_id, Counter())[_stack(frame)] += 1
+            self.sample_count += 1
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        self.thread_names = {thread_id: names.get(thread_id, str(thread_id)) for thread_id in self.samples}
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """speedscope 의 sampled 프로파일 형식 (스레드마다 profile 하나)."""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        profiles = []
+        for thread_id, stacks in self.samples.items():
+            samples = []
+            weights = []
+            for stack, count in stacks.items():
+                indexes = []
+                for frame in stack:
+                    if frame not in frame_index:
+                        frame_index[frame] = len(frames)
+                        frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                    indexes.append(frame_index[frame])
+                samples.append(indexes)
+                weights.append(count * self.interval)
+            profiles.append({
+                "type": "sampled",
+                "name": self.thread_names.get(thread_id, str(thread_id)),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "echoprompt",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def to_collapsed(self) -> str:
+        """flamegraph.pl 입력 형식: `스레드;바깥 함수;...;안쪽 함수 샘플수` 한 줄씩."""
+        lines = []
+        for thread_id, stacks in self.samples.items():
+            thread_name = self.thread_names.get(thread_id, str(thread_id)).replace(";", ":")
+            for stack, count in stacks.items():
+                names = ";".join(
+                    f"{frame[0]} ({os.path.basename(frame[1])}:{frame[2]})".replace(";", ":") for frame in stack
+                )
+                lines.append(f"{thread_name};{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: str, name: str, output_format: str = "speedscope") -> str:
+        """프로파일을 directory 에 저장하고 파일 경로를 반환합니다."""
+        os.makedirs(directory, exist_ok=True)
+        if output_format == "collapsed":
+            path = os.path.join(directory, f"{name}.folded")
+            content = self.to_collapsed()
+        else:
+            path = os.path.join(directory, f"{name}.speedscope.json")
+            content = json.dumps(self.to_speedscope(name))
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
+        return path
+
+
+_current_profiler: ContextVar[Optional[SamplingProfiler]] = ContextVar("request_profiler", default=None)
+
+
+@contextmanager
+def profile_request(profiler: SamplingProfiler):
+    """현재 요청 컨텍스트의 프로파일러를 지정하고 현재(이벤트 루프) 스레드를 샘플링 대상에 넣습니다."""
+    token = _current_profiler.set(profiler)
+    try:
+        with profiler.track_current_thread():
+            yield
+    finally:
+        _current_profiler.reset(token)
+
+
+def bind_request_profiler(fn: Callable) -> Callable:
+    """executor 에 넘길 fn 을, 실행 스레드가 현재 요청의 프로파일러에 샘플링되도록 감쌉니다.
+
+    ThreadPoolExecutor 는 contextvar 를 복사하지 않으므로 제출하는 쪽에서 프로파일러를 붙잡아 둡니다.
+    프로파일링 중인 요청이 아니면 fn 을 그대로 반환합니다.
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return fn
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        with profiler.track_current_thread():
+            return fn(*args, **kwargs)
+    return run
+
+
+def track_request_threads(fn: Callable) -> Callable:
+    """컨텍스트를 복사해 실행되는 함수(run_in_threadpool 의 sync 엔드포인트)용: 호출 시점의 프로파일러로 등록."""
+    @wraps(fn)
+    def run(*args, **kwargs):
+        return bind_request_profiler(fn)(*args, **kwargs)
+    return run
+
+
+def enforce_retention(directory: str, max_files: int, max_total_bytes: Optional[int] = None) -> int:
+    """오래된 프로파일 파일부터 지워 개수/전체 크기 제한을 지킵니다. 지운 파일 수를 반환합니다."""
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.is_file() and not entry.name.endswith(".tmp")]
+    except FileNotFoundError:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    total = 0
+    removed = 0
+    for position, entry in enumerate(entries):
+        size = entry.stat().st_size
+        if position < max_files and (max_total_bytes is None or total + size <= max_total_bytes):
+            total += size
+            continue
+        try:
+            os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
@@ -0,0 +1,25 @@
+from typing import List, Dict, Any, Sequence
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[List[Dict[str, Any]]],
+    limit: int = 5,
+    k: int = 60
+) -> List[Dict[str, Any]]:
+    """여러 검색 결과 목록을 Reciprocal Rank Fusion 으로 합칩니다.
+
+    각 결과는 {"id", "score", "payload"} 형태이며, 반환값의 score 는
+    sum(1 / (k + rank)) 입니다. payload 는 먼저 나온 목록의 것을 사용합니다.
+    """
+    fused: Dict[Any, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {
+                    "id": result["id"],
+                    "score": 0.0,
+                    "payload": result.get("payload") or {}
+                }
+            entry["score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:limit]
@@ -0,0 +1,55 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """분당 허용량(rate_per_minute)으로 채워지는 토큰 버킷.
+
+    acquire()는 요청한 양만큼 토큰이 찰 때까지 대기하고, 대기한 시간(초)을 반환합니다.
+    용량보다 큰 요청은 버킷을 음수로 만들어 다음 요청들이 그만큼 더 기다리게 합니다.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """토큰을 예약하고 사용 가능해질 때까지 기다려야 하는 시간(초)을 반환합니다."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 용량보다 큰 요청도 언젠가는 통과할 수 있도록 버킷이 가득 찼을 때 허용
+            needed = min(amount, self.capacity)
+            wait = 0.0
+            if self._tokens < needed:
+                wait = (needed - self._tokens) / self.rate_per_second
+            self._tokens -= amount
+            return wait
+
+    def try_reserve(self, amount: float) -> float:
+        """토큰이 충분하면 가져가고 0을, 부족하면 가져가지 않고 사용 가능해질 때까지의 시간(초)을 반환합니다."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            needed = min(amount, self.capacity)
+            if self._tokens < needed:
+                return (needed - self._tokens) / self.rate_per_second
+            self._tokens -= amount
+            return 0.0
+
+    def acquire(self, amount: float = 1.0) -> float:
+        wait = self.reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+def normalize_query(query: str) -> str:
+    """공백 차이만 있는 질의가 같은 캐시 항목을 쓰도록 정규화합니다."""
+    return " ".join(query.split())
+
+
+class SearchCache:
+    """세션별 버전 카운터로 무효화되는 검색 결과 LRU 캐시.
+
+    키에 세션의 현재 버전이 포함되므로 bump() 한 번으로 해당 세션의 기존 항목은
+    더 이상 조회되지 않고 LRU로 밀려납니다. 같은 키로 동시에 들어온 요청은 하나만
+    실제로 계산하고 나머지는 그 결과를 기다립니다(single-flight).
+    TTL은 다른 워커 프로세스의 쓰기로 인한 오래된 결과를 제한하기 위한 안전장치입니다.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._inflight: Dict[Tuple, Future] = {}
+
+    def version(self, session_id: int) -> int:
+        with self._lock:
+            return self._versions.get(session_id, 0)
+
+    def bump(self, session_id: int) -> None:
+        """세션의 데이터가 바뀌었음을 기록해 기존 캐시 항목을 무효화합니다."""
+        with self._lock:
+            self._versions[session_id] = self._versions.get(session_id, 0) + 1
+
+    def get_or_compute(self, session_id: int, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if self.max_entries <= 0:
+            return compute()
+
+        with self._lock:
+            full_key = (session_id, self._versions.get(session_id, 0), key)
+            entry = self._entries.get(full_key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(full_key)
+                metrics.inc("search_cache_hits_total")
+                return list(entry[1])
+            future = self._inflight.get(full_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[full_key] = Future()
+
+        if not leader:
+            metrics.inc("search_cache_coalesced_total")
+            return list(future.result())
+
+        metrics.inc("search_cache_misses_total")
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(full_key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(full_key, None)
+            self._entries[full_key] = (time.monotonic(), result)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(result)
+        return list(result)
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """프로세스 전역 SearchCache 를 반환합니다."""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache(settings.SEARCH_CACHE_MAX_ENTRIES, settings.SEARCH_CACHE_TTL_SECONDS)
+    return _search_cache
@@ -0,0 +1,19 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.orm import Query
+
+# MessageResponse 와 같은 필드 순서
+MESSAGE_FIELDS = ("id", "session_id", "content", "role", "created_at", "updated_at", "token_count")
+
+
+def message_columns(model) -> List[Any]:
+    return [getattr(model, field) for field in MESSAGE_FIELDS]
+
+
+def project_rows(query: Query, fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """컬럼 단위 조회 결과를 dict 목록으로 변환합니다.
+
+    DB에서 읽은 신뢰할 수 있는 행이므로 ORM 객체 생성과 Pydantic 재검증을 건너뛰고
+    ORJSONResponse 로 바로 직렬화합니다 (datetime 은 orjson 이 ISO 8601 로 변환).
+    """
+    return [dict(zip(fields, row)) for row in query.all()]
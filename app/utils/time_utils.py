@@ -0,0 +1,8 @@
+from datetime import datetime, timezone
+
+
+def to_epoch(value: datetime) -> float:
+    """datetime을 epoch 초로 변환합니다. naive datetime은 UTC로 간주합니다."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import base64
+from typing import List, Optional
+
+from app.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# 바이너리 벡터 형식: 리틀 엔디언 float32, 행 우선(row-major)
+VECTOR_DTYPE = "<f4"
+VECTOR_ITEMSIZE = 4
+
+
+def decode_raw_vectors(buffer: bytes, dim: int, offset: int = 0) -> np.ndarray:
+    """float32 블록을 복사 없이 (N, dim) 배열로 해석합니다."""
+    if dim <= 0:
+        raise ValueError("dim must be positive")
+    size = len(buffer) - offset
+    row_bytes = dim * VECTOR_ITEMSIZE
+    if size < 0 or size % row_bytes:
+        raise ValueError(f"Vector block of {size} bytes is not a multiple of {row_bytes} (dim={dim})")
+    return np.frombuffer(buffer, dtype=VECTOR_DTYPE, offset=offset).reshape(-1, dim)
+
+
+def decode_base64_vectors(data: str, dim: int) -> np.ndarray:
+    return decode_raw_vectors(base64.b64decode(data, validate=True), dim)
+
+
+def encode_base64_vectors(vectors: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(vectors, dtype=VECTOR_DTYPE).tobytes()).decode("ascii")
+
+
+def vectors_from_request(
+    vectors: Optional[List[List[float]]],
+    vectors_base64: Optional[str],
+    dim: Optional[int]
+) -> np.ndarray:
+    """JSON 요청의 float 배열 또는 base64 블록 중 하나를 (N, dim) 배열로 변환합니다."""
+    if (vectors is None) == (vectors_base64 is None):
+        raise ValueError("Provide exactly one of 'vectors' or 'vectors_base64'")
+    if vectors_base64 is not None:
+        if not dim:
+            raise ValueError("'dim' is required with 'vectors_base64'")
+        return decode_base64_vectors(vectors_base64, dim)
+    array = np.asarray(vectors, dtype=VECTOR_DTYPE)
+    if array.ndim != 2 or (dim and array.shape[1] != dim):
+        raise ValueError("'vectors' must be a list of equally sized float lists")
+    return array
@@ -0,0 +1,104 @@
+"""워커 부팅 비용 측정: `import app.main` 과 create_app() 시간.
+
+새 인터프리터에서 `python -X importtime` 으로 import 를 여러 번 실행해 중앙값을 내고,
+누적 시간이 큰 모듈과 import 시점에 로드된 무거운 SDK 목록을 출력합니다.
+결과를 파일로 저장해 두었다가 --baseline 으로 이전 측정과 비교할 수 있습니다.
+
+    python benchmarks/import_time.py --output import_time.json
+    python benchmarks/import_time.py --baseline import_time.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("qdrant_client", "openai", "tiktoken", "numpy", "requests", "httpx", "grpc")
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+app.main.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "heavy_modules": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+# create_app() 에 필요한 최소 환경 변수 (실제 연결은 하지 않음)
+DEFAULT_ENV = {
+    "VITE_FRONTEND_HOST": "localhost",
+    "VITE_FRONTEND_PORT": "5173",
+    "VITE_API_HOST": "localhost",
+    "QDRANT_HOST": "localhost",
+    "OPENAI_API_KEY": "benchmark",
+    "OPENAI_ORGANIZATION_ID": "benchmark",
+    "DATABASE_HOST": "sqlite:///./echoprompt.db",
+}
+
+
+def parse_importtime(stderr: str):
+    """-X importtime 출력에서 (모듈, self_us, cumulative_us) 목록을 뽑습니다."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_once(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Number of app-level modules to list by cumulative time")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a report previously written with --output")
+    args = parser.parse_args()
+
+    env = {**DEFAULT_ENV, **os.environ, "PYTHONPATH": ROOT}
+    samples, modules = [], []
+    for _ in range(args.runs):
+        sample, modules = run_once(env)
+        samples.append(sample)
+
+    top = sorted((row for row in modules if row[0].split(".")[0] in ("app",) + HEAVY_MODULES), key=lambda row: -row[2])
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_ms": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "create_app_ms": round(statistics.median(s["create_app_ms"] for s in samples), 1),
+        "heavy_modules_at_import": samples[-1]["heavy_modules"],
+        "top_modules_ms": {name: round(cumulative / 1000, 1) for name, _, cumulative in top[:args.top]},
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["baseline"] = {
+            key: {"before": baseline[key], "after": report[key], "change_pct": round((report[key] / baseline[key] - 1) * 100, 1)}
+            for key in ("import_ms", "create_app_ms") if baseline.get(key)
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""실행 중인 API 서버에 대한 HTTP 부하 테스트.
+
+세션 생성, 메시지 저장, 채팅, 의미 검색, 목록 조회, 삭제를 가중치(--mix)에 따라 섞어 보내고
+엔드포인트별 p50/p95/p99 지연, 처리량, 오류율을 JSON 으로 출력합니다.
+
+- 닫힌 부하(기본): --concurrency 명의 가상 사용자가 응답을 받으면 (--think-time 후) 다음 요청을 보냅니다.
+- 열린 부하(--rate): 초당 --rate 건을 포아송 도착으로 보내며 동시 요청은 --concurrency 로 제한합니다.
+  지연은 예정된 도착 시각부터 측정하므로 서버가 밀릴 때 대기 시간도 지연에 포함됩니다.
+
+--baseline 으로 저장된 리포트를 주면 엔드포인트별로 비교해 임계값을 넘는 회귀가 있으면
+종료 코드 1 로 끝납니다.
+
+    python benchmarks/load_test.py --concurrency 50 --duration 60 --output report.json
+    python benchmarks/load_test.py --rate 200 --concurrency 500 --duration 120 --mix chat=0
+    python benchmarks/load_test.py --duration 60 --baseline baseline.json --max-latency-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx  # pip install httpx
+
+DEFAULT_MIX = {
+    "create_session": 1,
+    "post_message": 4,
+    "chat": 1,
+    "semantic_search": 4,
+    "list_messages": 3,
+    "list_sessions": 1,
+    "delete_session": 1,
+}
+
+PROMPTS = [
+    "How do I roll back a failed deployment?",
+    "Summarize what we discussed about the database migration.",
+    "What is the difference between a process and a thread?",
+    "Can you suggest a name for the new caching service?",
+    "Why does the search endpoint return duplicate results?",
+    "Write a short release note for the token counting change.",
+    "What were the action items from yesterday's meeting?",
+    "Explain how the rate limiter decides to back off.",
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """정렬된 값의 q 분위수 (선형 보간)."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class Recorder:
+    """엔드포인트별 지연/상태 코드 기록. warmup 구간에 시작한 요청은 집계하지 않습니다."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, label: str, started: float, latency: float, status: str, ok: bool) -> None:
+        if started < self.measure_from:
+            return
+        self.latencies.setdefault(label, []).append(latency)
+        if not ok:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        codes = self.statuses.setdefault(label, {})
+        codes[status] = codes.get(status, 0) + 1
+
+    def summarize(self, elapsed: float) -> Dict[str, Any]:
+        def stats(values: List[float], errors: int) -> Dict[str, Any]:
+            values = sorted(values)
+            return {
+                "requests": len(values),
+                "errors": errors,
+                "error_rate": round(errors / len(values), 4) if values else 0.0,
+                "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+                "latency_ms": {
+                    "p50": _ms(percentile(values, 0.50)),
+                    "p95": _ms(percentile(values, 0.95)),
+                    "p99": _ms(percentile(values, 0.99)),
+                    "mean": _ms(sum(values) / len(values)) if values else None,
+                    "max": _ms(values[-1]) if values else None,
+                },
+            }
+
+        endpoints = {}
+        for label in sorted(self.latencies):
+            endpoints[label] = stats(self.latencies[label], self.errors.get(label, 0))
+            endpoints[label]["status_codes"] = self.statuses[label]
+        everything = [latency for values in self.latencies.values() for latency in values]
+        return {"endpoints": endpoints, "total": stats(everything, sum(self.errors.values()))}
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+class Workload:
+    """요청 혼합과 부하 중 생성/삭제되는 세션 풀."""
+
+    def __init__(self, client: httpx.AsyncClient, api: str, mix: Dict[str, float], recorder: Recorder, rng: random.Random):
+        self.client = client
+        self.api = api
+        self.recorder = recorder
+        self.rng = rng
+        self.operations = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.operations]
+        self.sessions: List[int] = []
+        # 다른 사용자가 삭제한 세션에 대한 404 는 오류로 세지 않음
+        self.deleted: set = set()
+        self.min_sessions = 1
+
+    async def request(
+        self,
+        label: str,
+        method: str,
+        path: str,
+        started: Optional[float] = None,
+        session_id: Optional[int] = None,
+        **kwargs
+    ) -> Optional[httpx.Response]:
+        started = started if started is not None else time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{self.api}{path}", **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(label, started, time.perf_counter() - started, type(e).__name__, False)
+            return None
+        ok = response.status_code < 400 or (response.status_code == 404 and session_id in self.deleted)
+        self.recorder.record(label, started, time.perf_counter() - started, str(response.status_code), ok)
+        return response
+
+    async def create_session(self, started: Optional[float] = None) -> Optional[int]:
+        response = await self.request(
+            "POST /sessions", "POST", "/sessions",
+            started=started, json={"name": f"load-{self.rng.randrange(10**9)}"}
+        )
+        if response is None or response.status_code >= 400:
+            return None
+        session_id = response.json()["id"]
+        self.sessions.append(session_id)
+        return session_id
+
+    async def run_one(self, started: Optional[float] = None) -> None:
+        operation = self.rng.choices(self.operations, weights=self.weights)[0]
+        if operation == "create_session" or not self.sessions:
+            await self.create_session(started)
+            return
+        if operation == "list_sessions":
+            await self.request("GET /sessions", "GET", "/sessions", started=started)
+            return
+
+        session_id = self.rng.choice(self.sessions)
+        prompt = f"{self.rng.choice(PROMPTS)} ({self.rng.randrange(10**6)})"
+        if operation == "post_message":
+            await self.request(
+                "POST /sessions/{id}/messages", "POST", f"/sessions/{session_id}/messages",
+                started=started, session_id=session_id, json={"content": prompt, "role": "user"}
+            )
+        elif operation == "chat":
+            await self.request(
+                "POST /chat", "POST", "/chat",
+                started=started, session_id=session_id, json={"session_id": session_id, "prompt": prompt}
+            )
+        elif operation == "semantic_search":
+            await self.request(
+                "POST /query/semantic_search", "POST", "/query/semantic_search",
+                started=started, session_id=session_id,
+                json={"session_id": session_id, "query": prompt, "limit": 5}
+            )
+        elif operation == "list_messages":
+            await self.request(
+                "GET /sessions/{id}/messages", "GET", f"/sessions/{session_id}/messages",
+                started=started, session_id=session_id
+            )
+        elif operation == "delete_session":
+            if len(self.sessions) <= self.min_sessions:
+                await self.create_session(started)
+                return
+            self.sessions.remove(session_id)
+            self.deleted.add(session_id)
+            await self.request("DELETE /sessions/{id}", "DELETE", f"/sessions/{session_id}", started=started)
+        else:
+            raise ValueError(f"Unknown operation: {operation}")
+
+
+async def seed(workload: Workload, sessions: int, messages: int) -> None:
+    """검색/목록 요청이 빈 세션만 보지 않도록 미리 세션과 메시지를 만듭니다 (집계 제외)."""
+    for _ in range(sessions):
+        response = await workload.client.post(f"{workload.api}/sessions", json={"name": "load-seed"})
+        response.raise_for_status()
+        session_id = response.json()["id"]
+        workload.sessions.append(session_id)
+        for i in range(messages):
+            await workload.client.post(
+                f"{workload.api}/sessions/{session_id}/messages",
+                json={"content": PROMPTS[i % len(PROMPTS)], "role": "user"}
+            )
+    workload.min_sessions = max(1, sessions // 2)
+
+
+async def closed_loop(workload: Workload, concurrency: int, deadline: float, think_time: float) -> None:
+    async def user() -> None:
+        while time.perf_counter() < deadline:
+            await workload.run_one()
+            if think_time > 0:
+                await asyncio.sleep(workload.rng.expovariate(1 / think_time))
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(workload: Workload, rate: float, concurrency: int, deadline: float) -> None:
+    limiter = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def arrival(scheduled: float) -> None:
+        async with limiter:
+            await workload.run_one(started=scheduled)
+
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(arrival(scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        scheduled += workload.rng.expovariate(rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    mix = dict(DEFAULT_MIX)
+    for item in args.mix:
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation in --mix: {name} (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight)
+
+    api = f"{args.base_url.rstrip('/')}/api/{args.api_version}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        rng = random.Random(args.seed)
+        workload = Workload(client, api, mix, Recorder(measure_from=float("inf")), rng)
+        await seed(workload, args.seed_sessions, args.seed_messages)
+
+        started = time.perf_counter()
+        workload.recorder.measure_from = started + args.warmup
+        deadline = workload.recorder.measure_from + args.duration
+        if args.rate:
+            await open_loop(workload, args.rate, args.concurrency, deadline)
+        else:
+            await closed_loop(workload, args.concurrency, deadline, args.think_time)
+        elapsed = time.perf_counter() - workload.recorder.measure_from
+
+        if not args.keep_sessions:
+            for session_id in workload.sessions:
+                try:
+                    await client.delete(f"{api}/sessions/{session_id}")
+                except httpx.HTTPError:
+                    pass
+
+    report = workload.recorder.summarize(elapsed)
+    report["config"] = {
+        "base_url": args.base_url,
+        "mode": "open" if args.rate else "closed",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "duration_s": args.duration,
+        "warmup_s": args.warmup,
+        "think_time_s": args.think_time,
+        "mix": mix,
+    }
+    report["started_at"] = datetime.now(timezone.utc).isoformat()
+    report["elapsed_s"] = round(elapsed, 2)
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], args: argparse.Namespace) -> List[str]:
+    """baseline 대비 임계값을 넘는 회귀 목록을 반환합니다 (샘플이 적은 엔드포인트는 제외)."""
+    failures = []
+    for label, base in baseline.get("endpoints", {}).items():
+        current = report["endpoints"].get(label)
+        if current is None or min(current["requests"], base["requests"]) < args.min_samples:
+            continue
+        for key in ("p95", "p99"):
+            before, after = base["latency_ms"][key], current["latency_ms"][key]
+            if before and after and (after - before) / before > args.max_latency_regression:
+                failures.append(f"{label}: {key} {before}ms -> {after}ms")
+        if current["error_rate"] - base["error_rate"] > args.max_error_rate_increase:
+            failures.append(f"{label}: error rate {base['error_rate']:.2%} -> {current['error_rate']:.2%}")
+        before, after = base["throughput_rps"], current["throughput_rps"]
+        if before and (before - after) / before > args.max_throughput_drop:
+            failures.append(f"{label}: throughput {before} -> {after} req/s")
+    return failures
+
+
+def print_table(report: Dict[str, Any]) -> None:
+    header = f"{'endpoint':<32} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    print(header, file=sys.stderr)
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for label, stats in rows:
+        latency = stats["latency_ms"]
+        print(
+            f"{label:<32} {stats['requests']:>7} {stats['error_rate'] * 100:>6.2f} {stats['throughput_rps']:>8.1f} "
+            + " ".join(f"{latency[key] if latency[key] is not None else '-':>8}" for key in ("p50", "p95", "p99")),
+            file=sys.stderr
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=os.getenv("VITE_API_URL", "http://localhost:8000"))
+    parser.add_argument("--api-version", default=os.getenv("VITE_API_VERSION", "v1"))
+    parser.add_argument("--concurrency", type=int, default=50, help="Virtual users (closed) or max in-flight requests (open)")
+    parser.add_argument("--rate", type=float, default=None, help="Arrival rate in requests/s (enables open-loop mode)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring starts")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests (closed loop)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--mix", nargs="*", default=[], metavar="OP=WEIGHT", help="Override operation weights, e.g. chat=0")
+    parser.add_argument("--seed-sessions", type=int, default=10)
+    parser.add_argument("--seed-messages", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the request mix")
+    parser.add_argument("--keep-sessions", action="store_true", help="Do not delete the sessions created by the run")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Stored report to compare against")
+    parser.add_argument("--max-latency-regression", type=float, default=0.2, help="Allowed relative p95/p99 increase")
+    parser.add_argument("--max-error-rate-increase", type=float, default=0.01, help="Allowed absolute error rate increase")
+    parser.add_argument("--max-throughput-drop", type=float, default=0.2, help="Allowed relative throughput decrease")
+    parser.add_argument("--min-samples", type=int, default=20, help="Skip endpoints with fewer requests in the comparison")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_table(report)
+
+    failures: List[str] = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(report, json.load(f), args)
+        report["regressions"] = failures
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+
+    if failures:
+        print("Regressions against baseline:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
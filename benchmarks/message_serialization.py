@@ -0,0 +1,99 @@
+"""세션 메시지 목록 응답의 직렬화 경로 비교.
+
+기존 경로(ORM 객체 → response_model 검증 → 표준 json)와 새 경로(컬럼 조회 → dict →
+orjson)를 메시지 수별로 비교하고, gzip 압축 시 크기/시간도 함께 출력합니다.
+
+    python benchmarks/message_serialization.py --sizes 1000 10000 100000
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.models.session import SessionModel  # noqa: E402
+from app.models.message import MessageModel, MessageResponse  # noqa: E402
+from app.utils.serialization import MESSAGE_FIELDS, message_columns, project_rows  # noqa: E402
+
+
+def build(engine, count: int) -> None:
+    with Session(engine) as db:
+        db.add(SessionModel(id=1, name="bench", created_at=datetime.utcnow(), updated_at=datetime.utcnow()))
+        started = datetime(2024, 1, 1)
+        db.bulk_insert_mappings(MessageModel, [
+            {
+                "session_id": 1,
+                "role": "user" if i % 2 == 0 else "assistant",
+                "content": f"message {i} " + "lorem ipsum dolor sit amet " * 8,
+                "created_at": started + timedelta(seconds=i),
+            }
+            for i in range(count)
+        ])
+        db.commit()
+
+
+def legacy(engine, adapter: TypeAdapter) -> bytes:
+    """FastAPI 기본 경로: ORM 조회 → response_model 검증/직렬화 → json.dumps."""
+    with Session(engine) as db:
+        rows = db.query(MessageModel).filter(MessageModel.session_id == 1).all()
+        content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast(engine) -> bytes:
+    with Session(engine) as db:
+        query = db.query(*message_columns(MessageModel)).filter(MessageModel.session_id == 1)
+        return orjson.dumps(project_rows(query, MESSAGE_FIELDS))
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[MessageResponse])
+    report = []
+    for size in args.sizes:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine)
+        build(engine, size)
+
+        legacy_ms, legacy_body = timed(lambda: legacy(engine, adapter), args.repeat)
+        fast_ms, fast_body = timed(lambda: fast(engine), args.repeat)
+        assert json.loads(legacy_body) == json.loads(fast_body), "fast path output differs"
+        gzip_ms, compressed = timed(lambda: gzip.compress(fast_body, compresslevel=9), args.repeat)
+        report.append({
+            "messages": size,
+            "legacy_ms": round(legacy_ms, 1),
+            "fast_ms": round(fast_ms, 1),
+            "speedup": round(legacy_ms / fast_ms, 2),
+            "body_bytes": len(fast_body),
+            "gzip_bytes": len(compressed),
+            "gzip_ms": round(gzip_ms, 1),
+        })
+        engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
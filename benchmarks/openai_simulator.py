@@ -0,0 +1,286 @@
+"""OpenAI API 로컬 시뮬레이터.
+
+/v1/embeddings 와 /v1/chat/completions (stream 포함)를 흉내 내는 서버입니다. 네트워크나 API 비용
+없이 벤치마크/장애 테스트를 재현 가능하게 돌리기 위한 용도입니다.
+
+- 임베딩: (모델, 입력) 해시로 시드한 결정적 단위 벡터 (--dimension, 요청의 dimensions 우선)
+- 채팅: 입력 해시로 정해지는 결정적 응답, stream=true 이면 SSE 로 --stream-tokens-per-second 속도로 전송
+- 지연: --latency-dist (fixed/uniform/normal/lognormal/exponential) 와 --latency-ms, --latency-sigma
+- 한도: --requests-per-minute, --tokens-per-minute 를 넘으면 Retry-After 와 함께 429
+- 장애 주입: --rate-limit-rate(무작위 429), --error-rate(500), --timeout-rate(--timeout-seconds 동안 응답 없음)
+
+실행 중에 GET/POST /_config 로 설정을 바꾸고 GET /_stats 로 결과별 요청 수를 볼 수 있습니다.
+
+    python benchmarks/openai_simulator.py --port 8100 --latency-ms 80 --rate-limit-rate 0.05
+    OPENAI_BASE_URL=http://localhost:8100/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.utils.rate_limit import TokenBucket  # noqa: E402
+
+WORDS = (
+    "the service stores each message with its embedding so that later questions can be answered "
+    "from similar context while recent turns are kept in memory and older ones are searched by vector"
+).split()
+
+
+class SimulatorConfig(BaseModel):
+    dimension: int = 1536
+    latency_ms: float = 50.0
+    latency_dist: Literal["fixed", "uniform", "normal", "lognormal", "exponential"] = "lognormal"
+    latency_sigma: float = 0.5
+    chat_ms_per_token: float = 0.0
+    completion_tokens: int = 64
+    stream_tokens_per_second: float = 50.0
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 600.0
+    retry_after_seconds: float = 1.0
+    seed: int = 0
+
+
+class Simulator:
+    def __init__(self, config: SimulatorConfig):
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+        self.configure(config)
+
+    def configure(self, config: SimulatorConfig) -> None:
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.request_bucket = TokenBucket(config.requests_per_minute) if config.requests_per_minute else None
+        self.token_bucket = TokenBucket(config.tokens_per_minute) if config.tokens_per_minute else None
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def latency(self) -> float:
+        """설정된 분포에서 응답 지연(초)을 뽑습니다. lognormal 은 latency_ms 가 중앙값입니다."""
+        config = self.config
+        base = config.latency_ms / 1000
+        if config.latency_dist == "fixed":
+            return base
+        if config.latency_dist == "uniform":
+            return self.rng.uniform(0, 2 * base)
+        if config.latency_dist == "normal":
+            return max(0.0, self.rng.gauss(base, config.latency_sigma * base))
+        if config.latency_dist == "exponential":
+            return self.rng.expovariate(1 / base) if base > 0 else 0.0
+        return base * self.rng.lognormvariate(0, config.latency_sigma)
+
+    async def admit(self, endpoint: str, tokens: int) -> Optional[JSONResponse]:
+        """장애 주입과 한도를 적용합니다. 요청을 거절하면 오류 응답을, 통과하면 None 을 반환합니다."""
+        config = self.config
+        roll = self.rng.random()
+        if roll < config.timeout_rate:
+            self.count(f"{endpoint}.timeout")
+            await asyncio.sleep(config.timeout_seconds)
+            return _error(504, "Simulated upstream timeout", "timeout")
+        roll -= config.timeout_rate
+        if roll < config.rate_limit_rate:
+            self.count(f"{endpoint}.rate_limited")
+            return _error(429, "Simulated rate limit", "rate_limit_exceeded", config.retry_after_seconds)
+        roll -= config.rate_limit_rate
+        if roll < config.error_rate:
+            self.count(f"{endpoint}.error")
+            return _error(500, "Simulated server error", "server_error")
+
+        for bucket, amount, kind in ((self.request_bucket, 1, "requests"), (self.token_bucket, tokens, "tokens")):
+            if bucket is None:
+                continue
+            wait = bucket.try_reserve(amount)
+            if wait > 0:
+                self.count(f"{endpoint}.rate_limited")
+                return _error(429, f"Rate limit reached for {kind}", "rate_limit_exceeded", wait)
+        return None
+
+
+def _error(status: int, message: str, code: str, retry_after: Optional[float] = None) -> JSONResponse:
+    headers = {"retry-after": f"{retry_after:.3f}"} if retry_after is not None else None
+    return JSONResponse(
+        status_code=status,
+        content={"error": {"message": message, "type": code, "param": None, "code": code}},
+        headers=headers
+    )
+
+
+def _approx_tokens(text: str) -> int:
+    # tiktoken BPE 는 처음 쓸 때 내려받아야 하므로 오프라인에서도 돌도록 근사치 사용
+    return max(1, len(text) // 4)
+
+
+def _digest(*parts: str) -> int:
+    return int.from_bytes(hashlib.sha256("\0".join(parts).encode("utf-8")).digest()[:8], "little")
+
+
+@lru_cache(maxsize=65536)
+def _vector(model: str, text: str, dimension: int) -> np.ndarray:
+    vector = np.random.default_rng(_digest(model, text)).standard_normal(dimension).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _completion_words(model: str, messages: List[Dict[str, Any]], count: int) -> List[str]:
+    rng = random.Random(_digest(model, json.dumps(messages, sort_keys=True, ensure_ascii=False)))
+    return [rng.choice(WORDS) for _ in range(count)]
+
+
+def create_simulator_app(config: SimulatorConfig) -> FastAPI:
+    app = FastAPI(title="OpenAI simulator")
+    simulator = Simulator(config)
+    app.state.simulator = simulator
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+        inputs: Union[str, List[Any]] = body.get("input", "")
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        texts = [item if isinstance(item, str) else ",".join(map(str, item)) for item in inputs]
+        tokens = sum(_approx_tokens(text) for text in texts)
+
+        rejected = await simulator.admit("embeddings", tokens)
+        if rejected is not None:
+            return rejected
+        await asyncio.sleep(simulator.latency())
+
+        dimension = body.get("dimensions") or simulator.config.dimension
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        for index, text in enumerate(texts):
+            vector = _vector(model, text, dimension)
+            embedding = base64.b64encode(vector.tobytes()).decode("ascii") if as_base64 else vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        simulator.count("embeddings.ok")
+        return {
+            "object": "list",
+            "data": data,
+            "model": model,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+        messages = body.get("messages", [])
+        prompt_tokens = sum(_approx_tokens(str(message.get("content") or "")) for message in messages)
+        max_tokens = body.get("max_tokens")
+        completion_tokens = simulator.config.completion_tokens
+        if max_tokens is not None:
+            completion_tokens = min(completion_tokens, max_tokens)
+
+        rejected = await simulator.admit("chat", prompt_tokens + completion_tokens)
+        if rejected is not None:
+            return rejected
+        await asyncio.sleep(simulator.latency())
+
+        words = _completion_words(model, messages, completion_tokens)
+        finish_reason = "length" if max_tokens is not None and max_tokens < simulator.config.completion_tokens else "stop"
+        completion_id = f"chatcmpl-sim{_digest(model, str(time.time_ns())) % 10**12}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        if body.get("stream"):
+            simulator.count("chat.stream")
+
+            def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            async def events():
+                interval = 1 / simulator.config.stream_tokens_per_second if simulator.config.stream_tokens_per_second > 0 else 0
+                yield chunk({"role": "assistant", "content": ""})
+                for i, word in enumerate(words):
+                    if interval:
+                        await asyncio.sleep(interval)
+                    yield chunk({"content": word if i == 0 else f" {word}"})
+                yield chunk({}, finish_reason)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        if simulator.config.chat_ms_per_token > 0:
+            await asyncio.sleep(completion_tokens * simulator.config.chat_ms_per_token / 1000)
+        simulator.count("chat.ok")
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": finish_reason,
+            }],
+            "usage": usage,
+        }
+
+    @app.get("/_stats")
+    async def stats():
+        return simulator.stats
+
+    @app.get("/_config")
+    async def get_config():
+        return simulator.config
+
+    @app.post("/_config")
+    async def update_config(changes: Dict[str, Any]):
+        """일부 항목만 보내도 됩니다 (예: {"error_rate": 0.2}). 한도/난수 상태는 새로 만듭니다."""
+        simulator.configure(SimulatorConfig(**{**simulator.config.model_dump(), **changes}))
+        return simulator.config
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    for name, field in SimulatorConfig.model_fields.items():
+        option = f"--{name.replace('_', '-')}"
+        if name == "latency_dist":
+            parser.add_argument(option, choices=["fixed", "uniform", "normal", "lognormal", "exponential"], default=field.default)
+        else:
+            kind = type(field.default) if field.default is not None else float
+            parser.add_argument(option, type=kind, default=field.default)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    uvicorn.run(create_simulator_app(SimulatorConfig(**args)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
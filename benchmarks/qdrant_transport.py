@@ -0,0 +1,137 @@
+"""Qdrant REST / gRPC 전송 방식별 업서트·검색 처리량과 지연 비교.
+
+로컬 Qdrant 서버(바이너리 또는 docker, REST 6333 / gRPC 6334)에 대해 전송 방식마다 컬렉션을
+새로 만들고, 단건/배치 업서트와 단건/배치 검색을 실행해 처리량(points/s, queries/s)과
+호출당 p50/p95/p99 지연을 JSON 으로 출력합니다. 클라이언트 옵션은 앱과 같은
+transport_options() 로 만듭니다.
+
+    ./qdrant  # 또는 docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+    python benchmarks/qdrant_transport.py --points 5000 --batch-sizes 1 64 256
+    python benchmarks/qdrant_transport.py --transports rest grpc grpc+gzip --dim 1536 --searches 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.qdrant_client import transport_options  # noqa: E402
+
+PREFIX = "bench_transport"
+
+
+def client_for(transport: str, args) -> QdrantClient:
+    name, _, compression = transport.partition("+")
+    options = transport_options(
+        prefer_grpc=name == "grpc",
+        grpc_port=args.grpc_port,
+        grpc_compression=compression or None
+    )
+    return QdrantClient(url=args.url, timeout=args.timeout, **options)
+
+
+def latency_stats(samples: List[float], items_per_call: int, total_items: int) -> Dict[str, Any]:
+    values = np.array(samples)
+    total = values.sum()
+    return {
+        "calls": len(samples),
+        "items_per_call": items_per_call,
+        "throughput_per_s": round(total_items / total, 1) if total > 0 else None,
+        "p50_ms": round(float(np.percentile(values, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(values, 95)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(values, 99)) * 1000, 3),
+    }
+
+
+def timed_calls(calls: List[Callable[[], Any]]) -> List[float]:
+    samples = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def run_transport(transport: str, args, vectors: np.ndarray, queries: np.ndarray) -> Dict[str, Any]:
+    client = client_for(transport, args)
+    collection = f"{PREFIX}_{transport.replace('+', '_')}"
+    payload = {"content": "x" * args.payload_bytes, "role": "user", "session_id": 1}
+    report: Dict[str, Any] = {}
+
+    for batch_size in args.batch_sizes:
+        client.recreate_collection(
+            collection, vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE)
+        )
+        calls = []
+        for start in range(0, len(vectors), batch_size):
+            rows = vectors[start:start + batch_size]
+            ids = list(range(start, start + len(rows)))
+            calls.append(lambda ids=ids, rows=rows: client.upsert(
+                collection,
+                points=models.Batch(ids=ids, vectors=rows.tolist(), payloads=[payload] * len(ids)),
+                wait=True
+            ))
+        report[f"upsert_batch_{batch_size}"] = latency_stats(timed_calls(calls), batch_size, len(vectors))
+
+    # 검색은 마지막 업서트로 채워진 컬렉션에서 실행 (warmup 후 측정)
+    for query in queries[:args.warmup]:
+        client.search(collection, query_vector=query.tolist(), limit=args.limit)
+    report["search_single"] = latency_stats(timed_calls([
+        lambda query=query: client.search(collection, query_vector=query.tolist(), limit=args.limit, with_payload=True)
+        for query in queries
+    ]), 1, len(queries))
+    batches = [queries[start:start + args.search_batch] for start in range(0, len(queries), args.search_batch)]
+    report[f"search_batch_{args.search_batch}"] = latency_stats(timed_calls([
+        lambda batch=batch: client.search_batch(collection, requests=[
+            models.SearchRequest(vector=query.tolist(), limit=args.limit, with_payload=True) for query in batch
+        ])
+        for batch in batches
+    ]), args.search_batch, len(queries))
+
+    client.delete_collection(collection)
+    client.close()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--grpc-port", type=int, default=6334)
+    parser.add_argument("--transports", nargs="+", default=["rest", "grpc", "grpc+gzip"],
+                        help="rest, grpc or grpc+<compression> (gzip, deflate)")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 256])
+    parser.add_argument("--payload-bytes", type=int, default=200, help="Size of the content field in each payload")
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--search-batch", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--timeout", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = rng.standard_normal((args.points, args.dim)).astype(np.float32)
+    queries = rng.standard_normal((args.searches, args.dim)).astype(np.float32)
+
+    results = {"config": vars(args), "transports": {}}
+    for transport in args.transports:
+        results["transports"][transport] = run_transport(transport, args, vectors, queries)
+        for operation, stats in results["transports"][transport].items():
+            print(
+                f"{transport:<10} {operation:<18} {stats['throughput_per_s']:>10}/s "
+                f"p50 {stats['p50_ms']:>8}ms p95 {stats['p95_ms']:>8}ms p99 {stats['p99_ms']:>8}ms",
+                file=sys.stderr
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""세션 centroid 라우팅의 recall / 후보 세션 수(M) 트레이드오프 측정.
+
+합성 데이터(주제 클러스터를 가진 세션들)를 만들어 전체 세션 검색 결과와
+centroid 로 고른 상위 M 개 세션만 검색한 결과를 비교합니다.
+
+    python benchmarks/routing_recall.py --sessions 500 --per-session 40 --m 10 25 50 100
+    python benchmarks/routing_recall.py --url http://localhost:6333 --sessions 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.centroid_index import SessionCentroidIndex  # noqa: E402
+
+PREFIX = "bench_routing"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def build(client: QdrantClient, args, rng: np.random.Generator) -> SessionCentroidIndex:
+    topics = normalize(rng.standard_normal((args.topics, args.dim)))
+    index = SessionCentroidIndex(client, args.dim, collection_name=f"{PREFIX}_centroids")
+    for session_id in range(1, args.sessions + 1):
+        # 세션마다 1~3개의 주제를 섞어 사용
+        session_topics = topics[rng.choice(args.topics, size=rng.integers(1, 4), replace=False)]
+        base = session_topics[rng.integers(0, len(session_topics), size=args.per_session)]
+        vectors = normalize(base + args.noise * rng.standard_normal((args.per_session, args.dim)))
+        name = f"{PREFIX}_{session_id}"
+        client.recreate_collection(name, vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE))
+        client.upsert(name, points=models.Batch(ids=list(range(args.per_session)), vectors=vectors.tolist()))
+        index.rebuild(session_id, collection_name=name)
+    return index
+
+
+def search(client: QdrantClient, session_ids, query, k):
+    hits = []
+    for session_id in session_ids:
+        for result in client.search(f"{PREFIX}_{session_id}", query_vector=query, limit=k):
+            hits.append((result.score, session_id, result.id))
+    hits.sort(reverse=True)
+    return {(session_id, point_id) for _, session_id, point_id in hits[:k]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Qdrant URL (default: in-process local mode)")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--per-session", type=int, default=30)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--noise", type=float, default=0.05, help="Per-dimension noise around topic vectors")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[5, 10, 25, 50, 100])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    client = QdrantClient(url=args.url) if args.url else QdrantClient(":memory:")
+    index = build(client, args, rng)
+    all_sessions = list(range(1, args.sessions + 1))
+
+    queries = []
+    for _ in range(args.queries):
+        session_id = int(rng.integers(1, args.sessions + 1))
+        point = client.retrieve(f"{PREFIX}_{session_id}", ids=[int(rng.integers(0, args.per_session))], with_vectors=True)[0]
+        queries.append(normalize(np.asarray(point.vector) + args.noise * rng.standard_normal(args.dim)).tolist())
+
+    started = time.perf_counter()
+    exact = [search(client, all_sessions, query, args.k) for query in queries]
+    exhaustive_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    report = {"sessions": args.sessions, "k": args.k, "exhaustive_ms_per_query": round(exhaustive_ms, 2), "m": []}
+    for m in args.m:
+        recalls = []
+        started = time.perf_counter()
+        for query, truth in zip(queries, exact):
+            routed = [route["session_id"] for route in index.route(query, m)]
+            recalls.append(len(search(client, routed, query, args.k) & truth) / len(truth))
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        report["m"].append({"m": m, "recall_at_k": round(float(np.mean(recalls)), 4), "ms_per_query": round(elapsed_ms, 2)})
+    print(json.dumps(report, indent=2))
+
+    if args.url:
+        for session_id in all_sessions:
+            client.delete_collection(f"{PREFIX}_{session_id}")
+        client.delete_collection(f"{PREFIX}_centroids")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings 필수 값 (설정을 읽는 코드만 사용, 외부 서비스에는 연결하지 않음)
+for name, value in {
+    "VITE_FRONTEND_HOST": "localhost",
+    "VITE_FRONTEND_PORT": "5173",
+    "VITE_API_HOST": "localhost",
+    "QDRANT_HOST": "localhost",
+    "OPENAI_API_KEY": "test",
+    "DATABASE_HOST": "sqlite:///:memory:",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+class CharEncoding:
+    """글자 하나를 토큰 하나로 세는 테스트용 인코딩 (tiktoken BPE 파일 없이 청크 경계를 검증)."""
+
+    def encode(self, text, disallowed_special=()):
+        return [ord(ch) for ch in text]
+
+    def decode(self, tokens):
+        return "".join(chr(token) for token in tokens)
+
+
+@pytest.fixture
+def char_encoding(monkeypatch):
+    import app.file_ingest
+    import app.utils.token_utils
+
+    encoding = CharEncoding()
+    monkeypatch.setattr(app.utils.token_utils, "get_encoding", lambda model=None: encoding)
+    monkeypatch.setattr(app.file_ingest, "get_encoding", lambda model=None: encoding)
+    return encoding
@@ -0,0 +1,53 @@
+from app.qdrant_client import search_chat_context
+from app.utils.adaptive_k import select_adaptive_k
+
+
+def _candidates(scores):
+    return [{"id": i, "score": score, "payload": {}} for i, score in enumerate(scores)]
+
+
+def test_cuts_at_largest_gap():
+    selected = select_adaptive_k(_candidates([0.91, 0.90, 0.88, 0.62, 0.60, 0.58]), min_k=1, max_k=5)
+    assert [c["id"] for c in selected] == [0, 1, 2]
+
+
+def test_no_clear_gap_returns_max_k():
+    selected = select_adaptive_k(_candidates([0.90, 0.89, 0.88, 0.87, 0.86, 0.85]), min_k=1, max_k=4)
+    assert len(selected) == 4
+
+
+def test_min_k_is_respected():
+    selected = select_adaptive_k(_candidates([0.95, 0.50, 0.49, 0.48]), min_k=2, max_k=4)
+    assert len(selected) == 2
+
+
+def test_self_match_collapses_k_to_one():
+    # 방금 저장한 프롬프트가 후보에 남으면 그 바로 뒤가 가장 큰 차이가 됨
+    scores = [0.999, 0.86, 0.855, 0.85, 0.845, 0.80, 0.78]
+    assert len(select_adaptive_k(_candidates(scores), min_k=1, max_k=3)) == 1
+    # 자기 자신을 뺀 후보에서는 비슷한 점수의 관련 메시지가 max_k 개까지 선택됨
+    assert len(select_adaptive_k(_candidates(scores[1:]), min_k=1, max_k=3)) == 3
+
+
+class _RecordingClient:
+    def __init__(self):
+        self.kwargs = None
+
+    def search_similar(self, **kwargs):
+        self.kwargs = kwargs
+        return []
+
+
+def test_chat_context_excludes_prompt_message_before_selection():
+    client = _RecordingClient()
+    search_chat_context(client, "hello", 1, query_vector=[0.0], exclude_message_id=42)
+    query_filter = client.kwargs["query_filter"]
+    assert query_filter is not None
+    (condition,) = query_filter.must_not
+    assert condition.key == "message_id" and condition.match.value == 42
+
+
+def test_chat_context_without_exclusion_has_no_filter():
+    client = _RecordingClient()
+    search_chat_context(client, "hello", 1, query_vector=[0.0])
+    assert client.kwargs["query_filter"] is None
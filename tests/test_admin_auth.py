@@ -0,0 +1,34 @@
+import pytest
+from fastapi import HTTPException
+
+from app.config import get_settings
+from app.utils.admin_auth import require_admin_key
+
+
+@pytest.fixture
+def admin_key(monkeypatch):
+    def configure(value):
+        if value is None:
+            monkeypatch.delenv("ADMIN_API_KEY", raising=False)
+        else:
+            monkeypatch.setenv("ADMIN_API_KEY", value)
+        get_settings.cache_clear()
+    yield configure
+    get_settings.cache_clear()
+
+
+def test_rejects_every_request_when_no_key_is_configured(admin_key):
+    admin_key(None)
+    for header in (None, "", "anything"):
+        with pytest.raises(HTTPException) as exc:
+            require_admin_key(header)
+        assert exc.value.status_code == 403
+
+
+def test_requires_matching_key(admin_key):
+    admin_key("s3cret")
+    with pytest.raises(HTTPException):
+        require_admin_key(None)
+    with pytest.raises(HTTPException):
+        require_admin_key("wrong")
+    assert require_admin_key("s3cret") is None
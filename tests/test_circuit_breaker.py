@@ -0,0 +1,54 @@
+import pytest
+
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_seconds=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_single_trial(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # 시험 호출이 끝나기 전의 다른 호출은 거절
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock[0] += 5
+    assert not breaker.allow()
+    clock[0] += 5
+    assert breaker.allow()
@@ -0,0 +1,36 @@
+import pytest
+
+from app.utils import deadline as deadline_module
+from app.utils.deadline import Deadline
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [500.0]
+    monkeypatch.setattr(deadline_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_remaining_and_elapsed(clock):
+    deadline = Deadline(30.0)
+    clock[0] += 12
+    assert deadline.elapsed() == pytest.approx(12)
+    assert deadline.remaining() == pytest.approx(18)
+    assert not deadline.expired()
+
+
+def test_remaining_never_negative(clock):
+    deadline = Deadline(1.0)
+    clock[0] += 5
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+
+
+def test_budget_for_keeps_reserve(clock):
+    deadline = Deadline(30.0)
+    clock[0] += 15
+    assert deadline.budget_for(10.0) == pytest.approx(5)
+    assert deadline.budget_for() == pytest.approx(15)
+    # 남은 시간이 reserve 이하이면 이 단계에 쓸 예산 없음
+    clock[0] += 5
+    assert deadline.budget_for(10.0) is None
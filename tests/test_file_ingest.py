@@ -0,0 +1,36 @@
+import app.file_ingest
+from app.file_ingest import TokenChunker, _text_segments
+
+
+def test_chunker_spans_fed_pieces(char_encoding):
+    chunker = TokenChunker(max_tokens=4, overlap_tokens=1)
+    chunks = list(chunker.feed(1, "abcde")) + list(chunker.feed(2, "fgh")) + list(chunker.flush())
+    assert chunks == [(1, "abcd", 4), (1, "defg", 4), (2, "gh", 2)]
+
+
+def test_chunker_drops_tail_already_in_last_chunk(char_encoding):
+    chunker = TokenChunker(max_tokens=4, overlap_tokens=1)
+    chunks = list(chunker.feed(1, "abcdefg")) + list(chunker.flush())
+    # 남은 "g" 는 마지막 청크의 겹침 부분이므로 따로 내보내지 않음
+    assert [text for _, text, _ in chunks] == ["abcd", "defg"]
+
+
+def test_chunker_flushes_short_document(char_encoding):
+    chunker = TokenChunker(max_tokens=10)
+    assert list(chunker.feed(3, "abc")) == []
+    assert list(chunker.flush()) == [(3, "abc", 3)]
+    assert list(chunker.flush()) == []
+
+
+def test_text_segments_keep_words_whole_and_cut_long_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(app.file_ingest, "TEXT_BLOCK_BYTES", 8)
+    path = tmp_path / "words.txt"
+    path.write_text("alpha beta gamma")
+    segments = [text for _, text in _text_segments(str(path))]
+    assert "".join(segments) == "alpha beta gamma"
+    assert all(segment.endswith(" ") for segment in segments[:-1])
+    # 공백 없이 이어지는 텍스트도 블록 크기 근처에서 잘림
+    path.write_text("x" * 40)
+    segments = [text for _, text in _text_segments(str(path))]
+    assert "".join(segments) == "x" * 40
+    assert max(len(segment) for segment in segments) <= 16
@@ -0,0 +1,39 @@
+import pytest
+from pydantic import ValidationError
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.models.query import GlobalSearchRequest
+from app.qdrant_client import QdrantClientWrapper
+from app.utils.search_cache import SearchCache
+
+
+def test_user_id_is_required():
+    # user_id 없이 모든 사용자의 세션을 검색하지 않도록 요청 단계에서 422
+    with pytest.raises(ValidationError):
+        GlobalSearchRequest(query="deployment error")
+    assert GlobalSearchRequest(query="deployment error", user_id="u1").user_id == "u1"
+
+
+@pytest.fixture
+def wrapper(monkeypatch, char_encoding):
+    monkeypatch.setenv("EMBEDDING_DIMENSION", "4")
+    monkeypatch.setenv("SESSION_CENTROID_FLUSH_SECONDS", "0")
+    get_settings.cache_clear()
+    qdrant = QdrantClientWrapper(url="http://localhost:6333", search_cache=SearchCache(max_entries=0))
+    qdrant.client = QdrantClient(":memory:")
+    yield qdrant
+    get_settings.cache_clear()
+
+
+def test_sessions_without_centroid_are_still_searched(wrapper, monkeypatch):
+    vectors = {1: [1.0, 0.0, 0.0, 0.0], 2: [0.0, 1.0, 0.0, 0.0], 3: [0.0, 0.0, 1.0, 0.0]}
+    for session_id in (1, 2):
+        wrapper.store_embedding(session_id, session_id, f"message {session_id}", embeddings=[vectors[session_id]])
+    # centroid 인덱스를 채우기 전에 저장된 세션
+    wrapper.create_session_collection("session_3", 4)
+    wrapper.client.upsert("session_3", points=wrapper.build_points(3, 3, "message 3", [vectors[3]]))
+
+    monkeypatch.setattr(wrapper, "embed_message", lambda text, chunks=None: [[0.1, 0.0, 1.0, 0.0]])
+    hits = wrapper.search_sessions("query", [1, 2, 3], limit=1, candidate_sessions=1)
+    assert [hit["payload"]["session_id"] for hit in hits] == [3]
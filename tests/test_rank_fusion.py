@@ -0,0 +1,30 @@
+import pytest
+
+from app.utils.rank_fusion import reciprocal_rank_fusion
+
+
+def _ranking(*ids):
+    return [{"id": i, "score": 1.0, "payload": {"source": i}} for i in ids]
+
+
+def test_scores_sum_reciprocal_ranks():
+    fused = reciprocal_rank_fusion([_ranking("a", "b"), _ranking("b", "c")], limit=10, k=60)
+    scores = {result["id"]: result["score"] for result in fused}
+    assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores["a"] == pytest.approx(1 / 61)
+    assert scores["c"] == pytest.approx(1 / 62)
+    # 두 목록에 모두 나온 결과가 가장 위
+    assert [result["id"] for result in fused] == ["b", "a", "c"]
+
+
+def test_limit_and_empty_rankings():
+    assert reciprocal_rank_fusion([], limit=5) == []
+    assert reciprocal_rank_fusion([[], []], limit=5) == []
+    assert len(reciprocal_rank_fusion([_ranking(*range(10))], limit=3)) == 3
+
+
+def test_payload_comes_from_first_ranking():
+    first = [{"id": 1, "score": 0.9, "payload": {"content": "vector"}}]
+    second = [{"id": 1, "score": 7.0, "payload": {"content": "lexical"}}]
+    assert reciprocal_rank_fusion([first, second])[0]["payload"] == {"content": "vector"}
+    assert reciprocal_rank_fusion([[{"id": 2, "score": 1.0}]])[0]["payload"] == {}
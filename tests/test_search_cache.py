@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from app.utils.search_cache import SearchCache, normalize_query
+
+
+def _counting(result):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result
+
+    return compute, calls
+
+
+def test_hit_returns_copy_without_recomputing():
+    cache = SearchCache(max_entries=10, ttl_seconds=60)
+    compute, calls = _counting([1, 2])
+    first = cache.get_or_compute(1, "q", compute)
+    first.append(3)
+    assert cache.get_or_compute(1, "q", compute) == [1, 2]
+    assert len(calls) == 1
+
+
+def test_bump_invalidates_only_that_session():
+    cache = SearchCache(max_entries=10, ttl_seconds=60)
+    compute, calls = _counting([1])
+    cache.get_or_compute(1, "q", compute)
+    cache.get_or_compute(2, "q", compute)
+    cache.bump(1)
+    cache.get_or_compute(1, "q", compute)
+    cache.get_or_compute(2, "q", compute)
+    assert len(calls) == 3
+
+
+def test_lru_eviction_and_disabled_cache():
+    cache = SearchCache(max_entries=2, ttl_seconds=60)
+    compute, calls = _counting([])
+    for key in ("a", "b", "c", "a"):
+        cache.get_or_compute(1, key, compute)
+    assert len(calls) == 4
+
+    disabled = SearchCache(max_entries=0)
+    compute, calls = _counting([])
+    disabled.get_or_compute(1, "a", compute)
+    disabled.get_or_compute(1, "a", compute)
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_compute_once():
+    cache = SearchCache(max_entries=10, ttl_seconds=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ["result"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute(1, "q", compute)))
+    leader.start()
+    started.wait(5)
+    followers = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute(1, "q", compute)))
+        for _ in range(3)
+    ]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [["result"]] * 4
+
+
+def test_failure_is_not_cached():
+    cache = SearchCache(max_entries=10, ttl_seconds=60)
+
+    def fail():
+        raise RuntimeError("qdrant down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute(1, "q", fail)
+    assert cache.get_or_compute(1, "q", lambda: ["ok"]) == ["ok"]
+
+
+def test_normalize_query_collapses_whitespace():
+    assert normalize_query("  hello \n  world ") == "hello world"
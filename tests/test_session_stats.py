@@ -0,0 +1,40 @@
+import pytest
+from qdrant_client import QdrantClient
+
+import app.session_stats
+from app.config import get_settings
+from app.qdrant_client import QdrantClientWrapper
+from app.session_stats import SessionStats
+from app.utils.search_cache import SearchCache
+
+
+@pytest.fixture
+def stats(monkeypatch, char_encoding):
+    monkeypatch.setenv("EMBEDDING_DIMENSION", "4")
+    monkeypatch.setenv("SESSION_CENTROIDS_ENABLED", "false")
+    get_settings.cache_clear()
+    session_stats = SessionStats()
+    monkeypatch.setattr(app.session_stats, "_session_stats", session_stats)
+    yield session_stats
+    get_settings.cache_clear()
+
+
+def test_vector_counts_follow_real_point_counts(stats):
+    qdrant = QdrantClientWrapper(url="http://localhost:6333", search_cache=SearchCache(max_entries=0))
+    qdrant.client = QdrantClient(":memory:")
+    vector = [1.0, 0.0, 0.0, 0.0]
+
+    def vector_count():
+        return stats.get(1)["vector_count"]
+
+    qdrant.store_embedding(10, 1, "long message", embeddings=[vector, vector, vector], chunks=["a", "b", "c"])
+    qdrant.store_embedding(11, 1, "short message", embeddings=[vector], chunks=["d"])
+    assert vector_count() == 4
+    # 수정 시 교체된 청크 수만큼 빠짐
+    qdrant.store_embedding(10, 1, "edited", embeddings=[vector], chunks=["e"], replace=True)
+    assert vector_count() == 2
+    # 벡터가 없는 메시지(어시스턴트 응답)를 지워도 그대로
+    qdrant.delete_embedding(12, 1)
+    assert vector_count() == 2
+    qdrant.delete_embedding(10, 1)
+    assert vector_count() == 1
@@ -0,0 +1,11 @@
+from app.utils.token_utils import split_tokens
+
+
+def test_split_tokens_short_text_is_unchanged(char_encoding):
+    assert split_tokens("abcdef", max_tokens=6) == ["abcdef"]
+    assert split_tokens("abcdef", max_tokens=0) == ["abcdef"]
+
+
+def test_split_tokens_with_overlap(char_encoding):
+    assert split_tokens("abcdefghij", max_tokens=4, overlap_tokens=1) == ["abcd", "defg", "ghij"]
+    assert split_tokens("abcdefghij", max_tokens=4) == ["abcd", "efgh", "ij"]
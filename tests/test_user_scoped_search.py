@@ -0,0 +1,81 @@
+import pytest
+from fastapi import BackgroundTasks
+from qdrant_client import QdrantClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+import app.lexical_index
+from app.chat_pipeline import retrieve_context
+from app.config import get_settings
+from app.lexical_index import LexicalIndex
+from app.models import MessageModel, SessionModel
+from app.qdrant_client import QdrantClientWrapper, build_payload_filter
+from app.utils.deadline import Deadline
+from app.utils.search_cache import SearchCache
+
+
+@pytest.fixture
+def lexical(monkeypatch):
+    # commit 시 ORM 이벤트가 쓰는 전역 인덱스를 메모리 인덱스로 교체
+    index = LexicalIndex(":memory:")
+    monkeypatch.setattr(app.lexical_index, "_lexical_index", index)
+    return index
+
+
+@pytest.fixture
+def db(char_encoding, lexical):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def wrapper(monkeypatch, char_encoding):
+    monkeypatch.setenv("SESSION_CENTROIDS_ENABLED", "false")
+    monkeypatch.setenv("EMBEDDING_DIMENSION", "4")
+    get_settings.cache_clear()
+    qdrant = QdrantClientWrapper(url="http://localhost:6333", search_cache=SearchCache(max_entries=0))
+    qdrant.client = QdrantClient(":memory:")
+    monkeypatch.setattr(qdrant, "embed_message", lambda content, chunks=None: [[1.0, 0.0, 0.0, 0.0]])
+    yield qdrant
+    get_settings.cache_clear()
+
+
+def _message(db, user_id, content):
+    session = SessionModel(name="s", user_id=user_id)
+    db.add(session)
+    db.commit()
+    message = MessageModel(session_id=session.id, content=content, role="user")
+    db.add(message)
+    db.commit()
+    return message
+
+
+def test_chat_vectors_are_found_by_owner_filter(db, wrapper):
+    message = _message(db, "alice", "hello there")
+    retrieve_context(wrapper, message, Deadline(30), BackgroundTasks(), user_id="alice")
+
+    def search(user_id):
+        return wrapper.search_similar(
+            "hello", message.session_id, limit=5,
+            query_filter=build_payload_filter(user_id=user_id), query_vector=[1.0, 0.0, 0.0, 0.0]
+        )
+
+    assert [result["payload"]["message_id"] for result in search("alice")] == [message.id]
+    assert search("bob") == []
+
+
+def test_lexical_rows_carry_session_owner(db, lexical):
+    index = lexical
+    message = _message(db, "alice", "lexical owner check")
+
+    # commit 시 ORM 이벤트로 반영된 행과 rebuild 로 다시 만든 행 모두 소유자를 가짐
+    for _ in range(2):
+        results = index.search("owner", query_filter=build_payload_filter(user_id="alice"))
+        assert [result["id"] for result in results] == [message.id]
+        assert index.search("owner", query_filter=build_payload_filter(user_id="bob")) == []
+        index.rebuild(db)